@@ -0,0 +1,204 @@
+import random
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests as rq
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+DEFAULTS = {
+    "POOL_CONNECTIONS": 10,
+    "POOL_MAXSIZE": 10,
+    "CONNECT_TIMEOUT": 3.05,
+    "READ_TIMEOUT": 10,
+    "RETRIES": 2,
+    "BACKOFF_FACTOR": 0.2,
+    "BACKOFF_MAX": 2,
+    "RETRY_STATUSES": (502, 503, 504),
+    "BREAKER_FAILURE_THRESHOLD": 5,
+    "BREAKER_RESET_TIMEOUT": timedelta(seconds=30),
+}
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class CircuitOpenError(rq.ConnectionError):
+    """Raised without calling out when a provider has been failing repeatedly."""
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a provider after ``failure_threshold`` consecutive failures.
+
+    Once ``reset_timeout`` seconds have passed a single trial call is let through;
+    its success closes the breaker again and its failure keeps it open.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def acquire(self):
+        """
+        Return whether a call may go through and whether it is the trial call,
+        which must ``release`` the breaker once it has finished.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True, False
+            if self._trial_running:
+                return False, False
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False, False
+            self._trial_running = True
+            return True, True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self, trial=False):
+        with self._lock:
+            self._failures += 1
+            if trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Let another trial call through once the current one has finished."""
+        with self._lock:
+            self._trial_running = False
+
+
+class HttpClient:
+    """
+    Shared client for calls to third party services.
+
+    Connections are pooled and kept alive per host, every call has connect and
+    read timeouts, failed calls are retried a bounded number of times with jittered
+    exponential backoff and each provider has its own circuit breaker. Settings
+    come from ``OUTBOUND_HTTP``, where ``PROVIDERS`` can override them per provider.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._breakers = {}
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                options = self._options()
+                adapter = HTTPAdapter(
+                    pool_connections=options["POOL_CONNECTIONS"],
+                    pool_maxsize=options["POOL_MAXSIZE"],
+                    max_retries=0,
+                )
+                session = rq.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def get(self, url, provider=None, **kwargs):
+        return self.request("GET", url, provider=provider, **kwargs)
+
+    def post(self, url, provider=None, **kwargs):
+        return self.request("POST", url, provider=provider, **kwargs)
+
+    def request(self, method, url, provider=None, **kwargs):
+        provider = provider or urlsplit(url).hostname
+        options = self._options(provider)
+        breaker = self.breaker(provider)
+        kwargs.setdefault(
+            "timeout", (options["CONNECT_TIMEOUT"], options["READ_TIMEOUT"])
+        )
+        # Requests that may have reached the server are only retried when
+        # repeating them is safe
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        allowed, trial = breaker.acquire()
+        if not allowed:
+            raise CircuitOpenError(f"Calls to {provider} are suspended")
+        # The breaker counts calls, not attempts, so retrying a slow call once
+        # doesn't add up to several failures
+        try:
+            response = self._send(method, url, idempotent, options, **kwargs)
+            if response.status_code >= 500:
+                breaker.record_failure(trial)
+            else:
+                breaker.record_success()
+            return response
+        except rq.RequestException:
+            breaker.record_failure(trial)
+            raise
+        finally:
+            # Only the trial call holds the breaker, whatever ended it
+            if trial:
+                breaker.release()
+
+    def _send(self, method, url, idempotent, options, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except rq.RequestException as error:
+                # A connect timeout means the request was never sent
+                retryable = idempotent or isinstance(error, rq.ConnectTimeout)
+                if not retryable or attempt >= options["RETRIES"]:
+                    raise
+            else:
+                if (
+                    response.status_code not in options["RETRY_STATUSES"]
+                    or not idempotent
+                    or attempt >= options["RETRIES"]
+                ):
+                    return response
+                response.close()
+
+            attempt += 1
+            time.sleep(self._backoff(attempt, options))
+
+    def breaker(self, provider):
+        with self._lock:
+            if provider not in self._breakers:
+                options = self._options(provider)
+                self._breakers[provider] = CircuitBreaker(
+                    options["BREAKER_FAILURE_THRESHOLD"],
+                    options["BREAKER_RESET_TIMEOUT"].total_seconds(),
+                )
+            return self._breakers[provider]
+
+    def reset(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._breakers = {}
+
+    def _backoff(self, attempt, options):
+        # Full jitter keeps retries from many workers from arriving together
+        ceiling = min(options["BACKOFF_MAX"], options["BACKOFF_FACTOR"] * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    def _options(self, provider=None):
+        configured = getattr(settings, "OUTBOUND_HTTP", {})
+        options = {**DEFAULTS, **configured}
+        options.pop("PROVIDERS", None)
+        options.update(configured.get("PROVIDERS", {}).get(provider, {}))
+        return options
+
+
+http_client = HttpClient()
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.forms",
+    "django.contrib.postgres",
     "storages",
     "markdownx",
     "rest_framework",
@@ -57,6 +58,10 @@ INSTALLED_APPS = [
     "authentication",
     "store",
     "posts",
+    "search",
+    "jobs",
+    "outbox",
+    "images",
 ]
 
 MIDDLEWARE = [
@@ -102,6 +107,8 @@ DATABASES = {
     "dev": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        # File backed so that tests can exercise concurrent connections
+        "TEST": {"NAME": os.path.join(BASE_DIR, "test_db.sqlite3")},
     },
     "prod": {
         "ENGINE": "django.db.backends.postgresql",
@@ -162,6 +169,30 @@ AUTH_USER_MODEL = "authentication.AppUser"
 TOKEN_SETTINGS = {
     "IDLE_TOKEN_LIFESPAN": timedelta(hours=1),
     "EXPIRING_TOKEN_LIFESPAN": timedelta(days=14),
+    # Tokens refreshed more recently than this are not written again
+    "REFRESH_THRESHOLD": timedelta(minutes=5),
+    # Buffer refreshes in memory and write them in bulk every REFRESH_FLUSH_INTERVAL
+    "WRITE_BEHIND_REFRESH": True,
+    "REFRESH_FLUSH_INTERVAL": timedelta(seconds=30),
+    # Resolved tokens are cached per worker for TOKEN_CACHE_TTL, which also bounds
+    # how long a deactivated user can keep using the API. Set TOKEN_CACHE_BACKEND
+    # to an alias in CACHES to share the cache between workers.
+    "TOKEN_CACHE_TTL": timedelta(seconds=60),
+    "TOKEN_CACHE_SIZE": 1024,
+    "TOKEN_CACHE_BACKEND": None,
+}
+
+# Opt-in keyset pagination of the fellows directory (/api/users/?page_size=...)
+USERS_PAGINATION = {
+    "PAGE_SIZE": 50,
+    "MAX_PAGE_SIZE": 200,
+}
+
+# Fuzzy lookup of store items by name
+STORE_SEARCH = {
+    "SIMILARITY_THRESHOLD": 0.3,
+    # Lifetime of the in-memory trigram index used when pg_trgm is not available
+    "INDEX_TTL": timedelta(minutes=5),
 }
 
 
@@ -169,10 +200,90 @@ TOKEN_SETTINGS = {
 GAUTH_ANDROID_CLIENT_ID = env.str("GAUTH_ANDROID_CLIENT_ID")
 GAUTH_IOS_CLIENT_ID = env.str("GAUTH_IOS_CLIENT_ID")
 
+# Google ID tokens are verified locally against cached signing certificates
+GOOGLE_OAUTH = {
+    "CERTS_URL": "https://www.googleapis.com/oauth2/v1/certs",
+    # Used when the certificate response has no Cache-Control max-age
+    "DEFAULT_MAX_AGE": timedelta(hours=1),
+    "REFRESH_BEFORE_EXPIRY": timedelta(minutes=5),
+    "MIN_FORCED_REFRESH_INTERVAL": timedelta(minutes=1),
+}
+
 APPLE_OAUTH_CLIENT_ID = env.str("APPLE_OAUTH_CLIENT_ID")
 APPLE_OAUTH_KEY_ID = env.str("APPLE_OAUTH_KEY_ID")
 APPLE_OAUTH_TEAM_ID = env.str("APPLE_OAUTH_TEAM_ID")
 APPLE_OATH_PRIVATE_KEY = env.str("APPLE_OATH_PRIVATE_KEY", multiline=True)
+APPLE_OAUTH = {
+    # Apple accepts client secrets valid for up to six months
+    "CLIENT_SECRET_LIFETIME": timedelta(days=12),
+    # A new secret is signed this long before the cached one expires
+    "REFRESH_BEFORE_EXPIRY": timedelta(days=1),
+    # How long an apple_id resolves to the same user without checking the database.
+    # ID_CACHE_BACKEND names an alias in CACHES; point it at a cache shared by all
+    # workers, otherwise a changed mapping only reaches the worker it happened in
+    # and the others keep the old one for up to ID_CACHE_TTL.
+    "ID_CACHE_TTL": timedelta(minutes=1),
+    "ID_CACHE_BACKEND": "default",
+}
+
+# Cache of public post responses. BACKEND names an alias in CACHES; point it at a
+# cache shared by all workers so that invalidations reach all of them.
+POSTS_CACHE = {
+    "BACKEND": "default",
+    # Set to zero to disable the cache
+    "TTL": timedelta(minutes=1),
+}
+
+# Resized variants of uploaded images, stored next to the original
+IMAGE_VARIANTS = {
+    "WIDTHS": [96, 320, 640],
+    "FORMATS": ["webp", "jpeg"],
+    # Width of the variant served as thumbnail, e.g. pictureThumb
+    "THUMBNAIL_WIDTH": 320,
+    "QUALITY": 80,
+    # Threads resizing and uploading the variants of one image
+    "WORKERS": 4,
+}
+
+JOBS = {
+    "MAX_ATTEMPTS": 5,
+    # Failed jobs wait RETRY_BACKOFF, doubled after each attempt
+    "RETRY_BACKOFF": timedelta(seconds=30),
+    # Running jobs older than this are assumed to belong to a dead worker
+    "LOCK_TIMEOUT": timedelta(minutes=10),
+    "POLL_INTERVAL": timedelta(seconds=2),
+    "BATCH_SIZE": 10,
+}
+
+OUTBOX = {
+    # Notifications queued within one window are mailed together as a digest
+    "DIGEST_WINDOW": timedelta(minutes=5),
+    # Largest number of notifications in one digest email
+    "BATCH_SIZE": 50,
+    "MAX_ATTEMPTS": 5,
+}
+
+OUTBOUND_HTTP = {
+    # Connection pools are kept per host, with keep-alive
+    "POOL_CONNECTIONS": 10,
+    "POOL_MAXSIZE": 10,
+    "CONNECT_TIMEOUT": 3.05,
+    "READ_TIMEOUT": 10,
+    # Retries use exponential backoff with full jitter, capped at BACKOFF_MAX seconds
+    "RETRIES": 2,
+    "BACKOFF_FACTOR": 0.2,
+    "BACKOFF_MAX": 2,
+    "RETRY_STATUSES": (502, 503, 504),
+    # Calls to a provider stop for BREAKER_RESET_TIMEOUT after this many failures in a row
+    "BREAKER_FAILURE_THRESHOLD": 5,
+    "BREAKER_RESET_TIMEOUT": timedelta(seconds=30),
+    # Per provider overrides of the settings above
+    "PROVIDERS": {
+        "apple": {"READ_TIMEOUT": 10},
+        "google": {"READ_TIMEOUT": 5},
+        "avatar": {"READ_TIMEOUT": 5, "RETRIES": 1},
+    },
+}
 
 
 AWS_ACCESS_KEY_ID = env.str("AWS_ACCESS_KEY_ID")
@@ -187,6 +298,8 @@ DEFAULT_FILE_STORAGE = "api.storage_backends.MediaStorage"
 MARKDOWNX_MEDIA_PATH = datetime.now().strftime("markdownx/%Y/%m/%d")
 MARKDOWNX_IMAGE_MAX_SIZE = {"size": (3840, 0), "quality": 90}
 MARKDOWNX_MARKDOWN_EXTENSIONS = ["markdown.extensions.extra"]
+# The editor preview shows the same sanitized HTML that is stored for posts
+MARKDOWNX_MARKDOWNIFY_FUNCTION = "posts.markdown.render_markdown"
 MARKDOWNX_UPLOAD_MAX_SIZE = 5 * 1024 * 1024
 
 LOGIN_URL = "/admin/login/"
@@ -1,6 +1,78 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
 from storages.backends.s3boto3 import S3Boto3Storage
 
 
-class MediaStorage(S3Boto3Storage):
+class CachedUrlMixin:
+    """
+    Storage mixin reusing the URLs it builds, so serializing many files doesn't sign
+    or format the same URL on every request.
+
+    Storages opt in by setting ``url_cache_timeout``. URLs are cached per expiry
+    bucket of that length and dropped together when the bucket ends, so a cached
+    URL is never served more than ``url_cache_timeout`` after it was made. With
+    query string auth this must be shorter than ``querystring_expire``, otherwise
+    cached URLs could be served after their signature expired.
+    """
+
+    url_cache_timeout = None
+    url_cache_size = 10000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._url_lock = threading.Lock()
+        self._url_bucket = None
+        self._urls = {}
+        self.url_hits = 0
+        self.url_misses = 0
+
+        timeout = self.url_cache_timeout
+        if (
+            timeout is not None
+            and getattr(self, "querystring_auth", False)
+            and not getattr(self, "custom_domain", None)
+            and timeout >= timedelta(seconds=self.querystring_expire)
+        ):
+            raise ImproperlyConfigured(
+                "url_cache_timeout must be shorter than querystring_expire"
+            )
+
+    @property
+    def url_metrics(self):
+        return {"hits": self.url_hits, "misses": self.url_misses}
+
+    def url(self, name, *args, **kwargs):
+        # URLs with custom parameters or expiry aren't shared
+        if self.url_cache_timeout is None or args or any(kwargs.values()):
+            return super().url(name, *args, **kwargs)
+
+        bucket = int(time.time() // self.url_cache_timeout.total_seconds())
+        key = (name, bucket)
+        url = self._urls.get(key)
+        if url is not None:
+            with self._url_lock:
+                self.url_hits += 1
+            return url
+
+        url = super().url(name)
+        with self._url_lock:
+            self.url_misses += 1
+            if bucket != self._url_bucket or len(self._urls) >= self.url_cache_size:
+                self._url_bucket = bucket
+                self._urls = {}
+            self._urls[key] = url
+        return url
+
+    def clear_url_cache(self):
+        with self._url_lock:
+            self._url_bucket = None
+            self._urls = {}
+
+
+class MediaStorage(CachedUrlMixin, S3Boto3Storage):
     location = "media"
     file_overwrite = False
+    url_cache_timeout = timedelta(minutes=10)
@@ -1,13 +1,22 @@
 from django.conf import settings
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
 from rest_framework.authtoken.models import Token
 
-from authentication.forms import AppUserChangeForm, AppUserCreationForm
+from authentication import services
+from authentication.forms import (
+    AppUserChangeForm,
+    AppUserCreationForm,
+    BulkRegistrationForm,
+)
 from authentication.models import (
     AppUser,
     ExpiringToken,
     PhoneNumber,
+    PointsAdjustment,
     Profile,
     SocialMediaAccount,
     SustainableDevelopmentGoal,
@@ -78,25 +87,102 @@ class ProfileAdmin(admin.ModelAdmin):
     change_list_template = "admin/profile_change_list.html"
     search_fields = ("user__email", "name", "campus")
 
+    def get_urls(self):
+        urls = [
+            path(
+                "bulk-register/",
+                self.admin_site.admin_view(self.bulk_register),
+                name="authentication_profile_bulk_register",
+            )
+        ]
+        return urls + super().get_urls()
+
+    def bulk_register(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        results = None
+        form = BulkRegistrationForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            rows = form.cleaned_data["file"]
+            results, profiles = services.register_users(request, rows)
+            for result in results:
+                # Rows are numbered as in the file, after the header
+                result["line"] = result["row"] + 2
+                result.setdefault("email", rows[result["row"]]["user"]["email"])
+                result["messages"] = list(_error_messages(result.get("errors", {})))
+            self.message_user(
+                request,
+                f"{len(profiles)} of {len(results)} users were registered successfully.",
+                level=messages.SUCCESS if profiles else messages.WARNING,
+            )
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Register users",
+            "form": form,
+            "results": results,
+        }
+        return TemplateResponse(request, "admin/profile_bulk_register.html", context)
+
     def add_points(self, request, queryset):
-        points = request.POST.get("points", 0)
-        for user in queryset:
-            user.points += int(points)
-            user.save()
+        points = self._get_points(request)
+        if points is None:
+            return
+        self.model.objects.adjust_points(
+            queryset.values_list("pk", flat=True),
+            points,
+            reason="Added from admin",
+            created_by=request.user,
+        )
         self.message_user(
             request,
             f"{points} Points were added successfully to all selected accounts.",
         )
 
     def reduce_points(self, request, queryset):
-        points = request.POST.get("points", 0)
-        for user in queryset:
-            user.points -= int(points)
-            user.save()
+        points = self._get_points(request)
+        if points is None:
+            return
+        self.model.objects.adjust_points(
+            queryset.values_list("pk", flat=True),
+            -points,
+            reason="Reduced from admin",
+            created_by=request.user,
+        )
         self.message_user(
             request, f"{points} Points were removed from all selected accounts."
         )
 
+    def _get_points(self, request):
+        try:
+            points = int(request.POST.get("points", 0))
+        except ValueError:
+            points = -1
+        if points < 0:
+            self.message_user(
+                request, "Points should be a positive number.", level=messages.ERROR
+            )
+            return None
+        return points
+
+
+def _error_messages(errors, prefix=""):
+    for field, field_errors in errors.items():
+        if isinstance(field_errors, dict):
+            yield from _error_messages(field_errors, f"{prefix}{field}.")
+        else:
+            for error in field_errors:
+                yield f"{prefix}{field}: {error}"
+
+
+class PointsAdjustmentAdmin(admin.ModelAdmin):
+    model = PointsAdjustment
+    list_display = ("profile", "points", "reason", "created", "created_by")
+    search_fields = ("profile__user__email", "profile__name", "reason")
+    readonly_fields = ("profile", "points", "reason", "created", "created_by")
+
 
 admin.site.site_header = settings.SITE_HEADER
 admin.site.site_title = settings.SITE_TITLE
@@ -104,6 +190,7 @@ admin.site.unregister(Token)
 admin.site.register(ExpiringToken, TokenAdmin)
 admin.site.register(AppUser, AppUserAdmin)
 admin.site.register(Profile, ProfileAdmin)
+admin.site.register(PointsAdjustment, PointsAdjustmentAdmin)
 admin.site.register(SustainableDevelopmentGoal)
 
 admin.site.enable_nav_sidebar = False
@@ -0,0 +1,99 @@
+import threading
+from datetime import timedelta
+
+import jwt
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+from django.conf import settings
+from django.utils import timezone
+
+APPLE_AUDIENCE = "https://appleid.apple.com"
+
+
+class ClientSecretManager:
+    """
+    Hands out the ES256 client secret Apple requires on every token request.
+
+    The private key is parsed once and the signed secret is reused until
+    ``REFRESH_BEFORE_EXPIRY`` before it expires, so logins don't pay for ECDSA
+    signing. ``minted`` and ``reused`` count how often a secret was signed or
+    served from the cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._private_key = None
+        self._secret = None
+        self._expires_at = None
+        self.minted = 0
+        self.reused = 0
+
+    @property
+    def _settings(self):
+        return settings.APPLE_OAUTH
+
+    def get_client_secret(self):
+        credentials = self._get_credentials()
+        refresh_window = self._settings.get("REFRESH_BEFORE_EXPIRY", timedelta(days=1))
+        with self._lock:
+            if credentials != self._credentials:
+                # Settings changed, e.g. a rotated key, so drop what was cached
+                self._credentials = credentials
+                self._private_key = None
+                self._secret = None
+
+            if (
+                self._secret is not None
+                and timezone.now() < self._expires_at - refresh_window
+            ):
+                self.reused += 1
+                return self._secret
+
+            self._secret, self._expires_at = self._mint(credentials)
+            self.minted += 1
+            return self._secret
+
+    def clear(self):
+        with self._lock:
+            self._credentials = None
+            self._private_key = None
+            self._secret = None
+
+    @property
+    def metrics(self):
+        return {"minted": self.minted, "reused": self.reused}
+
+    def _get_credentials(self):
+        return (
+            settings.APPLE_OAUTH_CLIENT_ID,
+            settings.APPLE_OAUTH_TEAM_ID,
+            settings.APPLE_OAUTH_KEY_ID,
+            settings.APPLE_OATH_PRIVATE_KEY,
+        )
+
+    def _mint(self, credentials):
+        client_id, team_id, key_id, private_key = credentials
+        if self._private_key is None:
+            self._private_key = load_pem_private_key(
+                private_key.encode("utf-8"), password=None, backend=default_backend()
+            )
+
+        issued_at = timezone.now()
+        expires_at = issued_at + self._settings.get(
+            "CLIENT_SECRET_LIFETIME", timedelta(days=12)
+        )
+        payload = {
+            "iss": team_id,
+            "iat": issued_at,
+            "exp": expires_at,
+            "aud": APPLE_AUDIENCE,
+            "sub": client_id,
+        }
+        secret = jwt.encode(
+            payload, self._private_key, algorithm="ES256", headers={"kid": key_id}
+        ).decode("utf-8")
+        return secret, expires_at
+
+
+client_secrets = ClientSecretManager()
@@ -1,7 +1,5 @@
 import mimetypes
 from abc import ABC
-from django.utils import timezone
-from datetime import timedelta
 
 import jwt
 import requests as rq
@@ -9,12 +7,15 @@ from django.conf import settings
 from django.core.files import File
 from django.core.files.temp import NamedTemporaryFile
 from django.utils.translation import gettext_lazy as localize
-from google.auth.transport import requests
-from google.oauth2 import id_token
 from rest_framework import exceptions
 from rest_framework.authentication import TokenAuthentication
 
+from api.http_client import http_client
+from authentication.apple_secret import APPLE_AUDIENCE, client_secrets
+from authentication.google_certs import google_certificates
 from authentication.models import ExpiringToken
+from authentication.refresh import refresh_buffer
+from authentication.token_cache import token_cache
 
 
 class ExpiringTokenAuthentication(TokenAuthentication):
@@ -30,23 +31,29 @@ class ExpiringTokenAuthentication(TokenAuthentication):
 
     def authenticate_credentials(self, key):
         model = self.get_model()
-        try:
-            token = model.objects.select_related("user").get(key=key)
-        except model.DoesNotExist:
-            raise exceptions.AuthenticationFailed(localize("Invalid token."))
+        token = token_cache.get(key)
+        if token is None:
+            try:
+                token = model.objects.select_related("user").get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(localize("Invalid token."))
+            token_cache.set(token)
 
         if not token.user.is_active:
             raise exceptions.PermissionDenied(
                 localize("Your account has not been approved yet.")
             )
 
+        refresh_buffer.apply(token)
         if token.expired:
+            refresh_buffer.discard(token.pk)
             token.delete()
             raise exceptions.AuthenticationFailed(
                 localize("Token has expired. Please login again.")
             )
 
         token.refresh()
+        token_cache.update_refreshed(token)
         return (token.user, token)
 
 
@@ -69,22 +76,29 @@ class OauthSignIn(ABC):
     def get_profile_picture(self):
         if self.picture_url is None:
             return None, None
-        response = rq.get(self.picture_url)
-        data = None
-        if response.status_code == 200:
-            data = response.content
-            content_type = response.headers["content-type"]
-            extension = mimetypes.guess_extension(content_type)
-            extension = str(extension) if extension is not None else ""
-        img_temp = NamedTemporaryFile()
-        img_temp.write(data)
-        img_temp.flush()
-        return extension, File(img_temp)
+        try:
+            return download_picture(self.picture_url)
+        except rq.RequestException:
+            # A missing picture shouldn't fail the login
+            return None, None
+
+
+def download_picture(url):
+    """Download a picture into a temporary file and return its extension and file."""
+    response = http_client.get(url, provider="avatar")
+    response.raise_for_status()
+    content_type = response.headers.get("content-type", "")
+    extension = mimetypes.guess_extension(content_type)
+    extension = str(extension) if extension is not None else ""
+    img_temp = NamedTemporaryFile()
+    img_temp.write(response.content)
+    img_temp.flush()
+    return extension, File(img_temp)
 
 
 class GoogleOauth(OauthSignIn):
     def login(self):
-        idinfo = id_token.verify_oauth2_token(self.token, requests.Request())
+        idinfo = google_certificates.verify(self.token)
 
         if (
             not isinstance(idinfo, dict)
@@ -94,9 +108,6 @@ class GoogleOauth(OauthSignIn):
         ):
             raise exceptions.AuthenticationFailed("Invalid token")
 
-        if idinfo["iss"] not in ["accounts.google.com", "https://accounts.google.com"]:
-            raise ValueError("Wrong issuer.")
-
         if "picture" in idinfo:
             self.save_profile_picture_url(idinfo["picture"])
 
@@ -106,7 +117,7 @@ class GoogleOauth(OauthSignIn):
 
 class AppleOauth(OauthSignIn):
 
-    AUDIENCE = "https://appleid.apple.com"
+    AUDIENCE = APPLE_AUDIENCE
     ACCESS_TOKEN_URL = "https://appleid.apple.com/auth/token"
 
     def login(self):
@@ -121,7 +132,9 @@ class AppleOauth(OauthSignIn):
             "grant_type": "authorization_code",
         }
 
-        res = rq.post(AppleOauth.ACCESS_TOKEN_URL, data=data, headers=headers)
+        res = http_client.post(
+            AppleOauth.ACCESS_TOKEN_URL, provider="apple", data=data, headers=headers
+        )
         idinfo = res.json()
 
         if res.status_code == 400:
@@ -142,21 +155,7 @@ class AppleOauth(OauthSignIn):
         return success
 
     def get_key_and_secret(self):
-        headers = {"kid": settings.APPLE_OAUTH_KEY_ID}
-
-        payload = {
-            "iss": settings.APPLE_OAUTH_TEAM_ID,
-            "iat": timezone.now(),
-            "exp": timezone.now() + timedelta(days=12),
-            "aud": AppleOauth.AUDIENCE,
-            "sub": settings.APPLE_OAUTH_CLIENT_ID,
-        }
-
-        client_secret = jwt.encode(
-            payload, settings.APPLE_OATH_PRIVATE_KEY, algorithm="ES256", headers=headers
-        ).decode("utf-8")
-
-        return settings.APPLE_OAUTH_CLIENT_ID, client_secret
+        return settings.APPLE_OAUTH_CLIENT_ID, client_secrets.get_client_secret()
 
 
 class WeChatOauth(OauthSignIn):
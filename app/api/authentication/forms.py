@@ -1,3 +1,7 @@
+import csv
+import io
+
+from django import forms
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm
 
 from authentication.models import AppUser
@@ -13,3 +17,40 @@ class AppUserChangeForm(UserChangeForm):
     class Meta(UserChangeForm):
         model = AppUser
         fields = ["email", "password"]
+
+
+class BulkRegistrationForm(forms.Form):
+    """Upload of a CSV file with the columns Email, Name, Campus, Batch and Junior fellow."""
+
+    COLUMNS = {"Email", "Name", "Campus", "Batch"}
+    TRUE_VALUES = {"yes", "true", "1", "y"}
+
+    file = forms.FileField(label="CSV file")
+
+    def clean_file(self):
+        try:
+            text = self.cleaned_data["file"].read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise forms.ValidationError("The file must be UTF-8 encoded.")
+        reader = csv.DictReader(io.StringIO(text))
+        missing = self.COLUMNS - set(reader.fieldnames or [])
+        if missing:
+            raise forms.ValidationError(
+                f"The file is missing the columns {', '.join(sorted(missing))}."
+            )
+        return [
+            {
+                "user": {"email": self._value(row, "Email")},
+                "name": self._value(row, "Name"),
+                "campus": self._value(row, "Campus"),
+                "batch": self._value(row, "Batch"),
+                "isJuniorFellow": self._value(row, "Junior fellow").lower()
+                in self.TRUE_VALUES,
+            }
+            for row in reader
+        ]
+
+    @staticmethod
+    def _value(row, column):
+        # Short rows leave their missing columns as None
+        return (row.get(column) or "").strip()
@@ -0,0 +1,149 @@
+import json
+import logging
+import re
+import threading
+import time
+from datetime import timedelta
+
+import requests as rq
+from django.conf import settings
+from google.auth import jwt
+
+from api.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class HttpKeySource:
+    """
+    Fetches Google's signing certificates (``{key id: x509 certificate}``) over HTTP.
+    Returns the certificates along with how long they may be cached for, taken from
+    the ``Cache-Control`` header of the response.
+    """
+
+    def __init__(self, url):
+        self.url = url
+
+    def __call__(self):
+        response = http_client.get(self.url, provider="google")
+        if response.status_code != 200:
+            raise ValueError(f"Could not fetch certificates at {self.url}")
+        return json.loads(response.content.decode("utf-8")), _max_age(response)
+
+
+def _max_age(response):
+    match = _MAX_AGE_PATTERN.search(response.headers.get("cache-control", ""))
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+class CertificateCache:
+    """
+    Process-wide cache of Google's ID token signing certificates.
+
+    Certificates are kept for as long as the key source allows. Within
+    ``REFRESH_BEFORE_EXPIRY`` of expiry they are refreshed on a background thread
+    while the cached ones keep being served, so logins never wait on Google unless
+    the cache is empty, expired or a token is signed with an unknown key.
+    """
+
+    def __init__(self, key_source=None):
+        self._key_source = key_source
+        self._lock = threading.Lock()
+        self._certs = None
+        self._expires_at = 0
+        self._refreshing = False
+        self._last_forced = None
+        self.fetch_count = 0
+
+    @property
+    def key_source(self):
+        if self._key_source is None:
+            self._key_source = HttpKeySource(self._settings["CERTS_URL"])
+        return self._key_source
+
+    def set_key_source(self, key_source):
+        with self._lock:
+            self._key_source = key_source
+            self._certs = None
+            self._expires_at = 0
+
+    @property
+    def _settings(self):
+        return settings.GOOGLE_OAUTH
+
+    def get_certs(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            certs, expires_at = self._certs, self._expires_at
+        if force or certs is None or now >= expires_at:
+            return self.refresh()
+
+        refresh_window = self._settings.get(
+            "REFRESH_BEFORE_EXPIRY", timedelta(minutes=5)
+        ).total_seconds()
+        if now >= expires_at - refresh_window:
+            self._refresh_in_background()
+        return certs
+
+    def refresh(self):
+        certs, max_age = self.key_source()
+        if max_age is None:
+            max_age = self._settings.get(
+                "DEFAULT_MAX_AGE", timedelta(hours=1)
+            ).total_seconds()
+        with self._lock:
+            self._certs = certs
+            self._expires_at = time.monotonic() + max_age
+            self.fetch_count += 1
+        return certs
+
+    def verify(self, token, audience=None):
+        """Verify the signature and claims of a Google ID token and return its claims."""
+        certs = self.get_certs()
+        key_id = jwt.decode_header(token).get("kid")
+        if key_id is not None and key_id not in certs and self._may_force_refresh():
+            # Google may have rotated its keys before our cached copy expired
+            certs = self.get_certs(force=True)
+
+        idinfo = jwt.decode(token, certs=certs, audience=audience)
+        if idinfo.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError("Wrong issuer.")
+        return idinfo
+
+    def _may_force_refresh(self):
+        # Unknown key ids come from forged tokens too, so don't refetch for each one
+        interval = self._settings.get(
+            "MIN_FORCED_REFRESH_INTERVAL", timedelta(minutes=1)
+        ).total_seconds()
+        now = time.monotonic()
+        with self._lock:
+            if self._last_forced is not None and now - self._last_forced < interval:
+                return False
+            self._last_forced = now
+            return True
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                self.refresh()
+            except (ValueError, rq.RequestException):
+                logger.exception("Could not refresh Google certificates")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+
+google_certificates = CertificateCache()
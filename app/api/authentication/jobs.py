@@ -0,0 +1,14 @@
+from jobs.services import register
+
+from authentication import services
+from authentication.authentication import download_picture
+from authentication.models import Profile
+
+
+@register("authentication.ingest_avatar")
+def ingest_avatar(user_id, url):
+    profile = Profile.objects.select_related("user").filter(user_id=user_id).first()
+    if profile is None or profile.picture:
+        return
+    extension, picture_file = download_picture(url)
+    services.save_profile_picture(picture_file, extension, user=profile.user)
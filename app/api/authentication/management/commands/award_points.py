@@ -0,0 +1,110 @@
+import csv
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from authentication.models import AppUser, Profile
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    A django management command to award (or remove) points in bulk from a CSV file
+    Rows are processed in chunks, each applied as a few set-based updates
+
+    Inheritance:
+        BaseCommand:
+
+    """
+
+    help = "Award points in bulk. Give a CSV file with columns email,points and an optional reason column. Negative points remove points, never going below zero"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "file",
+            metavar="csv_file",
+            type=str,
+            help="Path to CSV file with email and points columns",
+        )
+        parser.add_argument(
+            "--reason",
+            type=str,
+            default="Bulk award",
+            help="Reason recorded for rows without a reason column",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows to process at a time",
+        )
+
+    def handle(self, *args, **options):
+        csv_file = Path(options.get("file"))
+        if not csv_file.exists():
+            self.stderr.write(f"ERROR: File {csv_file} not found")
+            return
+
+        self.default_reason = options.get("reason")
+        batch_size = options.get("batch_size")
+        start = time.monotonic()
+        rows = updated = 0
+        with csv_file.open(newline="") as file:
+            reader = csv.DictReader(file)
+            if not {"email", "points"}.issubset(reader.fieldnames or []):
+                self.stderr.write(
+                    f"ERROR: File {csv_file} should have email and points columns."
+                )
+                return
+
+            chunk = []
+            for line_number, row in enumerate(reader, start=2):
+                rows += 1
+                chunk.append((line_number, row))
+                if len(chunk) >= batch_size:
+                    updated += self.award_chunk(chunk, batch_size)
+                    chunk = []
+            if chunk:
+                updated += self.award_chunk(chunk, batch_size)
+
+        elapsed = max(time.monotonic() - start, 1e-6)
+        self.stdout.write(
+            f"SUCCESS: Points of {updated} profiles have been updated from {rows} rows "
+            f"in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)"
+        )
+
+    def award_chunk(self, chunk, batch_size):
+        emails = {row["email"].strip() for _, row in chunk}
+        user_ids = dict(
+            AppUser.objects.filter(email__in=emails).values_list("email", "pk")
+        )
+
+        # Duplicate rows of a user are summed, one UPDATE can only apply one award
+        totals = defaultdict(int)
+        for line_number, row in chunk:
+            email = row["email"].strip()
+            try:
+                points = int(row["points"])
+            except (TypeError, ValueError):
+                self.stderr.write(
+                    f"ERROR: Line {line_number} has invalid points {row['points']}. Continuing..."
+                )
+                continue
+            if email not in user_ids:
+                self.stderr.write(
+                    f"ERROR: Email {email} does not exist in database. Continuing..."
+                )
+                continue
+            reason = (row.get("reason") or "").strip() or self.default_reason
+            totals[(user_ids[email], reason)] += points
+
+        awards = defaultdict(list)
+        for (user_id, reason), points in totals.items():
+            awards[(points, reason)].append(user_id)
+
+        updated = 0
+        for (points, reason), ids in awards.items():
+            updated += Profile.objects.adjust_points(
+                ids, points, reason=reason, batch_size=batch_size
+            )
+        return updated
@@ -0,0 +1,265 @@
+import csv
+import time
+from itertools import islice
+from pathlib import Path
+
+from authentication.models import (
+    AppUser,
+    Profile,
+    SocialMediaAccount,
+    SustainableDevelopmentGoal,
+)
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.core.validators import validate_email
+from django.db import transaction
+from search import services as search
+
+# Columns of social media accounts and the account type they are stored as
+SOCIAL_MEDIA_COLUMNS = {
+    "Facebook": "Facebook",
+    "LinkedIn": "LinkedIn",
+    "Twitter": "Twitter",
+    "Wechat": "Wechat",
+    "Website": "Other",
+}
+PROFILE_COLUMNS = {
+    "name": "Full name",
+    "campus": "Campus",
+    "city": "City",
+    "country": "Country",
+    "bio": "Bio",
+    "work": "Work",
+}
+REQUIRED_COLUMNS = {"Email", "Full name", "Batch"}
+
+
+class Command(BaseCommand):
+    """
+    A django management command to import fellows from a CSV export of the website
+    The file is streamed and loaded in batches with bulk queries, each batch in its
+    own transaction. Rows are matched to existing users by email, so importing a
+    file again updates the profiles instead of duplicating them
+
+    Inheritance:
+        BaseCommand:
+
+    """
+
+    help = "Import users and profiles from a CSV file with the columns Full name, Email, Batch, Campus, City, Country, SDGs, Bio, Work, Facebook, LinkedIn, Twitter, Wechat and Website. Existing users are matched by email and their profiles updated"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", metavar="csv_file", type=str, help="CSV file")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows loaded per transaction",
+        )
+
+    def handle(self, *args, **options):
+        csv_file = Path(options.get("file"))
+        if not csv_file.exists():
+            self.stderr.write(f"ERROR: File {csv_file} not found")
+            return
+
+        batch_size = max(options.get("batch_size"), 1)
+        self.sdgs = set(
+            SustainableDevelopmentGoal.objects.values_list("code", flat=True)
+        )
+        self.seen = {}
+        self.created = self.updated = self.unchanged = self.invalid = 0
+        # Imported users sign in with Google or Apple, so they get no password
+        self.password = make_password(None)
+        start = time.monotonic()
+
+        with csv_file.open(encoding="utf-8-sig", newline="") as file:
+            reader = csv.DictReader(file)
+            missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+            if missing:
+                self.stderr.write(
+                    f"ERROR: File {csv_file} is missing the columns {', '.join(sorted(missing))}"
+                )
+                return
+
+            rows = 0
+            while True:
+                batch = list(islice(reader, batch_size))
+                if not batch:
+                    break
+                entries = []
+                for row in batch:
+                    rows += 1
+                    entry = self.parse_row(row, rows)
+                    if entry is not None:
+                        entries.append(entry)
+                self.load(entries)
+
+                elapsed = time.monotonic() - start
+                self.stdout.write(
+                    f"Progress: {rows} rows, {rows / max(elapsed, 1e-6):.0f} rows/s"
+                )
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(
+            f"SUCCESS: {self.created} profiles created, {self.updated} updated, "
+            f"{self.unchanged} unchanged, {self.invalid} invalid rows in {elapsed:.1f}s "
+            f"({rows / max(elapsed, 1e-6):.0f} rows/s)"
+        )
+
+    def parse_row(self, row, line):
+        try:
+            entry = self.validate(row)
+        except ValidationError as error:
+            self.stderr.write(
+                f"ERROR: Row {line}: {' '.join(error.messages)} Continuing..."
+            )
+            self.invalid += 1
+            return None
+
+        if entry["email"] in self.seen:
+            self.stderr.write(
+                f"ERROR: Row {line}: Email {entry['email']} is a duplicate of row {self.seen[entry['email']]}. Continuing..."
+            )
+            self.invalid += 1
+            return None
+        self.seen[entry["email"]] = line
+        return entry
+
+    def validate(self, row):
+        row = {column: (value or "").strip() for column, value in row.items()}
+        email = AppUser.objects.normalize_email(row["Email"])
+        validate_email(email)
+
+        fields = {}
+        for field_name, column in PROFILE_COLUMNS.items():
+            value = row.get(column, "")
+            max_length = Profile._meta.get_field(field_name).max_length
+            if len(value) > max_length:
+                raise ValidationError(
+                    f"{column} is longer than {max_length} characters."
+                )
+            fields[field_name] = value
+        if not fields["name"]:
+            raise ValidationError("Full name is required.")
+
+        try:
+            fields["batch"] = int(row["Batch"])
+        except ValueError:
+            raise ValidationError(f"Batch {row['Batch']} is not a number.")
+        if fields["batch"] < 0:
+            raise ValidationError(f"Batch {row['Batch']} is not a valid year.")
+
+        sdgs = set()
+        for code in filter(
+            None, (code.strip() for code in row.get("SDGs", "").split(","))
+        ):
+            if not code.isdigit() or int(code) not in self.sdgs:
+                raise ValidationError(f"SDG {code} does not exist.")
+            sdgs.add(int(code))
+
+        accounts = []
+        max_length = SocialMediaAccount._meta.get_field("account").max_length
+        for column, account_type in SOCIAL_MEDIA_COLUMNS.items():
+            account = row.get(column, "")
+            if len(account) > max_length:
+                raise ValidationError(
+                    f"{column} is longer than {max_length} characters."
+                )
+            if account:
+                accounts.append((account, account_type))
+
+        return {"email": email, "fields": fields, "sdgs": sdgs, "accounts": accounts}
+
+    @transaction.atomic
+    def load(self, entries):
+        if not entries:
+            return
+        emails = [entry["email"] for entry in entries]
+        users = dict(
+            AppUser.objects.filter(email__in=emails).values_list("email", "pk")
+        )
+        AppUser.objects.bulk_create(
+            AppUser(email=email, password=self.password, is_active=True)
+            for email in emails
+            if email not in users
+        )
+        users = dict(
+            AppUser.objects.filter(email__in=emails).values_list("email", "pk")
+        )
+
+        profiles = Profile.objects.select_related("user").in_bulk(users.values())
+        new_profiles, changed_profiles, changed_fields = [], [], set()
+        for entry in entries:
+            user_id = users[entry["email"]]
+            profile = profiles.get(user_id)
+            if profile is None:
+                profile = Profile(
+                    user=AppUser(pk=user_id, email=entry["email"]),
+                    is_junior_fellow=False,
+                    points=0,
+                    **entry["fields"],
+                )
+                new_profiles.append(profile)
+                continue
+
+            # Only changed profiles and fields are updated, bulk_update is slow to build
+            changed = {
+                field_name
+                for field_name, value in entry["fields"].items()
+                if getattr(profile, field_name) != value
+            }
+            if changed:
+                for field_name in changed:
+                    setattr(profile, field_name, entry["fields"][field_name])
+                changed_profiles.append(profile)
+                changed_fields |= changed
+
+        Profile.objects.bulk_create(new_profiles)
+        if changed_profiles:
+            Profile.objects.bulk_update(changed_profiles, sorted(changed_fields))
+        self.created += len(new_profiles)
+        self.updated += len(changed_profiles)
+        self.unchanged += len(entries) - len(new_profiles) - len(changed_profiles)
+
+        # The file's SDGs replace those of the profile, accounts are only added
+        ProfileSdg = Profile.sdgs.through
+        links = {
+            (profile_id, code): link_id
+            for link_id, profile_id, code in ProfileSdg.objects.filter(
+                profile_id__in=users.values()
+            ).values_list("id", "profile_id", "sustainabledevelopmentgoal_id")
+        }
+        wanted = {
+            (users[entry["email"]], code) for entry in entries for code in entry["sdgs"]
+        }
+        ProfileSdg.objects.filter(
+            id__in=[links[link] for link in links.keys() - wanted]
+        ).delete()
+        ProfileSdg.objects.bulk_create(
+            ProfileSdg(profile_id=profile_id, sustainabledevelopmentgoal_id=code)
+            for profile_id, code in sorted(wanted - links.keys())
+        )
+
+        accounts = set(
+            SocialMediaAccount.objects.filter(
+                user_profile_id__in=users.values()
+            ).values_list("user_profile_id", "account", "type")
+        )
+        SocialMediaAccount.objects.bulk_create(
+            SocialMediaAccount(
+                user_profile_id=profile_id, account=account, type=account_type
+            )
+            for profile_id, account, account_type in sorted(
+                {
+                    (users[entry["email"]], account, account_type)
+                    for entry in entries
+                    for account, account_type in entry["accounts"]
+                }
+                - accounts
+            )
+        )
+
+        # Bulk queries don't send the signals that keep the search index up to date
+        search.index_objects(new_profiles + changed_profiles)
@@ -1,23 +1,29 @@
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 from authentication import services
-from authentication.models import AppUser, Profile
+from authentication.models import Profile
 from django.core.files import File
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from images import services as images
 
 
 class Command(BaseCommand):
     """
     A django management command to upload or change the profile pictures of users
     It can upload image files or use the URLs to change in database
+    Files are uploaded by a pool of threads and profiles are updated in chunks.
+    Finished entries are appended to a checkpoint file so a rerun skips them
 
     Inheritance:
         BaseCommand:
 
     """
 
-    help = "Save profile pictures. Give a mapping file of email to image path or relative URL. To use URLs, use flag --url"
+    help = "Save profile pictures. Give a mapping file of email to image path or relative URL. To use URLs, use flag --url. Entries saved by an earlier run are skipped, delete the checkpoint file to start over"
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -29,6 +35,23 @@ class Command(BaseCommand):
         parser.add_argument(
             "--url", action="store_true", help="Use urls directly to save into database"
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of files uploaded at a time",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of profiles updated per query",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            help="File listing the emails already saved. Defaults to the mapping file with a .checkpoint suffix",
+        )
 
     def handle(self, *args, **options):
         mapping_file = Path(options.get("file"))
@@ -45,57 +68,131 @@ class Command(BaseCommand):
                 )
                 return
 
-        if options.get("url"):
-            self.handle_url_save(mapping)
-        else:
-            self.handle_file_save(mapping)
-
-    def get_profile(self, email):
-        profile = None
-        try:
-            profile = services.get_profile(email=email)
-        except (AppUser.DoesNotExist, Profile.DoesNotExist):
-            self.stderr.write(
-                f"ERROR: Email {email} does not exist in database. Continuing..."
+        checkpoint_file = Path(
+            options.get("checkpoint") or f"{mapping_file}.checkpoint"
+        )
+        done = set()
+        if checkpoint_file.exists():
+            done = set(checkpoint_file.read_text().split())
+        pending = {
+            email: value for email, value in mapping.items() if email not in done
+        }
+        if len(pending) < len(mapping):
+            self.stdout.write(
+                f"Skipping {len(mapping) - len(pending)} entries saved by an earlier run"
             )
-        return profile
 
-    def handle_file_save(self, mapping):
-        count = 0
-        for email, path in mapping.items():
-            image_file = Path(path)
-            if not image_file.exists():
-                self.stderr.write(
-                    f"ERROR: File {image_file} does not exist. Continuing..."
-                )
-                continue
-            try:
-                with image_file.open(mode="rb") as file:
-                    services.save_profile_picture(
-                        File(file), image_file.suffix, email=email
+        self.chunk_size = max(options.get("chunk_size"), 1)
+        self.total = len(pending)
+        self.stored = self.skipped = self.failed = 0
+        self.start = time.monotonic()
+
+        profiles = services.get_profiles_by_email(pending)
+        with checkpoint_file.open("a") as self.checkpoint:
+            for email in pending:
+                if email not in profiles:
+                    self.fail(
+                        f"ERROR: Email {email} does not exist in database. Continuing..."
                     )
-                count += 1
-            except (AppUser.DoesNotExist, Profile.DoesNotExist):
-                self.stderr.write(
-                    f"ERROR: Email {email} does not exist in database. Continuing..."
-                )
 
-        self.stdout.write(f"SUCCESS: {count} Profile pictures have been stored")
+            if options.get("url"):
+                self.handle_url_save(pending, profiles)
+            else:
+                self.handle_file_save(pending, profiles, options.get("workers"))
+
+        elapsed = time.monotonic() - self.start
+        self.stdout.write(
+            f"SUCCESS: {self.stored} Profile pictures have been stored "
+            f"in {elapsed:.1f}s ({self.stored / max(elapsed, 1e-6):.1f}/s), "
+            f"{self.skipped} skipped, {self.failed} failed"
+        )
+
+    def fail(self, message):
+        self.stderr.write(message)
+        self.failed += 1
+
+    def mark_done(self, profiles):
+        self.checkpoint.writelines(f"{profile.user.email}\n" for profile in profiles)
+        self.checkpoint.flush()
+
+    def report_progress(self):
+        processed = self.stored + self.skipped + self.failed
+        elapsed = time.monotonic() - self.start
+        self.stdout.write(
+            f"Progress: {processed}/{self.total} entries, "
+            f"{self.stored / max(elapsed, 1e-6):.1f} pictures/s"
+        )
 
-    def handle_url_save(self, mapping):
-        count = 0
+    def save_pictures(self, profiles):
+        if not profiles:
+            return
+        with transaction.atomic():
+            Profile.objects.bulk_update(profiles, ["picture"])
+            # bulk_update doesn't send post_save, which queues the variants
+            for profile in profiles:
+                if images.needs_variants(profile, "picture"):
+                    images.queue_variants(profile, "picture")
+        self.mark_done(profiles)
+        self.stored += len(profiles)
+        self.report_progress()
+
+    def upload(self, profile, image_file):
+        field = profile.picture.field
+        filename = services.profile_picture_filename(
+            profile.user.email, image_file.suffix
+        )
+        name = field.generate_filename(profile, filename)
+        with image_file.open(mode="rb") as file:
+            return field.storage.save(name, File(file), max_length=field.max_length)
+
+    def handle_file_save(self, mapping, profiles, workers):
+        uploads = {}
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            for email, path in mapping.items():
+                profile = profiles.get(email)
+                if profile is None:
+                    continue
+                if profile.picture:
+                    self.skipped += 1
+                    self.mark_done([profile])
+                    continue
+                image_file = Path(path)
+                if not image_file.exists():
+                    self.fail(f"ERROR: File {image_file} does not exist. Continuing...")
+                    continue
+                uploads[pool.submit(self.upload, profile, image_file)] = profile
+
+            uploaded = []
+            for future in as_completed(uploads):
+                profile = uploads[future]
+                try:
+                    profile.picture = future.result()
+                except Exception as error:
+                    self.fail(
+                        f"ERROR: Picture of {profile.user.email} could not be uploaded: {error}. Continuing..."
+                    )
+                    continue
+                uploaded.append(profile)
+                if len(uploaded) >= self.chunk_size:
+                    self.save_pictures(uploaded)
+                    uploaded = []
+            self.save_pictures(uploaded)
+
+    def handle_url_save(self, mapping, profiles):
+        changed = []
         for email, url in mapping.items():
-            profile = self.get_profile(email)
+            profile = profiles.get(email)
             if profile is None:
                 continue
 
             if not url.startswith(profile.picture.field.upload_to):
-                self.stderr.write(
+                self.fail(
                     f"ERROR: URL {url} is not relative to storage folder of Profile pictures. Continuing..."
                 )
                 continue
             profile.picture = url
-            profile.save()
-            count += 1
-
-        self.stdout.write(f"SUCCESS: {count} Profile pictures have been stored")
+            changed.append(profile)
+            if len(changed) >= self.chunk_size:
+                self.save_pictures(changed)
+                changed = []
+        self.save_pictures(changed)
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.12 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0023_auto_20210905_2115"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(fields=["batch", "user"], name="profile_batch_user_idx"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.12 on 2026-10-18 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0025_pointsadjustment"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="appleuser",
+            name="apple_id",
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
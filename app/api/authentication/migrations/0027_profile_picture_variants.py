@@ -0,0 +1,18 @@
+# Generated by Django 3.1.12 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0026_apple_user_apple_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="picture_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
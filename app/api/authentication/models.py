@@ -3,11 +3,15 @@ from datetime import timedelta
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import UserManager
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from rest_framework.authtoken.models import Token
 
+from authentication.refresh import refresh_buffer
+
 
 class AppUserManager(UserManager):
     def _create_user(self, email, password, **extra_fields):
@@ -70,8 +74,16 @@ class ExpiringToken(Token):
     objects = ExpiringTokenManager()
 
     def refresh(self):
-        self.refreshed = timezone.now()
-        self.save(update_fields=["refreshed"])
+        now = timezone.now()
+        threshold = settings.TOKEN_SETTINGS.get("REFRESH_THRESHOLD", timedelta(0))
+        if now - self.refreshed < threshold:
+            return
+
+        self.refreshed = now
+        if settings.TOKEN_SETTINGS.get("WRITE_BEHIND_REFRESH", False):
+            refresh_buffer.touch(self.pk, now)
+        else:
+            self.save(update_fields=["refreshed"])
 
     @property
     def timedout(self):
@@ -136,6 +148,85 @@ class ProfileManager(models.Manager):
 
         return profile
 
+    def create_many(self, registrations):
+        """
+        Create the users and profiles of ``registrations``, dicts of the arguments of
+        ``create``, with one insert per table. Like ``create`` every user gets a
+        token, created one at a time since ``ExpiringToken`` inherits from ``Token``
+        and can't be bulk created.
+        """
+        is_active = settings.AUTOAPPROVE_WITHOUT_ADMIN_APPROVAL
+        with transaction.atomic():
+            AppUser.objects.bulk_create(
+                [
+                    AppUser(email=registration["email"], is_active=is_active)
+                    for registration in registrations
+                ]
+            )
+            # bulk_create only sets primary keys on PostgreSQL
+            users = AppUser.objects.in_bulk(
+                [registration["email"] for registration in registrations],
+                field_name="email",
+            )
+            profiles = [
+                Profile(
+                    user=users[registration["email"]],
+                    name=registration["name"],
+                    is_junior_fellow=registration["is_junior_fellow"],
+                    campus=registration["campus"],
+                    batch=registration["batch"],
+                    points=registration.get("points", 0),
+                )
+                for registration in registrations
+            ]
+            self.bulk_create(profiles)
+            for user in users.values():
+                ExpiringToken.objects.create(user=user)
+        return profiles
+
+    def adjust_points(
+        self, user_ids, points, reason="", created_by=None, batch_size=1000
+    ):
+        """
+        Add ``points`` (or remove, if negative) to the given profiles with one set-based
+        UPDATE per batch, flooring balances at zero, and record each change in the
+        PointsAdjustment ledger. Returns the number of profiles updated.
+        """
+        user_ids = list(user_ids)
+        new_points = Coalesce(F("points"), 0) + points
+        if points < 0:
+            new_points = Greatest(new_points, Value(0))
+
+        updated = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start : start + batch_size]
+            with transaction.atomic():
+                # Balances are locked so the ledger records the change actually applied
+                balances = dict(
+                    self.select_for_update()
+                    .filter(pk__in=batch)
+                    .values_list("pk", "points")
+                )
+                updated += self.filter(pk__in=balances).update(points=new_points)
+                PointsAdjustment.objects.bulk_create(
+                    [
+                        PointsAdjustment(
+                            profile_id=user_id,
+                            points=self._applied_points(balance or 0, points),
+                            reason=reason,
+                            created_by=created_by,
+                        )
+                        for user_id, balance in balances.items()
+                    ]
+                )
+        return updated
+
+    @staticmethod
+    def _applied_points(balance, points):
+        if points < 0:
+            return max(balance + points, 0) - balance
+        return points
+
 
 class Profile(models.Model):
     user = models.OneToOneField(AppUser, on_delete=models.CASCADE, primary_key=True)
@@ -149,6 +240,7 @@ class Profile(models.Model):
     batch = models.PositiveIntegerField()
     points = models.PositiveIntegerField(null=True, blank=True)
     picture = models.ImageField(upload_to="profile-pics", blank=True)
+    picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     sdgs = models.ManyToManyField(
         to=SustainableDevelopmentGoal, related_name="profiles"
     )
@@ -156,22 +248,56 @@ class Profile(models.Model):
     objects = ProfileManager()
 
     def deduct_points(self, points):
-        self.points -= points
-        self.save()
+        """
+        Deduct points only if the balance covers them, as a single conditional UPDATE
+        of the points column. Returns False if the balance was too low.
+        """
+        # Profiles without points have a balance of zero
+        deducted = (
+            Profile.objects.annotate(balance=Coalesce(F("points"), 0))
+            .filter(pk=self.pk, balance__gte=points)
+            .update(points=Coalesce(F("points"), 0) - points)
+        )
+        if deducted:
+            self.refresh_from_db(fields=["points"])
+        return bool(deducted)
 
     def update_sdgs(self, sdgs):
+        """Replace the SDGs of the profile. Returns whether they changed."""
         if sdgs is not None and len(sdgs) > 0:
-            existing_sdgs = list(self.sdgs.all())
-            for sdg in existing_sdgs:
-                self.sdgs.remove(sdg)
-
-            for sdg_code in sdgs:
-                sdg = SustainableDevelopmentGoal.objects.get(pk=sdg_code)
-                self.sdgs.add(sdg)
+            # Uses prefetched SDGs when available
+            existing = {sdg.code for sdg in self.sdgs.all()}
+            if existing != set(sdgs):
+                self.sdgs.set(sdgs)
+                return True
+        return False
 
     def __str__(self):
         return f"{self.name} - {self.user}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["batch", "user"], name="profile_batch_user_idx")
+        ]
+
+
+class PointsAdjustment(models.Model):
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="points_adjustments"
+    )
+    points = models.IntegerField()
+    reason = models.CharField(max_length=200, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        AppUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    def __str__(self):
+        return f"{self.points:+d} points for {self.profile}"
+
+    class Meta:
+        ordering = ["-created"]
+
 
 class PhoneNumber(models.Model):
     user_profile = models.ForeignKey(
@@ -205,7 +331,7 @@ class SocialMediaAccount(models.Model):
 
 class AppleUser(models.Model):
     email = models.EmailField(primary_key=True)
-    apple_id = models.CharField(max_length=200)
+    apple_id = models.CharField(max_length=200, db_index=True)
 
     def __str__(self):
         return self.email
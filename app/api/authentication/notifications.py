@@ -0,0 +1,23 @@
+from django.template.loader import render_to_string
+
+from authentication.models import Profile
+from outbox.services import digest
+
+
+@digest("registration")
+def render_registrations(contexts):
+    profile_ids = [
+        profile_id for context in contexts for profile_id in context["profile_ids"]
+    ]
+    profiles = Profile.objects.select_related("user").in_bulk(profile_ids)
+    profiles = [profiles[pk] for pk in profile_ids if pk in profiles]
+
+    if len(profiles) == 1:
+        subject = "New Sign-up on Melton App"
+    else:
+        subject = f"{len(profiles)} New Sign-ups on Melton App"
+    message = render_to_string(
+        "authentication/new_registration_email.html",
+        context={"profiles": profiles, "admin_url": contexts[-1]["admin_url"]},
+    )
+    return subject, message
@@ -0,0 +1,163 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a stable, unique ``ordering``.
+
+    Pages are fetched with ``WHERE (a, b) > (x, y)`` style conditions instead of
+    offsets, so every page costs the same no matter how deep the client scrolls.
+    Pagination is opt-in: it only kicks in when the request carries the cursor or
+    page size query parameter, so clients expecting a plain list keep working.
+
+    Pages always follow ``ordering``, which replaces any ordering of the queryset.
+    Paginated search results therefore aren't ranked by relevance.
+    """
+
+    ordering = ()
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+    page_size = 50
+    max_page_size = 200
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.validate_position(queryset.model, position)
+
+        fields = self.ordering
+        if self.reverse:
+            queryset = queryset.order_by(*[f"-{field}" for field in fields])
+        else:
+            queryset = queryset.order_by(*fields)
+
+        if position is not None:
+            queryset = queryset.filter(self._seek(position))
+
+        results = list(queryset[: self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[: self.limit]
+        if self.reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param, "")
+        if encoded == "":
+            return None, False
+
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            cursor = json.loads(urlsafe_b64decode(encoded + padding).decode("ascii"))
+            position = cursor["p"]
+            reverse = bool(cursor.get("r", False))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def validate_position(self, model, position):
+        # Cursors come from clients, values the fields can't hold aren't ours
+        values = []
+        for field_name, value in zip(self.ordering, position):
+            if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                values.append(model._meta.get_field(field_name).to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, position, reverse):
+        cursor = {"p": position}
+        if reverse:
+            cursor["r"] = 1
+        encoded = urlsafe_b64encode(json.dumps(cursor).encode("ascii"))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode("ascii").rstrip("=")
+        )
+
+    def _position(self, instance):
+        return [getattr(instance, field) for field in self.ordering]
+
+    def _seek(self, position):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        lookup = "lt" if self.reverse else "gt"
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        return condition
+
+
+class UsersPagination(KeysetPagination):
+    ordering = ("batch", "user_id")
+
+    @property
+    def page_size(self):
+        return settings.USERS_PAGINATION.get("PAGE_SIZE", 50)
+
+    @property
+    def max_page_size(self):
+        return settings.USERS_PAGINATION.get("MAX_PAGE_SIZE", 200)
@@ -0,0 +1,93 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRefreshBuffer:
+    """
+    Write-behind buffer for token last-seen timestamps.
+
+    Instead of writing ``refreshed`` on every authenticated request, the latest
+    timestamp of each token is kept in memory (coalesced per token key) and written
+    to the database in bulk once ``REFRESH_FLUSH_INTERVAL`` has elapsed.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    @property
+    def flush_interval(self):
+        interval = settings.TOKEN_SETTINGS.get(
+            "REFRESH_FLUSH_INTERVAL", timedelta(seconds=30)
+        )
+        return interval.total_seconds()
+
+    def touch(self, key, timestamp):
+        with self._lock:
+            previous = self._pending.get(key)
+            if previous is None or previous < timestamp:
+                self._pending[key] = timestamp
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+
+        if due:
+            self.flush()
+
+    def last_seen(self, key):
+        with self._lock:
+            return self._pending.get(key)
+
+    def apply(self, token):
+        """Overlay a buffered timestamp on a token loaded from the database."""
+        last_seen = self.last_seen(token.pk)
+        if last_seen is not None and last_seen > token.refreshed:
+            token.refreshed = last_seen
+        return token
+
+    def discard(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def flush(self):
+        from authentication.models import ExpiringToken
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        tokens = ExpiringToken.objects.filter(pk__in=pending.keys()).only(
+            "pk", "refreshed"
+        )
+        stale = []
+        for token in tokens:
+            # Another worker may already have written a newer timestamp
+            if token.refreshed < pending[token.pk]:
+                token.refreshed = pending[token.pk]
+                stale.append(token)
+
+        ExpiringToken.objects.bulk_update(stale, ["refreshed"])
+        return len(stale)
+
+
+refresh_buffer = TokenRefreshBuffer()
+
+
+def _flush_on_exit():
+    try:
+        refresh_buffer.flush()
+    except DatabaseError:
+        logger.exception("Could not flush buffered token refreshes on exit")
+
+
+atexit.register(_flush_on_exit)
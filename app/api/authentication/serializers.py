@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 
 from authentication.models import (
@@ -7,6 +8,7 @@ from authentication.models import (
     SocialMediaAccount,
     SustainableDevelopmentGoal,
 )
+from images.fields import ImageVariantField
 
 AUTH_PROVIDERS = ["GOOGLE", "APPLE"]
 
@@ -38,9 +40,7 @@ class SustainableDevelopmentGoalSerializer(serializers.RelatedField):
     def to_internal_value(self, data):
         if int(data) != data:
             raise serializers.ValidationError("Only integer values are allowed.")
-
-        if not SustainableDevelopmentGoal.objects.filter(pk=data).exists():
-            raise serializers.ValidationError("No such SDG exists.")
+        # Existence is checked for all codes at once in validate_sdgs
         return int(data)
 
     def to_representation(self, value):
@@ -58,6 +58,8 @@ class _ProfileSerializer(serializers.ModelSerializer):
         source="phone_number", many=True, required=False
     )
     picture = serializers.ImageField(read_only=True)
+    pictureThumb = ImageVariantField("picture")
+    pictureSrcset = ImageVariantField("picture", kind="srcset")
     socialMediaAccounts = SocialMediaAccountSerializer(
         source="social_media_account", many=True, required=False
     )
@@ -66,6 +68,10 @@ class _ProfileSerializer(serializers.ModelSerializer):
     def validate_sdgs(self, sdgs):
         if sdgs is not None and len(sdgs) > 3:
             raise serializers.ValidationError("Only 3 SDGs are allowed")
+        if sdgs and SustainableDevelopmentGoal.objects.filter(
+            pk__in=sdgs
+        ).count() != len(set(sdgs)):
+            raise serializers.ValidationError("No such SDG exists.")
         return sdgs
 
     class Meta:
@@ -85,6 +91,8 @@ class _ProfileSerializer(serializers.ModelSerializer):
             "socialMediaAccounts",
             "sdgs",
             "picture",
+            "pictureThumb",
+            "pictureSrcset",
         ]
         depth = 1
 
@@ -108,6 +116,8 @@ class ProfileListSerializer(_ProfileSerializer):
             "batch",
             "sdgs",
             "picture",
+            "pictureThumb",
+            "pictureSrcset",
         ]
         depth = 1
 
@@ -135,6 +145,8 @@ class ProfileRetrieveSerializer(_ProfileSerializer):
             "socialMediaAccounts",
             "sdgs",
             "picture",
+            "pictureThumb",
+            "pictureSrcset",
         ]
         depth = 1
 
@@ -155,6 +167,25 @@ class ProfileCreateSerializer(_ProfileSerializer):
         fields = ["user", "name", "isJuniorFellow", "campus", "batch"]
 
 
+class RegistrationUserSerializer(AppUserSerializer):
+    class Meta(AppUserSerializer.Meta):
+        # Registered emails are looked up for all rows at once
+        extra_kwargs = {"email": {"validators": []}}
+
+
+class ProfileBulkCreateSerializer(_ProfileSerializer):
+    """Validates one row of a bulk registration, without querying the database."""
+
+    user = RegistrationUserSerializer()
+    isJuniorFellow = serializers.BooleanField(
+        source="is_junior_fellow", required=False, default=False
+    )
+
+    class Meta:
+        model = Profile
+        fields = ["user", "name", "isJuniorFellow", "campus", "batch"]
+
+
 class ProfileReadUpdateSerializer(_ProfileSerializer):
     phoneNumber = PhoneNumberSerializer(
         source="phone_number", many=True, required=False
@@ -162,45 +193,78 @@ class ProfileReadUpdateSerializer(_ProfileSerializer):
     user = AppUserSerializer(read_only=True)
     points = serializers.IntegerField(read_only=True)
 
+    SCALAR_FIELDS = ["name", "campus", "city", "country", "bio", "work", "batch"]
+
     def update(self, instance, validated_data):
-        instance.name = validated_data.get("name", instance.name)
-        instance.campus = validated_data.get("campus", instance.campus)
-        instance.city = validated_data.get("city", instance.city)
-        instance.country = validated_data.get("country", instance.country)
-        instance.bio = validated_data.get("bio", instance.bio)
-        instance.work = validated_data.get("work", instance.work)
-        instance.batch = validated_data.get("batch", instance.batch)
-        # Delete existing phone numbers and add new ones
-        _ph_query = PhoneNumber.objects.filter(user_profile=instance)
-        existing_phone_numbers = list(_ph_query)
-        _ph_query.delete()
-        for phone_number in validated_data.get("phone_number", existing_phone_numbers):
-            phone_number_obj = PhoneNumber(
-                user_profile=instance,
-                country_code=phone_number.get("country_code"),
-                number=phone_number.get("number"),
-            )
-            phone_number_obj.save()
-
-        # Delete existing social media and add new ones
-        _social_media_query = SocialMediaAccount.objects.filter(user_profile=instance)
-        existing_social_media = list(_social_media_query)
-        _social_media_query.delete()
-        for social_media_account in validated_data.get(
-            "social_media_account", existing_social_media
-        ):
-            social_media_acc_obj = SocialMediaAccount(
+        changed_fields = []
+        for field in self.SCALAR_FIELDS:
+            value = validated_data.get(field, getattr(instance, field))
+            if value != getattr(instance, field):
+                setattr(instance, field, value)
+                changed_fields.append(field)
+
+        with transaction.atomic():
+            if changed_fields:
+                instance.save(update_fields=changed_fields)
+
+            phone_numbers = validated_data.get("phone_number")
+            if phone_numbers is not None and self._sync_collection(
+                instance, "phone_number", phone_numbers, ["country_code", "number"]
+            ):
+                _clear_prefetch(instance, "phone_number")
+
+            accounts = validated_data.get("social_media_account")
+            if accounts is not None and self._sync_collection(
+                instance, "social_media_account", accounts, ["type", "account"]
+            ):
+                _clear_prefetch(instance, "social_media_account")
+
+            if instance.update_sdgs(validated_data.get("sdgs", None)):
+                _clear_prefetch(instance, "sdgs")
+
+        return instance
+
+    def _sync_collection(self, instance, related_name, items, fields):
+        """
+        Make the ``related_name`` rows of ``instance`` match ``items`` in order, reusing
+        existing rows. Returns whether anything was written.
+        """
+        manager = getattr(instance, related_name)
+        model = manager.model
+        existing = list(manager.all())
+
+        to_update = []
+        for row, item in zip(existing, items):
+            changed = False
+            for field in fields:
+                value = item.get(field, "")
+                if getattr(row, field) != value:
+                    setattr(row, field, value)
+                    changed = True
+            if changed:
+                to_update.append(row)
+
+        to_create = [
+            model(
                 user_profile=instance,
-                type=social_media_account.get("type"),
-                account=social_media_account.get("account"),
+                **{field: item.get(field, "") for field in fields}
             )
-            social_media_acc_obj.save()
+            for item in items[len(existing) :]
+        ]
+        to_delete = [row.pk for row in existing[len(items) :]]
 
-        instance.update_sdgs(validated_data.get("sdgs", None))
+        if to_update:
+            model.objects.bulk_update(to_update, fields)
+        if to_create:
+            model.objects.bulk_create(to_create)
+        if to_delete:
+            model.objects.filter(pk__in=to_delete).delete()
+
+        return bool(to_update or to_create or to_delete)
 
-        instance.save()
-        instance.refresh_from_db()
-        return instance
+
+def _clear_prefetch(instance, related_name):
+    getattr(instance, "_prefetched_objects_cache", {}).pop(related_name, None)
 
 
 class RegistrationStatusSerializer(serializers.Serializer):
@@ -208,12 +272,11 @@ class RegistrationStatusSerializer(serializers.Serializer):
     is_active = serializers.BooleanField(read_only=True)
 
     def check_status(self):
-        user = AppUser.objects.filter(email=self.validated_data["email"])
-        if user:
-            return user.get().is_active
-
-        else:
-            return None
+        return (
+            AppUser.objects.filter(email=self.validated_data["email"])
+            .values_list("is_active", flat=True)
+            .first()
+        )
 
 
 class LoginSerializer(serializers.Serializer):
@@ -1,25 +1,32 @@
 import uuid
+from datetime import timedelta
 
+import requests as rq
 from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.files import File
-from django.core.mail import mail_managers
-from django.template.loader import render_to_string
+from django.urls import reverse
 from rest_framework import exceptions, status
 
 from authentication.authentication import AppleOauth, GoogleOauth, WeChatOauth
 from authentication.models import AppleUser, AppUser, ExpiringToken, Profile
 from authentication.serializers import (
     LoginSerializer,
+    ProfileBulkCreateSerializer,
     ProfileCreateSerializer,
     ProfileReadUpdateSerializer,
     RegistrationStatusSerializer,
 )
+from jobs import services as jobs
+from outbox import services as outbox
 from response.errors.authentication import (
     AccountNotApproved,
     InvalidAppleUser,
     ProfileDoesNotExist,
     UserNotRegistered,
 )
+from search import services as search
 
 
 def register_user(request):
@@ -43,21 +50,89 @@ def register_user(request):
     return response, response_status
 
 
-def send_registration_notification(request, profiles):
-    # TODO: Use a better way to send mails asynchronously
-    message = render_to_string(
-        "authentication/new_registration_email.html",
-        request=request,
-        context={"profiles": profiles},
+def bulk_register_users(request):
+    if not isinstance(request.data, list):
+        response = {"type": "failure", "message": "Expected a list of profiles"}
+        return response, status.HTTP_400_BAD_REQUEST
+
+    results, profiles = register_users(request, request.data)
+    response = {
+        "type": "success" if profiles else "failure",
+        "message": f"{len(profiles)} of {len(results)} users created successfully",
+        "results": results,
+    }
+    response_status = (
+        status.HTTP_201_CREATED if profiles else status.HTTP_400_BAD_REQUEST
     )
-    try:
-        mail_managers(
-            subject="New Sign-up on Melton App", message="", html_message=message
+    return response, response_status
+
+
+def register_users(request, rows):
+    """
+    Register the profiles of ``rows`` at once. Rows are validated on their own and
+    valid ones are created together, with one query for already registered emails.
+    Returns the result of each row and the created profiles.
+    """
+    results = []
+    registrations = {}
+    for index, row in enumerate(rows):
+        serializer = ProfileBulkCreateSerializer(data=row)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            email = data["user"]["email"]
+            results.append({"row": index, "type": "success", "email": email})
+            if email in registrations:
+                results[index] = _duplicate_email_result(index, email)
+            else:
+                registrations[email] = (index, data)
+        else:
+            results.append(
+                {"row": index, "type": "failure", "errors": serializer.errors}
+            )
+
+    registered = AppUser.objects.filter(email__in=registrations).values_list(
+        "email", flat=True
+    )
+    for email in registered:
+        index, _ = registrations.pop(email)
+        results[index] = _duplicate_email_result(index, email)
+
+    profiles = []
+    if registrations:
+        profiles = Profile.objects.create_many(
+            [
+                {
+                    "email": email,
+                    "name": data["name"],
+                    "is_junior_fellow": data["is_junior_fellow"],
+                    "campus": data["campus"],
+                    "batch": data["batch"],
+                }
+                for email, (_, data) in registrations.items()
+            ]
         )
-    except ValueError:
-        print("ERROR: Manager mails are not configured properly")
-    except Exception:
-        print("ERROR: Something went wrong in sending mail")
+        search.index_objects(profiles)
+        if settings.EMAIL_REGISTER_NOTIFICATION and len(settings.MANAGERS) > 0:
+            send_registration_notification(request, profiles)
+
+    return results, profiles
+
+
+def _duplicate_email_result(index, email):
+    return {
+        "row": index,
+        "type": "failure",
+        "errors": {"user": {"email": [f"User with email {email} already exists."]}},
+    }
+
+
+def send_registration_notification(request, profiles):
+    """Queue the notification of managers, which is mailed with other sign-ups."""
+    admin_url = request.build_absolute_uri(reverse("admin:index"))
+    outbox.queue(
+        "registration",
+        {"profile_ids": [profile.pk for profile in profiles], "admin_url": admin_url},
+    )
 
 
 def check_registration(data):
@@ -106,23 +181,50 @@ def check_profile_exists(email=None, user=None):
 
 
 def search_apple_user_email(apple_id):
-    email = None
-    count = 0
-    apple_users = AppleUser.objects.filter(apple_id=apple_id)
-    for user in apple_users:
-        if check_profile_exists(email=user.email):
-            email = user.email
-            count += 1
-
-    if count == 1:
-        return email
-    else:
+    """
+    Return the email of the only user with a profile linked to ``apple_id``, or None
+    if there is no such user or more than one. Resolutions are cached for
+    ``APPLE_OAUTH["ID_CACHE_TTL"]``; changing an apple_id mapping invalidates them.
+    """
+    cache = apple_user_cache()
+    cache_key = apple_user_cache_key(apple_id)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached[1]
+
+    users = list(
+        AppUser.objects.filter(
+            email__in=AppleUser.objects.filter(apple_id=apple_id).values("email"),
+            profile__isnull=False,
+        ).values_list("pk", "email")[:2]
+    )
+    if len(users) != 1:
         return None
 
+    ttl = settings.APPLE_OAUTH.get("ID_CACHE_TTL", timedelta(minutes=1))
+    cache.set(cache_key, users[0], ttl.total_seconds())
+    return users[0][1]
+
+
+def apple_user_cache():
+    return caches[settings.APPLE_OAUTH.get("ID_CACHE_BACKEND", "default")]
+
+
+def apple_user_cache_key(apple_id):
+    return f"apple-user:{apple_id}"
+
 
 def get_email_for_apple_user(email, apple_id):
     if email is not None and apple_id is not None:
-        AppleUser.objects.update_or_create(email=email, defaults={"apple_id": apple_id})
+        current = (
+            AppleUser.objects.filter(email=email)
+            .values_list("apple_id", flat=True)
+            .first()
+        )
+        if current != apple_id:
+            AppleUser.objects.update_or_create(
+                email=email, defaults={"apple_id": apple_id}
+            )
         return search_apple_user_email(apple_id)
     elif email is not None and apple_id is None:
         return email
@@ -151,27 +253,27 @@ def login(data):
                         status.HTTP_403_FORBIDDEN,
                     )
 
-            response, response_status = check_registration({"email": email})
+            user = get_login_user(email)
 
-            if response_status == status.HTTP_204_NO_CONTENT:
+            if user is None:
                 return (
                     UserNotRegistered(email=email).to_dict(),
                     status.HTTP_403_FORBIDDEN,
                 )
 
-            if not response.get("isApproved", False):
+            if not user.is_active:
                 return (
                     AccountNotApproved(email=email).to_dict(),
                     status.HTTP_403_FORBIDDEN,
                 )
 
-            if not check_profile_exists(email=email):
+            if not hasattr(user, "profile"):
                 return (
                     ProfileDoesNotExist(email=email).to_dict(),
                     status.HTTP_403_FORBIDDEN,
                 )
 
-            response, response_status = _login_valid_user(email, token, auth_provider)
+            response, response_status = _login_valid_user(user, token, auth_provider)
         else:
             response, response_status = _form_bad_request_response(serializer.errors)
 
@@ -180,6 +282,13 @@ def login(data):
         response_status = e.status_code
         response = {"type": "failure", "message": e.detail}
         return response, response_status
+    except rq.RequestException:
+        response_status = status.HTTP_503_SERVICE_UNAVAILABLE
+        response = {
+            "type": "failure",
+            "message": "Login provider is unavailable. Please try again later.",
+        }
+        return response, response_status
     except ValueError as error:
         response_status = status.HTTP_401_UNAUTHORIZED
         response = {
@@ -190,18 +299,29 @@ def login(data):
         return response, response_status
 
 
-def _login_valid_user(email, token, auth_provider):
-    auth = _get_auth_client(email, token, auth_provider)
+def get_login_user(email):
+    """
+    Load the user logging in together with their profile and token in one query.
+    The user is then passed through the login instead of being fetched again.
+    """
+    return (
+        AppUser.objects.select_related("profile", "auth_token__expiringtoken")
+        .filter(email=email)
+        .first()
+    )
+
+
+def _login_valid_user(user, token, auth_provider):
+    auth = _get_auth_client(user.email, token, auth_provider)
     success = auth.login()
 
     if success:
-        extension, picture_file = auth.get_profile_picture()
-        if picture_file is not None:
-            save_profile_picture(picture_file, extension, email=email)
+        if auth.picture_url is not None:
+            queue_profile_picture(auth.picture_url, user.profile)
         response_status = status.HTTP_200_OK
         response = {
             "type": "success",
-            "appToken": get_token(email=email).key,
+            "appToken": _get_login_token(user).key,
             "message": "You are logged in.",
         }
     else:
@@ -211,6 +331,13 @@ def _login_valid_user(email, token, auth_provider):
     return response, response_status
 
 
+def _get_login_token(user):
+    try:
+        return user.auth_token.expiringtoken
+    except ObjectDoesNotExist:
+        return get_token(user=user)
+
+
 def _get_auth_client(email, token, auth_provider):
     if auth_provider == "GOOGLE":
         return GoogleOauth(email, token)
@@ -246,7 +373,11 @@ def get_profile(user=None, email=None):
 
 
 def update_profile(user, data):
-    profile = Profile.objects.prefetch_related("phone_number").get(user=user)
+    profile = (
+        Profile.objects.select_related("user")
+        .prefetch_related("phone_number", "social_media_account", "sdgs")
+        .get(user=user)
+    )
     serializer = ProfileReadUpdateSerializer(profile, data=data)
     if serializer.is_valid():
         serializer.save()
@@ -259,6 +390,22 @@ def update_profile(user, data):
     return response, response_status
 
 
+def get_profiles_by_email(emails, batch_size=500):
+    """Map each of ``emails`` that has a profile to it, querying in batches."""
+    emails = list(emails)
+    profiles = {}
+    for start in range(0, len(emails), batch_size):
+        for profile in Profile.objects.select_related("user").filter(
+            user__email__in=emails[start : start + batch_size]
+        ):
+            profiles[profile.user.email] = profile
+    return profiles
+
+
+def profile_picture_filename(email, extension):
+    return email.split("@")[0] + "_" + str(uuid.uuid4().hex)[:6] + extension
+
+
 def save_profile_picture(picture_file, extension, user=None, email=None):
     if user is not None:
         profile = Profile.objects.get(user=user)
@@ -268,7 +415,7 @@ def save_profile_picture(picture_file, extension, user=None, email=None):
         profile = Profile.objects.get(user=user)
 
     if not profile.picture:
-        filename = email.split("@")[0] + "_" + str(uuid.uuid4().hex)[:6] + extension
+        filename = profile_picture_filename(email, extension)
         profile.picture.save(filename, picture_file)
         profile.save()
 
@@ -276,6 +423,16 @@ def save_profile_picture(picture_file, extension, user=None, email=None):
             picture_file.close()
 
 
+def queue_profile_picture(url, profile):
+    """Queue the download of a provider's picture for a profile that has none."""
+    if not profile.picture:
+        jobs.enqueue(
+            "authentication.ingest_avatar",
+            {"user_id": profile.pk, "url": url},
+            dedupe_key=f"avatar:{profile.pk}",
+        )
+
+
 def _form_bad_request_response(errors):
     response_status = status.HTTP_400_BAD_REQUEST
     errors["type"] = "failure"
@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from authentication.models import AppleUser, AppUser, ExpiringToken
+from authentication.token_cache import token_cache
+
+
+@receiver(post_delete, sender=ExpiringToken)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=AppUser)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    if created:
+        return
+    for key in ExpiringToken.objects.filter(user=instance).values_list(
+        "key", flat=True
+    ):
+        token_cache.invalidate(key)
+
+
+@receiver(pre_save, sender=AppleUser)
+def invalidate_previous_apple_id(sender, instance, **kwargs):
+    from authentication.services import apple_user_cache, apple_user_cache_key
+
+    previous = (
+        AppleUser.objects.filter(pk=instance.pk)
+        .exclude(apple_id=instance.apple_id)
+        .values_list("apple_id", flat=True)
+        .first()
+    )
+    if previous is not None:
+        apple_user_cache().delete(apple_user_cache_key(previous))
+
+
+@receiver(post_save, sender=AppleUser)
+@receiver(post_delete, sender=AppleUser)
+def invalidate_apple_id(sender, instance, **kwargs):
+    from authentication.services import apple_user_cache, apple_user_cache_key
+
+    apple_user_cache().delete(apple_user_cache_key(instance.apple_id))
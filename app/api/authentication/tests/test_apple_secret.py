@@ -0,0 +1,77 @@
+from datetime import timedelta
+from unittest import mock
+
+import jwt
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from authentication.apple_secret import APPLE_AUDIENCE, ClientSecretManager
+from authentication.authentication import AppleOauth
+
+
+def generate_key():
+    key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode("ascii")
+    return private_pem, key.public_key()
+
+
+PRIVATE_KEY, PUBLIC_KEY = generate_key()
+
+
+@override_settings(
+    APPLE_OAUTH_CLIENT_ID="client",
+    APPLE_OAUTH_TEAM_ID="team",
+    APPLE_OAUTH_KEY_ID="key",
+    APPLE_OATH_PRIVATE_KEY=PRIVATE_KEY,
+    APPLE_OAUTH={
+        "CLIENT_SECRET_LIFETIME": timedelta(days=12),
+        "REFRESH_BEFORE_EXPIRY": timedelta(days=1),
+    },
+)
+class ClientSecretManagerTest(SimpleTestCase):
+    def setUp(self):
+        self.manager = ClientSecretManager()
+
+    def test_secret_is_signed_once_and_reused(self):
+        secrets = {self.manager.get_client_secret() for _ in range(3)}
+
+        self.assertEqual(len(secrets), 1)
+        self.assertEqual(self.manager.metrics, {"minted": 1, "reused": 2})
+        secret = secrets.pop()
+        claims = jwt.decode(secret, PUBLIC_KEY, audience=APPLE_AUDIENCE)
+        self.assertEqual(claims["iss"], "team")
+        self.assertEqual(claims["sub"], "client")
+        self.assertEqual(jwt.get_unverified_header(secret)["kid"], "key")
+
+    def test_secret_is_minted_again_before_expiry(self):
+        first = self.manager.get_client_secret()
+        later = timezone.now() + timedelta(days=11, hours=1)
+        with mock.patch("authentication.apple_secret.timezone.now", return_value=later):
+            second = self.manager.get_client_secret()
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.manager.metrics, {"minted": 2, "reused": 0})
+
+    def test_secret_is_minted_again_when_credentials_change(self):
+        first = self.manager.get_client_secret()
+        with self.settings(APPLE_OAUTH_KEY_ID="rotated"):
+            second = self.manager.get_client_secret()
+
+        self.assertEqual(jwt.get_unverified_header(first)["kid"], "key")
+        self.assertEqual(jwt.get_unverified_header(second)["kid"], "rotated")
+        self.assertEqual(self.manager.minted, 2)
+
+    def test_apple_login_uses_cached_secret(self):
+        with mock.patch("authentication.authentication.client_secrets", self.manager):
+            for _ in range(2):
+                client_id, secret = AppleOauth("a@b.com", "code").get_key_and_secret()
+
+        self.assertEqual(client_id, "client")
+        self.assertEqual(self.manager.metrics, {"minted": 1, "reused": 1})
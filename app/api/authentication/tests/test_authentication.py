@@ -0,0 +1,158 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import exceptions
+
+from authentication import services
+from authentication.authentication import ExpiringTokenAuthentication
+from authentication.models import ExpiringToken, Profile
+from authentication.refresh import refresh_buffer
+from authentication.token_cache import token_cache
+from jobs.models import Job, JobStatus
+from jobs.services import run_pending
+
+WRITE_BEHIND_SETTINGS = {
+    "IDLE_TOKEN_LIFESPAN": timedelta(hours=1),
+    "EXPIRING_TOKEN_LIFESPAN": timedelta(days=14),
+    "REFRESH_THRESHOLD": timedelta(minutes=5),
+    "WRITE_BEHIND_REFRESH": True,
+    "REFRESH_FLUSH_INTERVAL": timedelta(hours=1),
+    "TOKEN_CACHE_TTL": timedelta(0),
+}
+
+CACHED_SETTINGS = dict(
+    WRITE_BEHIND_SETTINGS,
+    TOKEN_CACHE_TTL=timedelta(seconds=60),
+    TOKEN_CACHE_BACKEND="default",
+)
+
+
+class _TokenTestCase(TestCase):
+    EMAIL = "test@email.com"
+
+    def setUp(self):
+        profile = Profile.objects.create(
+            email=self.EMAIL,
+            name="test",
+            is_junior_fellow=True,
+            campus="University of the World",
+            batch=2020,
+        )
+        profile.user.is_active = True
+        profile.user.save()
+        self.token = ExpiringToken.objects.get(user=profile.user)
+        self.auth = ExpiringTokenAuthentication()
+
+    def tearDown(self):
+        refresh_buffer.flush()
+        token_cache.clear()
+        cache.clear()
+
+    def _set_refreshed(self, refreshed):
+        ExpiringToken.objects.filter(pk=self.token.pk).update(refreshed=refreshed)
+
+
+@override_settings(TOKEN_SETTINGS=WRITE_BEHIND_SETTINGS)
+class TokenRefreshTest(_TokenTestCase):
+    def test_recent_token_is_not_written(self):
+        with self.assertNumQueries(1):
+            self.auth.authenticate_credentials(self.token.key)
+        self.assertIsNone(refresh_buffer.last_seen(self.token.pk))
+
+    def test_stale_token_refresh_is_buffered(self):
+        old = timezone.now() - timedelta(hours=1)
+        self._set_refreshed(old)
+
+        with self.assertNumQueries(1):
+            _, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertGreater(token.refreshed, old)
+        self.assertEqual(ExpiringToken.objects.get(pk=self.token.pk).refreshed, old)
+
+        refresh_buffer.flush()
+        self.assertEqual(
+            ExpiringToken.objects.get(pk=self.token.pk).refreshed, token.refreshed
+        )
+
+    def test_buffered_refresh_keeps_token_alive(self):
+        self._set_refreshed(timezone.now() - timedelta(hours=1))
+        self.auth.authenticate_credentials(self.token.key)
+        self._set_refreshed(timezone.now() - timedelta(days=15))
+
+        _, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertFalse(token.expired)
+
+    def test_expired_token_is_deleted(self):
+        self._set_refreshed(timezone.now() - timedelta(days=15))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+        self.assertFalse(ExpiringToken.objects.filter(pk=self.token.pk).exists())
+
+
+@override_settings(TOKEN_SETTINGS=CACHED_SETTINGS)
+class TokenCacheTest(_TokenTestCase):
+    def test_cached_token_needs_no_queries(self):
+        self.auth.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.email, self.EMAIL)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_shared_tier_is_used_after_local_miss(self):
+        self.auth.authenticate_credentials(self.token.key)
+        token_cache.clear()
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deactivated_user_is_rejected(self):
+        self.auth.authenticate_credentials(self.token.key)
+        user = self.token.user
+        user.is_active = False
+        user.save()
+        with self.assertRaises(exceptions.PermissionDenied):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deleted_token_is_rejected(self):
+        self.auth.authenticate_credentials(self.token.key)
+        ExpiringToken.objects.get(pk=self.token.pk).delete()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+
+class ProfilePictureQueueTest(_TokenTestCase):
+    URL = "https://pictures.example.com/me.png"
+
+    def _queue(self):
+        profile = Profile.objects.get(user=self.token.user)
+        services.queue_profile_picture(self.URL, profile)
+
+    def test_picture_download_is_queued_once(self):
+        self._queue()
+        self._queue()
+
+        job = Job.objects.get()
+        self.assertEqual(job.name, "authentication.ingest_avatar")
+        self.assertEqual(job.payload, {"user_id": self.token.user.pk, "url": self.URL})
+
+    def test_profiles_with_picture_are_skipped(self):
+        Profile.objects.filter(user=self.token.user).update(
+            picture="profile-pics/me.png"
+        )
+        self._queue()
+        self.assertFalse(Job.objects.exists())
+
+    def test_worker_saves_picture(self):
+        self._queue()
+        picture = (".png", mock.sentinel.file)
+        with mock.patch(
+            "authentication.jobs.download_picture", return_value=picture
+        ) as download, mock.patch(
+            "authentication.services.save_profile_picture"
+        ) as save:
+            run_pending()
+
+        download.assert_called_once_with(self.URL)
+        save.assert_called_once_with(mock.sentinel.file, ".png", user=self.token.user)
+        self.assertEqual(Job.objects.get().status, JobStatus.DONE)
@@ -0,0 +1,224 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from authentication.models import (
+    AppUser,
+    Profile,
+    SocialMediaAccount,
+    SustainableDevelopmentGoal,
+)
+from images.services import GENERATE_JOB
+from jobs.models import Job
+from search import services as search
+
+
+class SaveProfilePicTest(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        storage_settings = override_settings(
+            DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+            MEDIA_ROOT=str(self.directory / "media"),
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.emails = [f"fellow{index}@email.com" for index in range(5)]
+        for email in self.emails:
+            Profile.objects.create(
+                email=email,
+                name="test",
+                is_junior_fellow=True,
+                campus="University of the World",
+                batch=2020,
+            )
+
+    def _mapping(self, mapping):
+        mapping_file = self.directory / "mapping.json"
+        mapping_file.write_text(json.dumps(mapping))
+        return mapping_file
+
+    def _call(self, *args, **options):
+        out, err = StringIO(), StringIO()
+        call_command("save_profile_pic", *args, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def _pictures(self):
+        return dict(Profile.objects.values_list("user__email", "picture"))
+
+    def test_files_are_uploaded_in_parallel(self):
+        mapping = {}
+        for email in self.emails:
+            picture = self.directory / f"{email}.png"
+            picture.write_bytes(b"picture")
+            mapping[email] = str(picture)
+        mapping["unknown@email.com"] = str(picture)
+        mapping_file = self._mapping(mapping)
+
+        out, err = self._call(str(mapping_file), workers=3, chunk_size=2)
+
+        self.assertIn("SUCCESS: 5 Profile pictures have been stored", out)
+        self.assertIn("0 skipped, 1 failed", out)
+        self.assertEqual(out.count("Progress:"), 3)
+        self.assertIn("unknown@email.com does not exist", err)
+        for email, picture in self._pictures().items():
+            self.assertTrue(picture.startswith(f"profile-pics/{email.split('@')[0]}_"))
+            self.assertTrue((self.directory / "media" / picture).exists())
+        # Bulk updates still queue the resized variants
+        self.assertEqual(Job.objects.filter(name=GENERATE_JOB).count(), 5)
+
+    def test_rerun_skips_saved_entries(self):
+        mapping = {email: f"profile-pics/{email}.png" for email in self.emails}
+        mapping_file = self._mapping(mapping)
+        checkpoint = Path(f"{mapping_file}.checkpoint")
+        checkpoint.write_text("\n".join(self.emails[:3]) + "\n")
+
+        out, _ = self._call(str(mapping_file), url=True)
+        self.assertIn("Skipping 3 entries", out)
+        self.assertIn("SUCCESS: 2 Profile pictures have been stored", out)
+        pictures = self._pictures()
+        self.assertEqual(pictures[self.emails[0]], "")
+        self.assertEqual(pictures[self.emails[4]], mapping[self.emails[4]])
+        self.assertEqual(checkpoint.read_text().split(), self.emails)
+
+        out, _ = self._call(str(mapping_file), url=True)
+        self.assertIn("SUCCESS: 0 Profile pictures have been stored", out)
+
+    def test_urls_are_saved_in_bulk(self):
+        mapping = {email: f"profile-pics/{email}.png" for email in self.emails}
+        mapping[self.emails[0]] = "elsewhere/picture.png"
+        checkpoint = self.directory / "done.txt"
+
+        with CaptureQueriesContext(connection) as context:
+            out, err = self._call(
+                str(self._mapping(mapping)),
+                url=True,
+                chunk_size=500,
+                checkpoint=str(checkpoint),
+            )
+
+        self.assertIn("SUCCESS: 4 Profile pictures have been stored", out)
+        self.assertIn("elsewhere/picture.png is not relative", err)
+        updates = [
+            query
+            for query in context.captured_queries
+            if query["sql"].startswith('UPDATE "authentication_profile"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(checkpoint.read_text().split(), self.emails[1:])
+
+
+CSV_HEADER = (
+    "Full name,Email,Batch,Campus,City,Country,SDGs,Bio,Work,"
+    "Facebook,LinkedIn,Twitter,Wechat,Website\n"
+)
+
+
+class ImportProfilesTest(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        for code in (1, 2, 3):
+            SustainableDevelopmentGoal.objects.create(code=code, name=f"SDG {code}")
+
+    def _import(self, rows, **options):
+        csv_file = self.directory / "fellows.csv"
+        csv_file.write_text(CSV_HEADER + "".join(f"{row}\n" for row in rows))
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_profiles", str(csv_file), stdout=out, stderr=err, **options
+        )
+        return out.getvalue(), err.getvalue()
+
+    def _rows(self, start, end):
+        return [
+            f"Fellow {index},fellow{index}@email.com,2019,Campus,City,Country,"
+            f'"1, 2",Bio,Work,fb{index},,,,https://site{index}.org'
+            for index in range(start, end)
+        ]
+
+    def test_rows_are_loaded_in_batches(self):
+        out, err = self._import(self._rows(0, 5), batch_size=2)
+
+        self.assertEqual(err, "")
+        self.assertIn(
+            "SUCCESS: 5 profiles created, 0 updated, 0 unchanged, 0 invalid rows", out
+        )
+        self.assertEqual(out.count("Progress:"), 3)
+
+        profile = Profile.objects.select_related("user").get(
+            user__email="fellow3@email.com"
+        )
+        self.assertEqual(profile.name, "Fellow 3")
+        self.assertEqual(profile.batch, 2019)
+        self.assertTrue(profile.user.is_active)
+        self.assertFalse(profile.user.has_usable_password())
+        self.assertEqual(sorted(profile.sdgs.values_list("code", flat=True)), [1, 2])
+        self.assertEqual(
+            sorted(profile.social_media_account.values_list("type", "account")),
+            [("Facebook", "fb3"), ("Other", "https://site3.org")],
+        )
+        found = search.search(Profile.objects.all(), "fellow")
+        self.assertEqual(found.count(), 5)
+
+    def test_queries_dont_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as context:
+            self._import(self._rows(0, 2))
+        with CaptureQueriesContext(connection) as more_rows:
+            self._import(self._rows(2, 12))
+        self.assertEqual(len(more_rows), len(context))
+
+    def test_existing_users_are_updated(self):
+        existing = Profile.objects.create(
+            email="fellow@email.com",
+            name="Old name",
+            is_junior_fellow=True,
+            campus="Old campus",
+            batch=2018,
+            points=30,
+        )
+        existing.sdgs.set([3])
+        row = "New name,fellow@email.com,2020,Campus,,,1,,,fb,,,,"
+
+        out, _ = self._import([row])
+        self.assertIn("SUCCESS: 0 profiles created, 1 updated, 0 unchanged", out)
+        out, _ = self._import([row])
+        self.assertIn("SUCCESS: 0 profiles created, 0 updated, 1 unchanged", out)
+
+        self.assertEqual(AppUser.objects.count(), 1)
+        profile = Profile.objects.get(pk=existing.pk)
+        self.assertEqual((profile.name, profile.batch), ("New name", 2020))
+        # Points and approval aren't part of the export
+        self.assertEqual(profile.points, 30)
+        self.assertTrue(profile.is_junior_fellow)
+        self.assertEqual(list(profile.sdgs.values_list("code", flat=True)), [1])
+        self.assertEqual(SocialMediaAccount.objects.count(), 1)
+
+    def test_invalid_rows_are_reported(self):
+        out, err = self._import(
+            [
+                "Fellow,not-an-email,2019,,,,,,,,,,,",
+                "Fellow,fellow@email.com,twenty,,,,,,,,,,,",
+                "Fellow,fellow@email.com,2019,,,,18,,,,,,,",
+                ",fellow@email.com,2019,,,,,,,,,,,",
+                "Fellow,fellow@email.com,2019,,,,,,,,,,,",
+                "Fellow,fellow@email.com,2019,,,,,,,,,,,",
+            ]
+        )
+
+        self.assertIn(
+            "SUCCESS: 1 profiles created, 0 updated, 0 unchanged, 5 invalid rows", out
+        )
+        self.assertIn("Row 1: Enter a valid email address.", err)
+        self.assertIn("Row 2: Batch twenty is not a number.", err)
+        self.assertIn("Row 3: SDG 18 does not exist.", err)
+        self.assertIn("Row 4: Full name is required.", err)
+        self.assertIn("Row 6: Email fellow@email.com is a duplicate of row 5.", err)
@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.test import SimpleTestCase, override_settings
+from google.auth import crypt, jwt
+
+from authentication.authentication import GoogleOauth
+from authentication.google_certs import CertificateCache, HttpKeySource
+
+
+def generate_key(key_id):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, key_id)])
+    now = datetime.utcnow()
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    signer = crypt.RSASigner.from_string(private_pem, key_id=key_id)
+    public_pem = certificate.public_bytes(serialization.Encoding.PEM).decode("ascii")
+    return signer, public_pem
+
+
+class KeyServer:
+    """Local stand-in for Google's certificate endpoint."""
+
+    def __init__(self):
+        self.certs = {}
+        self.max_age = 3600
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                body = json.dumps(server.certs).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header(
+                    "Cache-Control",
+                    f"public, max-age={server.max_age}, must-revalidate",
+                )
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/certs"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+GOOGLE_OAUTH = {
+    "DEFAULT_MAX_AGE": timedelta(hours=1),
+    "REFRESH_BEFORE_EXPIRY": timedelta(seconds=1),
+    "MIN_FORCED_REFRESH_INTERVAL": timedelta(minutes=1),
+}
+
+
+@override_settings(GOOGLE_OAUTH=GOOGLE_OAUTH, GAUTH_ANDROID_CLIENT_ID="android-app")
+class CertificateCacheTest(SimpleTestCase):
+    EMAIL = "test@email.com"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.signer, cls.public_pem = generate_key("key-1")
+        cls.other_signer, cls.other_public_pem = generate_key("key-2")
+
+    def setUp(self):
+        self.server = KeyServer()
+        self.server.certs = {"key-1": self.public_pem}
+        self.cache = CertificateCache(HttpKeySource(self.server.url))
+
+    def tearDown(self):
+        self.server.close()
+
+    def _token(self, signer=None, **claims):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": "android-app",
+            "email": self.EMAIL,
+            "iat": now,
+            "exp": now + 600,
+        }
+        payload.update(claims)
+        return jwt.encode(signer or self.signer, payload).decode("utf-8")
+
+    def test_certificates_are_fetched_once(self):
+        for _ in range(3):
+            idinfo = self.cache.verify(self._token())
+        self.assertEqual(idinfo["email"], self.EMAIL)
+        self.assertEqual(self.server.hits, 1)
+
+    def test_refresh_before_expiry_happens_in_background(self):
+        self.server.max_age = 1
+        self.cache.verify(self._token())
+        self.cache.verify(self._token())
+        for _ in range(50):
+            if self.cache.fetch_count == 2:
+                break
+            time.sleep(0.02)
+        self.assertEqual(self.cache.fetch_count, 2)
+
+    def test_unknown_key_id_refetches_certificates(self):
+        self.cache.verify(self._token())
+        self.server.certs = {"key-2": self.other_public_pem}
+        idinfo = self.cache.verify(self._token(signer=self.other_signer))
+        self.assertEqual(idinfo["email"], self.EMAIL)
+        self.assertEqual(self.server.hits, 2)
+
+        # Forged key ids don't trigger a refetch every time
+        with self.assertRaises(ValueError):
+            self.cache.verify(self._token())
+        self.assertEqual(self.server.hits, 2)
+
+    def test_invalid_tokens_are_rejected(self):
+        forged = self._token(signer=self.other_signer)
+        forged = forged.replace(forged.split(".")[0], self._token().split(".")[0])
+        with self.assertRaises(ValueError):
+            self.cache.verify(forged)
+        with self.assertRaises(ValueError):
+            self.cache.verify(self._token(iss="https://evil.example.com"))
+        with self.assertRaises(ValueError):
+            self.cache.verify(self._token(exp=int(time.time()) - 3600))
+
+    def test_google_login(self):
+        from authentication import authentication
+
+        original = authentication.google_certificates
+        authentication.google_certificates = self.cache
+        try:
+            auth = GoogleOauth(self.EMAIL, self._token(picture="https://pic"))
+            self.assertTrue(auth.login())
+            self.assertEqual(auth.picture_url, "https://pic")
+            auth = GoogleOauth("other@email.com", self._token())
+            self.assertFalse(auth.login())
+        finally:
+            authentication.google_certificates = original
@@ -0,0 +1,165 @@
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests as rq
+from django.test import SimpleTestCase, override_settings
+
+from api.http_client import CircuitOpenError, HttpClient
+
+
+class ProviderServer:
+    """Local provider answering with the queued status codes, then 200."""
+
+    def __init__(self):
+        self.statuses = []
+        self.delay = 0
+        self.hits = 0
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                server.connections += 1
+                super().setup()
+
+            def _respond(self):
+                server.hits += 1
+                length = int(self.headers.get("content-length") or 0)
+                self.rfile.read(length)
+                time.sleep(server.delay)
+                status = server.statuses.pop(0) if server.statuses else 200
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Length", "2")
+                    self.end_headers()
+                    self.wfile.write(b"ok")
+                except ConnectionError:
+                    # The client gave up waiting
+                    pass
+
+            do_GET = do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+OUTBOUND_HTTP = {
+    "READ_TIMEOUT": 2,
+    "RETRIES": 2,
+    "BACKOFF_FACTOR": 0,
+    "BREAKER_FAILURE_THRESHOLD": 3,
+    "BREAKER_RESET_TIMEOUT": timedelta(minutes=1),
+    "PROVIDERS": {"slow": {"READ_TIMEOUT": 0.1, "RETRIES": 0}},
+}
+
+
+@override_settings(OUTBOUND_HTTP=OUTBOUND_HTTP)
+class HttpClientTest(SimpleTestCase):
+    def setUp(self):
+        self.server = ProviderServer()
+        self.client = HttpClient()
+
+    def tearDown(self):
+        self.client.reset()
+        self.server.close()
+
+    def test_connections_are_kept_alive(self):
+        for _ in range(3):
+            response = self.client.get(self.server.url)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.hits, 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_get_is_retried_on_unavailable(self):
+        self.server.statuses = [503, 502]
+        response = self.client.get(self.server.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.hits, 3)
+
+    def test_retries_are_bounded(self):
+        self.server.statuses = [503] * 5
+        response = self.client.get(self.server.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.hits, 3)
+
+    def test_post_is_not_retried(self):
+        self.server.statuses = [503]
+        response = self.client.post(self.server.url, data={"code": "single use"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.hits, 1)
+
+    def test_read_timeout(self):
+        self.server.delay = 0.5
+        with self.assertRaises(rq.Timeout):
+            self.client.get(self.server.url, provider="slow")
+        self.assertEqual(self.server.hits, 1)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        self.server.statuses = [503] * 9
+        self.client.get(self.server.url, provider="flaky")
+        # Retries of one call count as a single failure
+        self.assertFalse(self.client.breaker("flaky").is_open)
+        for _ in range(2):
+            self.client.get(self.server.url, provider="flaky")
+        self.assertTrue(self.client.breaker("flaky").is_open)
+
+        with self.assertRaises(CircuitOpenError):
+            self.client.get(self.server.url, provider="flaky")
+        self.assertEqual(self.server.hits, 9)
+
+        # Other providers are unaffected
+        response = self.client.get(self.server.url, provider="other")
+        self.assertEqual(response.status_code, 200)
+
+    def test_circuit_closes_after_successful_trial(self):
+        breaker = self.client.breaker("flaky")
+        for _ in range(3):
+            breaker.record_failure()
+        breaker._opened_at -= 60
+
+        response = self.client.get(self.server.url, provider="flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(breaker.is_open)
+
+    def test_unexpected_errors_end_the_trial(self):
+        breaker = self.client.breaker("flaky")
+        for _ in range(3):
+            breaker.record_failure()
+        breaker._opened_at -= 60
+
+        with self.assertRaises(TypeError):
+            self.client.get(self.server.url, provider="flaky", unknown=True)
+        # The next call is let through as a new trial
+        response = self.client.get(self.server.url, provider="flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(breaker.is_open)
+
+    def test_other_calls_dont_end_the_trial(self):
+        breaker = self.client.breaker("flaky")
+        for _ in range(3):
+            breaker.record_failure()
+        breaker._opened_at -= 60
+
+        self.assertEqual(breaker.acquire(), (True, True))
+        # A call started before the breaker opened finishes during the trial
+        self.server.statuses = [503] * 3
+        breaker._opened_at, opened_at = None, breaker._opened_at
+        self.client.get(self.server.url, provider="flaky")
+        breaker._opened_at = opened_at
+        self.assertEqual(breaker.acquire(), (False, False))
+
+        breaker.release()
+        self.assertEqual(breaker.acquire(), (True, True))
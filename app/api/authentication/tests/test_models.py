@@ -1,6 +1,11 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from authentication.models import Profile
+from authentication.models import PointsAdjustment, Profile
 
 
 class ProfileModelTest(TestCase):
@@ -38,3 +43,73 @@ class ProfileModelTest(TestCase):
         self.assertEqual(profile.is_junior_fellow, self.IS_JUNIOR_FELLOW)
         self.assertEqual(profile.campus, self.CAMPUS)
         self.assertEqual(profile.batch, self.BATCH)
+
+
+class PointsAdjustmentTest(TestCase):
+    EMAILS = ["first@email.com", "second@email.com", "third@email.com"]
+
+    def setUp(self):
+        self.profiles = [
+            Profile.objects.create(
+                email=email,
+                name="test",
+                is_junior_fellow=True,
+                campus="University of the World",
+                batch=2020,
+                points=points,
+            )
+            for email, points in zip(self.EMAILS, [0, 10, 50])
+        ]
+        self.ids = [profile.pk for profile in self.profiles]
+
+    def _points(self):
+        return list(
+            Profile.objects.filter(pk__in=self.ids)
+            .order_by("pk")
+            .values_list("points", flat=True)
+        )
+
+    def test_add_points_in_one_update(self):
+        with self.assertNumQueries(5):
+            updated = Profile.objects.adjust_points(self.ids, 20, reason="Event")
+        self.assertEqual(updated, 3)
+        self.assertListEqual(self._points(), [20, 30, 70])
+        self.assertEqual(PointsAdjustment.objects.filter(reason="Event").count(), 3)
+
+    def test_reduce_points_floors_at_zero(self):
+        Profile.objects.adjust_points(self.ids, -20, batch_size=2)
+        self.assertListEqual(self._points(), [0, 0, 30])
+        # The ledger records what was taken, so it adds up to the balances
+        ledger = PointsAdjustment.objects.order_by("profile_id")
+        self.assertListEqual(
+            list(ledger.values_list("points", flat=True)), [0, -10, -20]
+        )
+
+    def test_award_points_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write("email,points,reason\n")
+            file.write(f"{self.EMAILS[0]},5,\n")
+            file.write(f"{self.EMAILS[1]},5,Hackathon\n")
+            file.write("unknown@email.com,5,\n")
+            file.write(f"{self.EMAILS[2]},-100,\n")
+        out, err = StringIO(), StringIO()
+        call_command("award_points", file.name, batch_size=2, stdout=out, stderr=err)
+        os.remove(file.name)
+
+        self.assertListEqual(self._points(), [5, 15, 0])
+        self.assertIn("unknown@email.com", err.getvalue())
+        self.assertIn("3 profiles", out.getvalue())
+        self.assertTrue(PointsAdjustment.objects.filter(reason="Hackathon").exists())
+
+    def test_award_points_sums_duplicate_rows(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write("email,points\n")
+            file.write(f"{self.EMAILS[0]},5\n")
+            file.write(f"{self.EMAILS[0]},5\n")
+            file.write(f"{self.EMAILS[1]},5\n")
+        call_command("award_points", file.name, stdout=StringIO(), stderr=StringIO())
+        os.remove(file.name)
+
+        self.assertListEqual(self._points(), [10, 15, 50])
+        ledger = PointsAdjustment.objects.filter(profile_id=self.ids[0])
+        self.assertListEqual(list(ledger.values_list("points", flat=True)), [10])
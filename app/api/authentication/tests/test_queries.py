@@ -0,0 +1,218 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from authentication import services
+from authentication.authentication import GoogleOauth
+from authentication.models import (
+    AppleUser,
+    AppUser,
+    ExpiringToken,
+    PhoneNumber,
+    Profile,
+    SocialMediaAccount,
+    SustainableDevelopmentGoal,
+)
+from jobs.models import Job
+
+
+class UsersQueryCountTest(APITestCase):
+    CAMPUS = "University of the World"
+    BATCH = 2020
+
+    def setUp(self):
+        self.sdgs = [
+            SustainableDevelopmentGoal.objects.create(code=code, name=f"SDG {code}")
+            for code in range(1, 4)
+        ]
+        profile = self._create_profiles(1)[0]
+        self.user = profile.user
+        self.token = ExpiringToken.objects.get(user=self.user)
+
+    def _create_profiles(self, count):
+        offset = Profile.objects.count()
+        profiles = []
+        for index in range(offset, offset + count):
+            profile = Profile.objects.create(
+                email=f"user{index}@email.com",
+                name=f"user{index}",
+                is_junior_fellow=True,
+                campus=self.CAMPUS,
+                batch=self.BATCH,
+            )
+            profile.user.is_active = True
+            profile.user.save()
+            profile.sdgs.set(self.sdgs)
+            PhoneNumber.objects.create(
+                user_profile=profile, country_code="+91", number=str(index)
+            )
+            SocialMediaAccount.objects.create(
+                user_profile=profile, type="github", account=f"user{index}"
+            )
+            profiles.append(profile)
+        return profiles
+
+    def _count_queries(self, url):
+        self.client.force_authenticate(user=self.user, token=self.token)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        url = reverse("users")
+        queries = self._count_queries(url)
+        self._create_profiles(10)
+        self.assertEqual(self._count_queries(url), queries)
+        self.assertLessEqual(queries, 2)
+
+    def test_retrieve_query_count(self):
+        url = reverse("user", args=[self.user.id])
+        self.assertLessEqual(self._count_queries(url), 4)
+
+    def test_search_query_count_is_constant(self):
+        url = reverse("users") + "?search=user"
+        queries = self._count_queries(url)
+        self._create_profiles(10)
+        self.assertEqual(self._count_queries(url), queries)
+
+
+class LoginQueryCountTest(APITestCase):
+    EMAIL = "user@email.com"
+
+    def setUp(self):
+        profile = Profile.objects.create(
+            email=self.EMAIL,
+            name="user",
+            is_junior_fellow=True,
+            campus="University of the World",
+            batch=2020,
+        )
+        profile.user.is_active = True
+        profile.user.save()
+        self.token = ExpiringToken.objects.get(user=profile.user)
+
+    def _login(self, picture_url=None):
+        def login(auth):
+            auth.picture_url = picture_url
+            return True
+
+        data = {
+            "email": self.EMAIL,
+            "appleId": None,
+            "token": "id token",
+            "authProvider": "google",
+        }
+        with mock.patch.object(GoogleOauth, "login", login):
+            return services.login(data)
+
+    def test_login_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            response, response_status = self._login()
+
+        self.assertEqual(response_status, status.HTTP_200_OK)
+        self.assertEqual(response["appToken"], self.token.key)
+
+    def test_missing_token_is_created(self):
+        ExpiringToken.objects.all().delete()
+        response, response_status = self._login()
+
+        self.assertEqual(response_status, status.HTTP_200_OK)
+        self.assertEqual(
+            response["appToken"], ExpiringToken.objects.get(user__email=self.EMAIL).key
+        )
+
+    def test_login_checks_account(self):
+        Profile.objects.all().delete()
+        with self.assertNumQueries(1):
+            _, response_status = self._login()
+        self.assertEqual(response_status, status.HTTP_403_FORBIDDEN)
+
+        AppUser.objects.update(is_active=False)
+        _, response_status = self._login()
+        self.assertEqual(response_status, status.HTTP_403_FORBIDDEN)
+
+        AppUser.objects.all().delete()
+        _, response_status = self._login()
+        self.assertEqual(response_status, status.HTTP_403_FORBIDDEN)
+
+    def test_picture_is_queued_without_reading_again(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._login(picture_url="https://pictures.example.com/me.png")
+
+        selects = [q for q in queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(selects), 1)
+        self.assertTrue(
+            Job.objects.filter(name="authentication.ingest_avatar").exists()
+        )
+
+
+class AppleUserLookupTest(APITestCase):
+    APPLE_ID = "000123.apple"
+
+    def setUp(self):
+        cache.clear()
+        for email in ["first@email.com", "second@email.com"]:
+            Profile.objects.create(
+                email=email,
+                name="user",
+                is_junior_fellow=True,
+                campus="University of the World",
+                batch=2020,
+            )
+        AppleUser.objects.create(email="first@email.com", apple_id=self.APPLE_ID)
+        # Mappings without a profile are ignored
+        AppleUser.objects.create(email="other@email.com", apple_id=self.APPLE_ID)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_lookup_is_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            email = services.search_apple_user_email(self.APPLE_ID)
+        self.assertEqual(email, "first@email.com")
+
+        with self.assertNumQueries(0):
+            email = services.search_apple_user_email(self.APPLE_ID)
+        self.assertEqual(email, "first@email.com")
+
+    def test_configured_cache_is_used(self):
+        shared = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        apple_oauth = {**settings.APPLE_OAUTH, "ID_CACHE_BACKEND": "shared"}
+        with self.settings(
+            CACHES={"default": shared, "shared": {**shared, "LOCATION": "shared"}},
+            APPLE_OAUTH=apple_oauth,
+        ):
+            services.search_apple_user_email(self.APPLE_ID)
+            key = services.apple_user_cache_key(self.APPLE_ID)
+            self.assertIsNotNone(caches["shared"].get(key))
+            self.assertIsNone(caches["default"].get(key))
+
+            AppleUser.objects.filter(email="first@email.com").get().save()
+            self.assertIsNone(caches["shared"].get(key))
+
+    def test_ambiguous_apple_id_is_rejected(self):
+        AppleUser.objects.create(email="second@email.com", apple_id=self.APPLE_ID)
+        self.assertIsNone(services.search_apple_user_email(self.APPLE_ID))
+        self.assertIsNone(services.search_apple_user_email("unknown"))
+
+    def test_changed_mapping_invalidates_cache(self):
+        services.search_apple_user_email(self.APPLE_ID)
+        services.get_email_for_apple_user("first@email.com", "000456.apple")
+
+        self.assertIsNone(services.search_apple_user_email(self.APPLE_ID))
+        self.assertEqual(
+            services.search_apple_user_email("000456.apple"), "first@email.com"
+        )
+
+    def test_unchanged_mapping_is_not_written(self):
+        services.search_apple_user_email(self.APPLE_ID)
+        with self.assertNumQueries(1):
+            email = services.get_email_for_apple_user("first@email.com", self.APPLE_ID)
+        self.assertEqual(email, "first@email.com")
@@ -1,3 +1,11 @@
+import json
+from base64 import urlsafe_b64encode
+
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.http import urlencode
 from rest_framework import status
@@ -7,8 +15,11 @@ from authentication.models import (
     AppUser,
     Profile,
     ExpiringToken,
+    PhoneNumber,
     SustainableDevelopmentGoal,
 )
+from outbox import services as outbox
+from outbox.models import OutboxMessage
 
 
 class RegistrationAPITest(APITestCase):
@@ -97,6 +108,148 @@ class RegistrationAPITest(APITestCase):
         self.assertEqual(profile.name, self.NAME)
 
 
+@override_settings(EMAIL_REGISTER_NOTIFICATION=True, MANAGERS=[("Admin", "a@b.com")])
+class BulkRegistrationAPITest(APITestCase):
+    def setUp(self):
+        self.staff = AppUser.objects.create_superuser(
+            email="staff@email.com", password="password"
+        )
+        self.token = ExpiringToken.objects.create(user=self.staff)
+        Profile.objects.create(
+            email="registered@email.com",
+            name="test",
+            is_junior_fellow=False,
+            campus="University of the World",
+            batch=2019,
+        )
+
+    def _row(self, email, **fields):
+        row = {
+            "user": {"email": email},
+            "name": "Fellow",
+            "campus": "University of the World",
+            "batch": 2021,
+            "isJuniorFellow": True,
+        }
+        row.update(fields)
+        return row
+
+    def _post(self, rows):
+        self.client.force_authenticate(user=self.staff, token=self.token)
+        return self.client.post(reverse("bulk_register"), rows, format="json")
+
+    def test_only_staff_can_register_in_bulk(self):
+        profile = Profile.objects.get(user__email="registered@email.com")
+        token = ExpiringToken.objects.get(user=profile.user)
+        self.client.force_authenticate(user=profile.user, token=token)
+        response = self.client.post(
+            reverse("bulk_register"), [self._row("a@email.com")], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(AppUser.objects.filter(email="a@email.com").exists())
+
+    def test_rows_have_their_own_results(self):
+        response = self._post(
+            [
+                self._row("a@email.com"),
+                self._row("registered@email.com"),
+                self._row("b@email.com", campus=""),
+                self._row("a@email.com"),
+                self._row("c@email.com", isJuniorFellow=False),
+            ]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["message"], "2 of 5 users created successfully")
+        results = response.data["results"]
+        self.assertEqual(
+            [result["type"] for result in results],
+            ["success", "failure", "failure", "failure", "success"],
+        )
+        self.assertIn("already exists", results[1]["errors"]["user"]["email"][0])
+        self.assertEqual(results[2]["errors"]["campus"][0].code, "blank")
+        self.assertIn("already exists", results[3]["errors"]["user"]["email"][0])
+
+        profile = Profile.objects.select_related("user").get(user__email="a@email.com")
+        self.assertEqual((profile.name, profile.batch), ("Fellow", 2021))
+        self.assertTrue(profile.is_junior_fellow)
+        self.assertFalse(profile.user.is_active)
+        self.assertFalse(
+            Profile.objects.get(user__email="c@email.com").is_junior_fellow
+        )
+
+    def _non_token_queries(self, context):
+        return [
+            query
+            for query in context.captured_queries
+            if "token" not in query["sql"].lower()
+        ]
+
+    # The second notification finds the digest already scheduled
+    @override_settings(EMAIL_REGISTER_NOTIFICATION=False)
+    def test_only_tokens_are_created_per_row(self):
+        with CaptureQueriesContext(connection) as context:
+            self._post([self._row(f"{index}@email.com") for index in range(2)])
+        with CaptureQueriesContext(connection) as more_rows:
+            self._post([self._row(f"{index}@email.com") for index in range(2, 12)])
+        self.assertEqual(
+            len(self._non_token_queries(more_rows)),
+            len(self._non_token_queries(context)),
+        )
+        for index in range(12):
+            self.assertTrue(
+                ExpiringToken.objects.filter(user__email=f"{index}@email.com").exists()
+            )
+
+    def test_managers_get_one_notification(self):
+        self._post([self._row(f"{index}@email.com") for index in range(3)])
+
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        outbox.flush("registration")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("3 New Sign-ups on Melton App", mail.outbox[0].subject)
+
+    def test_admin_upload(self):
+        self.client.force_login(self.staff)
+        upload = SimpleUploadedFile(
+            "fellows.csv",
+            b"Email,Name,Campus,Batch,Junior fellow\n"
+            b"a@email.com,Fellow,Campus,2021,yes\n"
+            b"registered@email.com,Fellow,Campus,2021,no\n",
+            content_type="text/csv",
+        )
+        response = self.client.post(
+            reverse("admin:authentication_profile_bulk_register"), {"file": upload}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(Profile.objects.get(user__email="a@email.com").is_junior_fellow)
+        results = response.context["results"]
+        self.assertEqual([result["line"] for result in results], [2, 3])
+        self.assertEqual(results[1]["type"], "failure")
+        self.assertContains(response, "User with email registered@email.com")
+
+    def test_admin_upload_with_short_rows(self):
+        self.client.force_login(self.staff)
+        upload = SimpleUploadedFile(
+            "fellows.csv",
+            b"Email,Name,Campus,Batch,Junior fellow\n"
+            b"a@email.com,Fellow,Campus,2021\n"
+            b"b@email.com,Fellow\n",
+            content_type="text/csv",
+        )
+        response = self.client.post(
+            reverse("admin:authentication_profile_bulk_register"), {"file": upload}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            Profile.objects.get(user__email="a@email.com").is_junior_fellow
+        )
+        results = response.context["results"]
+        self.assertEqual([result["type"] for result in results], ["success", "failure"])
+
+
 class RegistrationStatusAPITest(APITestCase):
     EMAIL = "test@email.com"
     ALTERNATE_EMAIL = "test@gmail.com"
@@ -323,6 +476,36 @@ class ProfileAPITest(APITestCase):
         response = self._test_update_field("sdgs", new_sdgs)
         self.assertListEqual(response.data.get("profile").get("sdgs"), new_sdgs)
 
+    def test_noop_update_query_count(self):
+        self._test_update_profile(self.data)
+        with CaptureQueriesContext(connection) as context:
+            response = self._test_update_profile(self.data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        writes = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        self.assertListEqual(writes, [])
+        self.assertLessEqual(len(context.captured_queries), 7)
+
+    def test_update_reuses_unchanged_rows(self):
+        self.data["phoneNumber"] = [
+            {"number": "1111", "countryCode": "+91"},
+            {"number": "2222", "countryCode": "+92"},
+        ]
+        self._test_update_profile(self.data)
+        first_id = PhoneNumber.objects.get(number="1111").pk
+
+        self.data["phoneNumber"] = [{"number": "1111", "countryCode": "+91"}]
+        response = self._test_update_profile(self.data)
+        self.assertListEqual(
+            response.data.get("profile").get("phoneNumber"), self.data["phoneNumber"]
+        )
+        self.assertListEqual(
+            list(PhoneNumber.objects.values_list("pk", flat=True)), [first_id]
+        )
+
     def test_cant_update_sdgs_with_more_than_three(self):
         new_sdgs = [2, 3, 4, 5]
         self.data["sdgs"] = new_sdgs
@@ -409,3 +592,35 @@ class UsersAPITest(APITestCase):
         url = self._build_url("users", get={"search": "user"})
         response = self.client.get(url)
         self.assertEqual(len(response.data), 2)
+
+    def test_list_users_paginated(self):
+        self.client.force_authenticate(user=self.user, token=self.token)
+        url = self._build_url("users", get={"page_size": 2})
+        emails = []
+        pages = []
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            emails.extend(data["user"]["email"] for data in response.data["results"])
+            pages.append(response.data)
+            url = response.data["next"]
+
+        self.assertListEqual(emails, self.EMAILS)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+
+        response = self.client.get(pages[-1]["previous"])
+        self.assertListEqual(response.data["results"], pages[-2]["results"])
+
+    def test_list_users_invalid_cursor(self):
+        self.client.force_authenticate(user=self.user, token=self.token)
+        url = self._build_url("users", get={"cursor": "not-a-cursor"})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        for position in (["twenty", 1], [{"batch": 1}, 1], [2020, None]):
+            cursor = urlsafe_b64encode(json.dumps({"p": position}).encode("ascii"))
+            url = self._build_url("users", get={"cursor": cursor.decode("ascii")})
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
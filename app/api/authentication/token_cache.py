@@ -0,0 +1,112 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class TokenCache:
+    """
+    Two-tier cache of resolved ``(user, token)`` pairs keyed by token key.
+
+    The first tier is a per-worker LRU with a TTL. If ``TOKEN_CACHE_BACKEND`` names a
+    cache alias from ``CACHES``, it is used as a second, shared tier. The TTL bounds how
+    long a change made by another worker (e.g. deactivating a user) can go unnoticed.
+    """
+
+    KEY_PREFIX = "auth-token:"
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        ttl = settings.TOKEN_SETTINGS.get("TOKEN_CACHE_TTL", timedelta(0))
+        return ttl.total_seconds()
+
+    @property
+    def max_size(self):
+        return settings.TOKEN_SETTINGS.get("TOKEN_CACHE_SIZE", 1024)
+
+    @property
+    def shared(self):
+        alias = settings.TOKEN_SETTINGS.get("TOKEN_CACHE_BACKEND", None)
+        if alias is None:
+            return None
+        return caches[alias]
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, token = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return self._copy(token)
+                del self._entries[key]
+
+        shared = self.shared
+        if shared is not None:
+            token = shared.get(self.KEY_PREFIX + key)
+            if token is not None:
+                self._store_local(key, token)
+                return self._copy(token)
+
+        return None
+
+    def set(self, token):
+        if not self.enabled:
+            return
+
+        token = self._copy(token)
+        self._store_local(token.key, token)
+        shared = self.shared
+        if shared is not None:
+            shared.set(self.KEY_PREFIX + token.key, token, timeout=self.ttl)
+
+    def update_refreshed(self, token):
+        # Keep the local copy in step with refreshes without extending its TTL
+        with self._lock:
+            entry = self._entries.get(token.key)
+            if entry is not None:
+                entry[1].refreshed = token.refreshed
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+        shared = self.shared
+        if shared is not None:
+            shared.delete(self.KEY_PREFIX + key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store_local(self, key, token):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _copy(self, token):
+        # Callers get their own instances so request code can't mutate cached state
+        user = copy.copy(token.user)
+        token = copy.copy(token)
+        token.user = user
+        return token
+
+
+token_cache = TokenCache()
@@ -4,6 +4,7 @@ from authentication import views
 
 urlpatterns = [
     path("register/", views.register, name="register"),
+    path("register/bulk/", views.bulk_register, name="bulk_register"),
     path("registration-status/", views.check_registration, name="check_registration"),
     path("profile/", views.ProfileView.as_view(), name="profile"),
     path("login/", views.login, name="login"),
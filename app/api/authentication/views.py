@@ -1,12 +1,18 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
-from rest_framework import filters
 
 from authentication import services, authentication
 from authentication.models import Profile
+from authentication.pagination import UsersPagination
 from authentication.serializers import ProfileListSerializer, ProfileRetrieveSerializer
+from search.filters import FullTextSearchFilter
 
 
 @api_view(["POST"])
@@ -15,6 +21,14 @@ def register(request):
     return Response(response, status=status)
 
 
+@api_view(["POST"])
+@authentication_classes([authentication.ExpiringTokenAuthentication])
+@permission_classes([IsAdminUser])
+def bulk_register(request):
+    response, status = services.bulk_register_users(request)
+    return Response(response, status=status)
+
+
 @api_view(["GET"])
 def check_registration(request):
     response, status = services.check_registration(
@@ -44,9 +58,16 @@ class ProfileView(APIView):
 class UsersView(ReadOnlyModelViewSet):
     authentication_classes = [authentication.ExpiringTokenAuthentication]
     search_fields = ["name", "user__email"]
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (FullTextSearchFilter,)
+    pagination_class = UsersPagination
     queryset = Profile.objects.filter(user__is_active=True)
 
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related("user")
+        if self.action == "list":
+            return queryset.prefetch_related("sdgs")
+        return queryset.prefetch_related("sdgs", "phone_number", "social_media_account")
+
     def get_serializer_class(self):
         if self.action == "list":
             return ProfileListSerializer
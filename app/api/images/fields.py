@@ -0,0 +1,31 @@
+from rest_framework import serializers
+
+from images import services
+
+
+class ImageVariantField(serializers.Field):
+    """
+    Read-only field exposing resized variants of an image field, either as the URL
+    of its thumbnail (``kind="thumbnail"``) or as a WebP ``srcset`` (``kind="srcset"``).
+    """
+
+    def __init__(self, image_field, kind="thumbnail", **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+        self.image_field = image_field
+        self.kind = kind
+
+    def to_representation(self, instance):
+        if self.kind == "srcset":
+            urls = services.variant_urls(instance, self.image_field)
+            srcset = ", ".join(f"{self._absolute(url)} {width}w" for width, url in urls)
+            return srcset or None
+        url = services.thumbnail_url(instance, self.image_field)
+        return self._absolute(url) if url is not None else None
+
+    def _absolute(self, url):
+        request = self.context.get("request")
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -0,0 +1,8 @@
+from jobs.services import register
+
+from images import services
+
+
+@register(services.GENERATE_JOB)
+def generate_variants(model, pk, field):
+    services.generate_queued_variants(model, pk, field)
@@ -0,0 +1,134 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models.fields.files import ImageFieldFile
+
+from api.storage_backends import MediaStorage
+from authentication.models import AppUser, Profile, SustainableDevelopmentGoal
+from authentication.serializers import ProfileListSerializer
+from posts.models import Post, Tag
+from posts.serializers import PostListSerializer
+from store.models import StoreItem
+from store.serializers import StoreItemReadSerializer
+
+
+class Command(BaseCommand):
+    """
+    A django management command to measure the time spent serializing media URLs
+    It serializes in-memory profiles, posts and store items, with and without the
+    URL cache of the media storage, without touching the database or S3
+
+    Inheritance:
+        BaseCommand:
+
+    """
+
+    help = "Benchmark serialization of the profile, post and store item lists with and without the media URL cache. Use --signed to sign URLs with query string auth instead of using the custom domain"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=2000, help="Number of objects per list"
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of times each list is serialized",
+        )
+        parser.add_argument(
+            "--signed",
+            action="store_true",
+            help="Sign URLs with query string auth instead of the custom domain",
+        )
+
+    def handle(self, *args, **options):
+        rows = options.get("rows")
+        repeat = max(options.get("repeat"), 1)
+        storage_settings = {}
+        if options.get("signed"):
+            storage_settings = {"custom_domain": None, "querystring_auth": True}
+        storages = {
+            "uncached": MediaStorage(url_cache_timeout=None, **storage_settings),
+            "cached": MediaStorage(**storage_settings),
+        }
+
+        for label, serializer_class, build in (
+            ("profiles", ProfileListSerializer, self.build_profile),
+            ("posts", PostListSerializer, self.build_post),
+            ("store items", StoreItemReadSerializer, self.build_store_item),
+        ):
+            timings = {}
+            for mode, storage in storages.items():
+                instances = [build(index, storage) for index in range(rows)]
+                times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    serializer_class(instances, many=True).data
+                    times.append(time.perf_counter() - start)
+                timings[mode] = times
+
+            # The first cached run fills the cache, later ones show its effect
+            uncached, cached = (
+                min(timings[mode][1:] or timings[mode])
+                for mode in ("uncached", "cached")
+            )
+            self.stdout.write(
+                f"{label}: {rows} rows, best uncached {uncached * 1000:.1f}ms, "
+                f"cached {cached * 1000:.1f}ms "
+                f"(first {timings['cached'][0] * 1000:.1f}ms), "
+                f"{uncached / cached:.1f}x"
+            )
+
+        metrics = storages["cached"].url_metrics
+        self.stdout.write(
+            f"SUCCESS: URL cache hits {metrics['hits']}, misses {metrics['misses']}"
+        )
+
+    def image(self, instance, field_name, name, storage):
+        # Point the field at the benchmarked storage instead of the default one
+        field = instance._meta.get_field(field_name)
+        image = ImageFieldFile(instance, field, name)
+        image.storage = storage
+        setattr(instance, field_name, image)
+        setattr(
+            instance,
+            f"{field_name}_variants",
+            {
+                "source": name,
+                "files": {
+                    f"{width}.{image_format}": f"{name}_w{width}.{image_format}"
+                    for width in (96, 320, 640)
+                    for image_format in ("webp", "jpeg")
+                },
+            },
+        )
+
+    def prefetched(self, instance, **related):
+        # Related managers read prefetched rows instead of querying
+        instance._prefetched_objects_cache = related
+        return instance
+
+    def build_profile(self, index, storage):
+        profile = Profile(
+            user=AppUser(id=index + 1, email=f"fellow{index}@email.com"),
+            name=f"Fellow {index}",
+            is_junior_fellow=False,
+            campus="Campus",
+            batch=2020,
+        )
+        self.image(profile, "picture", f"profile-pics/{index}.jpg", storage)
+        return self.prefetched(
+            profile,
+            sdgs=SustainableDevelopmentGoal.objects.none(),
+        )
+
+    def build_post(self, index, storage):
+        post = Post(id=index + 1, title=f"Post {index}", description="-")
+        self.image(post, "preview", f"post-previews/{index}.jpg", storage)
+        return self.prefetched(post, tags=Tag.objects.none())
+
+    def build_store_item(self, index, storage):
+        item = StoreItem(id=index + 1, name=f"Item {index}", description="-", points=1)
+        item.is_purchased = False
+        self.image(item, "preview_image", f"store-items/{index}.jpg", storage)
+        return item
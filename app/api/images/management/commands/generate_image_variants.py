@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from images import services
+
+
+class Command(BaseCommand):
+    """
+    A django management command to generate resized variants of uploaded images
+    Images are downloaded, resized and uploaded by a pool of threads while the main
+    thread records the results
+
+    Inheritance:
+        BaseCommand:
+
+    """
+
+    help = "Generate resized variants of profile pictures, post previews and store item images. By default only images without up to date variants are processed, use --all to process every image"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Regenerate existing variants too"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Number of images processed at a time",
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        images = variants = failed = 0
+        with ThreadPoolExecutor(max_workers=max(options.get("workers"), 1)) as pool:
+            for label, field_name in services.IMAGE_FIELDS:
+                instances = [
+                    instance
+                    for instance in apps.get_model(label)
+                    .objects.exclude(**{field_name: ""})
+                    .iterator()
+                    if options.get("all")
+                    or services.needs_variants(instance, field_name)
+                ]
+                builds = pool.map(
+                    lambda instance: self.build(instance, field_name), instances
+                )
+                for instance, built in zip(instances, builds):
+                    if built is None:
+                        failed += 1
+                        continue
+                    images += 1
+                    variants += services.save_variants(instance, field_name, built)
+
+        elapsed = time.monotonic() - start
+        if failed:
+            self.stderr.write(f"ERROR: Variants of {failed} images failed")
+        self.stdout.write(
+            f"SUCCESS: {variants} variants of {images} images have been stored "
+            f"in {elapsed:.2f}s"
+        )
+
+    def build(self, instance, field_name):
+        try:
+            # Images are already processed in parallel
+            return services.build_variants(instance, field_name, workers=1)
+        except Exception as error:
+            name = getattr(instance, field_name).name
+            self.stderr.write(f"ERROR: Image {name} failed: {error}. Continuing...")
+            return None
@@ -0,0 +1,188 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+from jobs import services as jobs
+
+GENERATE_JOB = "images.generate_variants"
+
+# Image fields with resized variants, stored in a ``<field>_variants`` JSON field
+IMAGE_FIELDS = [
+    ("authentication.Profile", "picture"),
+    ("posts.Post", "preview"),
+    ("store.StoreItem", "preview_image"),
+]
+
+FORMATS = {"jpeg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+
+# Sent with the instance and field name once new variants are stored
+variants_generated = Signal()
+
+
+def variants_field(field_name):
+    return f"{field_name}_variants"
+
+
+def get_variants(instance, field_name):
+    return getattr(instance, variants_field(field_name)) or {}
+
+
+def needs_variants(instance, field_name):
+    """Whether the image of ``field_name`` changed since its variants were made."""
+    image = getattr(instance, field_name)
+    return (image.name or "") != get_variants(instance, field_name).get("source", "")
+
+
+def queue_variants(instance, field_name):
+    label = instance._meta.label
+    jobs.enqueue(
+        GENERATE_JOB,
+        {"model": label, "pk": instance.pk, "field": field_name},
+        dedupe_key=f"{GENERATE_JOB}:{label}:{instance.pk}:{field_name}",
+    )
+
+
+def variant_name(name, width, image_format):
+    """Variants are stored next to the original, e.g. ``a.png`` -> ``a_w320.webp``."""
+    root, _ = os.path.splitext(name)
+    return f"{root}_w{width}{FORMATS[image_format][1]}"
+
+
+def render_variant(image, width, image_format):
+    resized = image.copy()
+    resized.thumbnail((width, width * 10), Image.LANCZOS)
+    if image_format == "jpeg" and resized.mode != "RGB":
+        background = Image.new("RGB", resized.size, (255, 255, 255))
+        if resized.mode in ("RGBA", "LA", "P"):
+            resized = resized.convert("RGBA")
+            background.paste(resized, mask=resized.split()[-1])
+        else:
+            background.paste(resized.convert("RGB"))
+        resized = background
+    elif image_format == "webp" and resized.mode not in ("RGB", "RGBA"):
+        resized = resized.convert("RGBA")
+
+    output = io.BytesIO()
+    resized.save(
+        output,
+        FORMATS[image_format][0],
+        quality=settings.IMAGE_VARIANTS.get("QUALITY", 80),
+        optimize=image_format == "jpeg",
+    )
+    return output.getvalue()
+
+
+def generate_variants(instance, field_name, workers=None):
+    """
+    Resize the image of ``field_name`` to every configured width smaller than it, in
+    every format, and store the variants next to it. Returns the number stored.
+    """
+    variants = build_variants(instance, field_name, workers)
+    return save_variants(instance, field_name, variants)
+
+
+def build_variants(instance, field_name, workers=None):
+    """
+    Render and upload the variants of an image without touching the database.
+    Resizing and uploads run in a pool of ``workers`` threads.
+    """
+    image_file = getattr(instance, field_name)
+    variants = {"source": image_file.name or "", "files": {}}
+    if not image_file.name:
+        return variants
+
+    storage = image_file.storage
+    with storage.open(image_file.name, "rb") as file:
+        image = Image.open(file)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    options = settings.IMAGE_VARIANTS
+    tasks = [
+        (width, image_format)
+        for width in sorted(options["WIDTHS"])
+        if width < image.width
+        for image_format in options["FORMATS"]
+    ]
+
+    def store(task):
+        width, image_format = task
+        data = render_variant(image, width, image_format)
+        name = variant_name(image_file.name, width, image_format)
+        return f"{width}.{image_format}", storage.save(name, ContentFile(data))
+
+    with ThreadPoolExecutor(max_workers=workers or options.get("WORKERS", 4)) as pool:
+        variants["files"] = dict(pool.map(store, tasks))
+    return variants
+
+
+def save_variants(instance, field_name, variants):
+    """Record built variants and delete the ones they replace."""
+    storage = getattr(instance, field_name).storage
+    previous = get_variants(instance, field_name)
+    # Only keep the variants if the image wasn't replaced in the meantime
+    updated = (
+        type(instance)
+        .objects.filter(pk=instance.pk, **{field_name: variants["source"]})
+        .update(**{variants_field(field_name): variants})
+    )
+    created = set(variants["files"].values())
+    if updated:
+        setattr(instance, variants_field(field_name), variants)
+        variants_generated.send(
+            sender=type(instance), instance=instance, field_name=field_name
+        )
+        stale = set(previous.get("files", {}).values()) - created
+    else:
+        # The new image gets its own variants
+        stale = created
+    for name in stale:
+        storage.delete(name)
+    return len(created) if updated else 0
+
+
+def generate_queued_variants(model, pk, field):
+    instance = apps.get_model(model).objects.filter(pk=pk).first()
+    if instance is not None and needs_variants(instance, field):
+        generate_variants(instance, field)
+
+
+def variant_url(instance, field_name, width, image_format):
+    name = (
+        get_variants(instance, field_name)
+        .get("files", {})
+        .get(f"{width}.{image_format}")
+    )
+    if name is None:
+        return None
+    return getattr(instance, field_name).storage.url(name)
+
+
+def thumbnail_url(instance, field_name):
+    """
+    URL of the JPEG variant of ``THUMBNAIL_WIDTH``, or of the original image if it
+    is small or has no variants yet.
+    """
+    image = getattr(instance, field_name)
+    if not image:
+        return None
+    width = settings.IMAGE_VARIANTS.get("THUMBNAIL_WIDTH")
+    return variant_url(instance, field_name, width, "jpeg") or image.url
+
+
+def variant_urls(instance, field_name, image_format="webp"):
+    """``(width, url)`` of the variants of one format, narrowest first."""
+    files = get_variants(instance, field_name).get("files", {})
+    storage = getattr(instance, field_name).storage
+    urls = []
+    for key, name in files.items():
+        width, variant_format = key.split(".")
+        if variant_format == image_format:
+            urls.append((int(width), storage.url(name)))
+    return sorted(urls)
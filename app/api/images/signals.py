@@ -0,0 +1,22 @@
+from django.apps import apps
+from django.db.models.signals import post_save
+
+from images import services
+
+
+def queue_changed_images(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for label, field_name in services.IMAGE_FIELDS:
+        if sender._meta.label == label and services.needs_variants(
+            instance, field_name
+        ):
+            services.queue_variants(instance, field_name)
+
+
+for label, _ in services.IMAGE_FIELDS:
+    post_save.connect(
+        queue_changed_images,
+        sender=apps.get_model(label),
+        dispatch_uid=f"images-{label}",
+    )
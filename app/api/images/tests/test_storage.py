@@ -0,0 +1,74 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from api.storage_backends import CachedUrlMixin, MediaStorage
+
+
+class CountingStorage(CachedUrlMixin, FileSystemStorage):
+    url_cache_timeout = timedelta(minutes=10)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, base_url="/media/", **kwargs)
+        self.built = 0
+
+
+class CachedUrlTest(SimpleTestCase):
+    def setUp(self):
+        self.storage = CountingStorage()
+        original = FileSystemStorage.url
+
+        def build(storage, name):
+            storage.built += 1
+            return original(storage, name)
+
+        patcher = mock.patch.object(FileSystemStorage, "url", build)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_urls_are_built_once_per_bucket(self):
+        with mock.patch("api.storage_backends.time.time", return_value=0):
+            for _ in range(3):
+                self.assertEqual(self.storage.url("a.jpg"), "/media/a.jpg")
+            self.storage.url("b.jpg")
+        self.assertEqual(self.storage.built, 2)
+        self.assertEqual(self.storage.url_metrics, {"hits": 2, "misses": 2})
+
+        # The next bucket builds the URLs again
+        with mock.patch("api.storage_backends.time.time", return_value=600):
+            self.storage.url("a.jpg")
+        self.assertEqual(self.storage.built, 3)
+        self.assertEqual(len(self.storage._urls), 1)
+
+    def test_storages_opt_in(self):
+        self.storage.url_cache_timeout = None
+        self.storage.url("a.jpg")
+        self.storage.url("a.jpg")
+        self.assertEqual(self.storage.built, 2)
+
+    def test_cache_size_is_bounded(self):
+        self.storage.url_cache_size = 2
+        for name in ("a.jpg", "b.jpg", "c.jpg"):
+            self.storage.url(name)
+        self.assertEqual(list(self.storage._urls), [("c.jpg", mock.ANY)])
+
+
+class MediaStorageTest(SimpleTestCase):
+    def test_cache_must_expire_before_signatures(self):
+        with self.assertRaises(ImproperlyConfigured):
+            MediaStorage(
+                custom_domain=None, querystring_auth=True, querystring_expire=300
+            )
+        # Unsigned URLs don't expire
+        MediaStorage(querystring_expire=300)
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command("benchmark_media_urls", rows=5, repeat=2, stdout=out)
+        self.assertIn("store items: 5 rows", out.getvalue())
+        self.assertIn("SUCCESS: URL cache hits 75, misses 75", out.getvalue())
@@ -0,0 +1,185 @@
+import io
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from images import services
+from jobs.models import Job
+from posts.cache import post_cache
+from posts.models import Post
+from posts.serializers import PostSerializer
+
+IMAGE_VARIANTS = {
+    "WIDTHS": [96, 320, 640],
+    "FORMATS": ["webp", "jpeg"],
+    "THUMBNAIL_WIDTH": 320,
+    "QUALITY": 80,
+    "WORKERS": 2,
+}
+
+
+def image_file(width=800, height=600, image_format="PNG", mode="RGBA"):
+    output = io.BytesIO()
+    Image.new(mode, (width, height), (200, 10, 10, 128)[: len(mode)]).save(
+        output, image_format
+    )
+    return ContentFile(output.getvalue())
+
+
+@override_settings(IMAGE_VARIANTS=IMAGE_VARIANTS)
+class ImageVariantsTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        storage_settings = override_settings(
+            DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+            MEDIA_ROOT=self.media_root,
+            MEDIA_URL="/media/",
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def _post(self, **kwargs):
+        post = Post(title="Title", content="Content")
+        post.preview.save("preview.png", image_file(**kwargs), save=False)
+        post.save()
+        return post
+
+    def test_uploads_queue_one_job(self):
+        post = self._post()
+        post.title = "Other"
+        post.save()
+
+        jobs = Job.objects.filter(name=services.GENERATE_JOB)
+        self.assertEqual(jobs.count(), 1)
+        self.assertEqual(
+            jobs.get().payload,
+            {"model": "posts.Post", "pk": post.pk, "field": "preview"},
+        )
+
+        # Posts without a preview need no variants
+        Post.objects.create(title="Text", content="Content")
+        self.assertEqual(jobs.count(), 1)
+
+    def test_variants_are_generated_next_to_the_original(self):
+        post = self._post()
+        self.assertEqual(services.generate_variants(post, "preview"), 6)
+
+        post.refresh_from_db()
+        variants = post.preview_variants
+        self.assertEqual(variants["source"], post.preview.name)
+        self.assertEqual(
+            set(variants["files"]),
+            {f"{w}.{f}" for w in (96, 320, 640) for f in ("webp", "jpeg")},
+        )
+        name = variants["files"]["320.jpeg"]
+        self.assertTrue(name.startswith(post.preview.name[: -len(".png")]))
+        with post.preview.storage.open(name) as file:
+            image = Image.open(file)
+            self.assertEqual(image.size, (320, 240))
+            self.assertEqual(image.format, "JPEG")
+        self.assertFalse(services.needs_variants(post, "preview"))
+
+    def test_saved_variants_keep_post_updated(self):
+        post = self._post()
+        updated = Post.objects.get(pk=post.pk).updated
+        generation = post_cache.generation(post.pk)
+
+        services.generate_variants(post, "preview")
+
+        self.assertEqual(Post.objects.get(pk=post.pk).updated, updated)
+        # The cached post and its ETag still change with the new variants
+        self.assertNotEqual(post_cache.generation(post.pk), generation)
+
+    def test_small_images_are_not_enlarged(self):
+        post = self._post(width=200, height=100)
+        services.generate_variants(post, "preview")
+
+        post.refresh_from_db()
+        self.assertEqual(set(post.preview_variants["files"]), {"96.webp", "96.jpeg"})
+        # The original is small enough to be the thumbnail
+        self.assertEqual(services.thumbnail_url(post, "preview"), post.preview.url)
+
+    def test_replaced_images_drop_stale_variants(self):
+        post = self._post()
+        services.generate_variants(post, "preview")
+        storage = post.preview.storage
+        old_files = list(post.preview_variants["files"].values())
+
+        post.preview.save("new.jpg", image_file(400, 400, "JPEG", "RGB"))
+        self.assertTrue(services.needs_variants(post, "preview"))
+        services.generate_variants(post, "preview")
+
+        self.assertFalse(any(storage.exists(name) for name in old_files))
+        post.refresh_from_db()
+        self.assertEqual(
+            set(post.preview_variants["files"]),
+            {"96.webp", "96.jpeg", "320.webp", "320.jpeg"},
+        )
+
+    def test_variants_of_a_replaced_image_are_discarded(self):
+        post = self._post()
+        stale = Post.objects.get(pk=post.pk)
+        post.preview.save("new.png", image_file())
+
+        self.assertEqual(services.generate_variants(stale, "preview"), 0)
+        post.refresh_from_db()
+        self.assertEqual(post.preview_variants, {})
+        self.assertEqual(
+            sorted(post.preview.storage.listdir("post-previews")[1]),
+            sorted(["preview.png", "new.png"]),
+        )
+
+    def test_queued_job_generates_variants(self):
+        from jobs.services import run_pending
+
+        post = self._post()
+        self.assertEqual(run_pending(), 1)
+
+        post.refresh_from_db()
+        self.assertEqual(len(post.preview_variants["files"]), 6)
+
+    def test_serializer_exposes_thumbnail_and_srcset(self):
+        post = self._post()
+        request = Request(APIRequestFactory().get(reverse("posts")))
+        data = PostSerializer(post, context={"request": request}).data
+        self.assertEqual(data["preview_thumb"], data["preview"])
+        self.assertIsNone(data["preview_srcset"])
+
+        services.generate_variants(post, "preview")
+        post.refresh_from_db()
+        data = PostSerializer(post, context={"request": request}).data
+        files = post.preview_variants["files"]
+        self.assertEqual(
+            data["preview_thumb"], f"http://testserver/media/{files['320.jpeg']}"
+        )
+        self.assertEqual(
+            data["preview_srcset"],
+            ", ".join(
+                f"http://testserver/media/{files[f'{width}.webp']} {width}w"
+                for width in (96, 320, 640)
+            ),
+        )
+
+    def test_command_backfills_missing_variants(self):
+        posts = [self._post() for _ in range(3)]
+        services.generate_variants(posts[0], "preview")
+
+        out = StringIO()
+        call_command("generate_image_variants", workers=2, stdout=out)
+        self.assertIn("SUCCESS: 12 variants of 2 images", out.getvalue())
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(len(post.preview_variants["files"]), 6)
+
+        out = StringIO()
+        call_command("generate_image_variants", stdout=out)
+        self.assertIn("SUCCESS: 0 variants of 0 images", out.getvalue())
@@ -0,0 +1,35 @@
+from django.contrib import admin, messages
+from django.db import IntegrityError, transaction
+from jobs.models import Job, JobStatus
+
+
+class JobAdmin(admin.ModelAdmin):
+    model = Job
+    list_display = ("name", "status", "attempts", "run_after", "updated")
+    list_filter = ("status", "name")
+    readonly_fields = ("attempts", "locked_at", "last_error", "created", "updated")
+    actions = ["retry_jobs"]
+
+    def retry_jobs(self, request, queryset):
+        count = duplicates = 0
+        for job in queryset.filter(status=JobStatus.FAILED):
+            try:
+                with transaction.atomic():
+                    count += Job.objects.filter(
+                        pk=job.pk, status=JobStatus.FAILED
+                    ).update(status=JobStatus.PENDING, attempts=0)
+            except IntegrityError:
+                # An identical job is already queued or running
+                duplicates += 1
+        self.message_user(request, f"{count} jobs queued again.")
+        if duplicates:
+            self.message_user(
+                request,
+                f"{duplicates} jobs were not queued again, an identical job is already queued or running.",
+                messages.WARNING,
+            )
+
+    retry_jobs.short_description = "Retry failed jobs"
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs import services
+
+
+class Command(BaseCommand):
+    """
+    A django management command to run queued background jobs
+    It polls the job table until stopped, or until the queue is empty with --once
+
+    Inheritance:
+        BaseCommand:
+
+    """
+
+    help = "Run queued background jobs. Use --once to stop when no job is due"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Stop when there are no due jobs"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.JOBS.get("BATCH_SIZE", 10),
+            help="Number of jobs to claim at a time",
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = settings.JOBS.get("POLL_INTERVAL").total_seconds()
+        total = 0
+        try:
+            while True:
+                count = services.run_pending(options.get("batch_size"))
+                total += count
+                if count == 0:
+                    if options.get("once"):
+                        break
+                    time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"SUCCESS: {total} jobs have been run")
@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+class JobStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    RUNNING = "RUNNING", "Running"
+    DONE = "DONE", "Done"
+    FAILED = "FAILED", "Failed"
+
+
+ACTIVE_STATUSES = [JobStatus.PENDING, JobStatus.RUNNING]
+
+
+class JobManager(models.Manager):
+    def enqueue(
+        self, name, payload=None, dedupe_key=None, max_attempts=None, run_after=None
+    ):
+        """
+        Queue a job for the worker, to run no earlier than ``run_after``. While a job
+        with the same ``dedupe_key`` is pending or running, that job is returned
+        instead of queueing another one.
+        """
+        if max_attempts is None:
+            max_attempts = settings.JOBS.get("MAX_ATTEMPTS", 5)
+        job = Job(
+            name=name,
+            payload=payload or {},
+            dedupe_key=dedupe_key,
+            max_attempts=max_attempts,
+            run_after=run_after or timezone.now(),
+        )
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            if dedupe_key is None:
+                raise
+            existing = self.filter(
+                dedupe_key=dedupe_key, status__in=ACTIVE_STATUSES
+            ).first()
+            if existing is None:
+                # It finished in the meantime
+                return self.enqueue(name, payload, dedupe_key, max_attempts, run_after)
+            return existing
+        return job
+
+    def claim(self, limit):
+        """
+        Mark up to ``limit`` due jobs as running and return them. Each job is claimed
+        with a conditional update, so concurrent workers never get the same job.
+        """
+        now = timezone.now()
+        candidates = self.filter(
+            status=JobStatus.PENDING, run_after__lte=now
+        ).values_list("pk", flat=True)[:limit]
+
+        claimed = []
+        for pk in candidates:
+            if self.filter(pk=pk, status=JobStatus.PENDING).update(
+                status=JobStatus.RUNNING, locked_at=now
+            ):
+                claimed.append(pk)
+        return list(self.filter(pk__in=claimed).order_by("run_after", "pk"))
+
+    def requeue_stale(self):
+        """
+        Put back jobs whose worker died while running them. The crashed run counts
+        as an attempt, so a job that keeps killing its worker ends up failed.
+        """
+        lock_timeout = settings.JOBS.get("LOCK_TIMEOUT")
+        stale = self.filter(
+            status=JobStatus.RUNNING, locked_at__lt=timezone.now() - lock_timeout
+        )
+        stale.filter(attempts__gte=F("max_attempts") - 1).update(
+            status=JobStatus.FAILED,
+            attempts=F("attempts") + 1,
+            locked_at=None,
+            last_error="The worker running the job stopped before it finished.",
+        )
+        return stale.update(
+            status=JobStatus.PENDING, attempts=F("attempts") + 1, locked_at=None
+        )
+
+
+class Job(models.Model):
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    dedupe_key = models.CharField(max_length=200, blank=True, null=True)
+    status = models.CharField(
+        max_length=10, choices=JobStatus.choices, default=JobStatus.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = JobManager()
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"], name="job_due_idx")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                condition=Q(status__in=ACTIVE_STATUSES),
+                name="unique_active_job",
+            )
+        ]
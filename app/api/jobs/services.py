@@ -0,0 +1,67 @@
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.models import Job, JobStatus
+
+_handlers = {}
+
+
+def register(name):
+    """Register the decorated function as the handler of jobs called ``name``."""
+
+    def decorator(handler):
+        _handlers[name] = handler
+        return handler
+
+    return decorator
+
+
+def enqueue(name, payload=None, dedupe_key=None, max_attempts=None, run_after=None):
+    if name not in _handlers:
+        raise ValueError(f"No handler is registered for job {name}")
+    return Job.objects.enqueue(name, payload, dedupe_key, max_attempts, run_after)
+
+
+def run_pending(limit=None):
+    """Run the jobs that are due and return how many were run."""
+    if limit is None:
+        limit = settings.JOBS.get("BATCH_SIZE", 10)
+    Job.objects.requeue_stale()
+    jobs = Job.objects.claim(limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
+
+
+def run_job(job):
+    job.attempts += 1
+    try:
+        handler = _handlers[job.name]
+        handler(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = JobStatus.FAILED
+        else:
+            job.status = JobStatus.PENDING
+            job.run_after = timezone.now() + _retry_delay(job.attempts)
+    else:
+        job.status = JobStatus.DONE
+        job.last_error = ""
+    job.locked_at = None
+    job.save(
+        update_fields=[
+            "attempts",
+            "status",
+            "run_after",
+            "locked_at",
+            "last_error",
+            "updated",
+        ]
+    )
+
+
+def _retry_delay(attempts):
+    return settings.JOBS.get("RETRY_BACKOFF") * 2 ** (attempts - 1)
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs import services
+from jobs.models import Job, JobStatus
+
+calls = []
+
+
+@services.register("tests.record")
+def record(value, fail_times=0):
+    calls.append(value)
+    if calls.count(value) <= fail_times:
+        raise RuntimeError("Provider unavailable")
+
+
+JOBS = {
+    "MAX_ATTEMPTS": 3,
+    "RETRY_BACKOFF": timedelta(seconds=30),
+    "LOCK_TIMEOUT": timedelta(minutes=10),
+    "POLL_INTERVAL": timedelta(seconds=1),
+    "BATCH_SIZE": 10,
+}
+
+
+@override_settings(JOBS=JOBS)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def _make_due(self):
+        Job.objects.update(run_after=timezone.now())
+
+    def test_jobs_are_run_once(self):
+        job = services.enqueue("tests.record", {"value": 1})
+
+        self.assertEqual(services.run_pending(), 1)
+        self.assertEqual(services.run_pending(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(calls, [1])
+
+    def test_active_jobs_are_deduplicated(self):
+        first = services.enqueue("tests.record", {"value": 1}, dedupe_key="a")
+        second = services.enqueue("tests.record", {"value": 2}, dedupe_key="a")
+        other = services.enqueue("tests.record", {"value": 3}, dedupe_key="b")
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertNotEqual(first.pk, other.pk)
+        services.run_pending()
+        self.assertEqual(sorted(calls), [1, 3])
+
+        # Once done, the key can be queued again
+        third = services.enqueue("tests.record", {"value": 4}, dedupe_key="a")
+        self.assertNotEqual(first.pk, third.pk)
+
+    def test_failed_jobs_are_retried_with_backoff(self):
+        job = services.enqueue("tests.record", {"value": 1, "fail_times": 1})
+
+        services.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("Provider unavailable", job.last_error)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(services.run_pending(), 0)
+
+        self._make_due()
+        services.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(calls, [1, 1])
+
+    def test_jobs_fail_after_max_attempts(self):
+        job = services.enqueue("tests.record", {"value": 1, "fail_times": 5})
+        for _ in range(3):
+            self._make_due()
+            services.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self._make_due()
+        self.assertEqual(services.run_pending(), 0)
+
+    def test_jobs_of_dead_workers_are_requeued(self):
+        job = services.enqueue("tests.record", {"value": 1})
+        Job.objects.claim(10)
+        self.assertEqual(services.run_pending(), 0)
+
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(services.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(job.attempts, 2)
+
+    def test_jobs_crashing_their_worker_fail(self):
+        job = services.enqueue("tests.record", {"value": 1})
+        for _ in range(3):
+            Job.objects.claim(10)
+            Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+            Job.objects.requeue_stale()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(services.run_pending(), 0)
+
+    def test_unknown_jobs_are_rejected(self):
+        with self.assertRaises(ValueError):
+            services.enqueue("tests.unknown")
+
+    def test_run_jobs_command(self):
+        for value in range(3):
+            services.enqueue("tests.record", {"value": value})
+        out = StringIO()
+        call_command("run_jobs", "--once", "--batch-size", "2", stdout=out)
+
+        self.assertIn("3 jobs have been run", out.getvalue())
+        self.assertEqual(sorted(calls), [0, 1, 2])
+
+    def test_admin_retry_skips_active_duplicates(self):
+        failed = services.enqueue("tests.record", {"value": 1}, dedupe_key="a")
+        other = services.enqueue("tests.record", {"value": 2}, dedupe_key="b")
+        Job.objects.update(status=JobStatus.FAILED)
+        active = services.enqueue("tests.record", {"value": 3}, dedupe_key="a")
+
+        admin = get_user_model().objects.create_superuser("admin@email.com", "admin")
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse("admin:jobs_job_changelist"),
+            {"action": "retry_jobs", "_selected_action": [failed.pk, other.pk]},
+            follow=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "1 jobs queued again.")
+        self.assertContains(response, "1 jobs were not queued again")
+        failed.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(failed.status, JobStatus.FAILED)
+        self.assertEqual(other.status, JobStatus.PENDING)
+        self.assertNotEqual(active.pk, failed.pk)
@@ -0,0 +1,12 @@
+from django.contrib import admin
+from outbox.models import OutboxMessage
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    model = OutboxMessage
+    list_display = ("kind", "status", "attempts", "created", "sent_at")
+    list_filter = ("status", "kind")
+    readonly_fields = ("batch", "claimed_at", "last_error", "created", "sent_at")
+
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
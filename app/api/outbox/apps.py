@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class OutboxConfig(AppConfig):
+    name = "outbox"
+
+    def ready(self):
+        # Digest renderers live in a ``notifications`` module of each app
+        autodiscover_modules("notifications")
@@ -0,0 +1,8 @@
+from jobs.services import register
+
+from outbox import services
+
+
+@register(services.FLUSH_JOB)
+def flush(kind):
+    services.flush(kind)
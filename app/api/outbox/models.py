@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class MessageStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    SENDING = "SENDING", "Sending"
+    SENT = "SENT", "Sent"
+    FAILED = "FAILED", "Failed"
+
+
+class OutboxMessage(models.Model):
+    """
+    A notification waiting to be mailed. Pending messages of the same kind are
+    sent together as one digest email.
+    """
+
+    kind = models.CharField(max_length=50)
+    context = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=10, choices=MessageStatus.choices, default=MessageStatus.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    batch = models.UUIDField(blank=True, null=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.kind} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "status"], name="outbox_kind_status_idx")
+        ]
@@ -0,0 +1,138 @@
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+
+from jobs import services as jobs
+from outbox.models import MessageStatus, OutboxMessage
+
+FLUSH_JOB = "outbox.flush"
+
+_digests = {}
+
+
+def digest(kind):
+    """
+    Register the decorated function as the renderer of ``kind`` messages. It is
+    given the contexts of the messages going into one email and returns the
+    subject and HTML body of that email.
+    """
+
+    def decorator(render):
+        _digests[kind] = render
+        return render
+
+    return decorator
+
+
+def queue(kind, context):
+    """
+    Store a message and schedule the digest it belongs to. Messages queued within
+    the same ``DIGEST_WINDOW`` are sent together when the window closes.
+    """
+    if kind not in _digests:
+        raise ValueError(f"No digest is registered for {kind} messages")
+    message = OutboxMessage.objects.create(kind=kind, context=context)
+
+    window = settings.OUTBOX.get("DIGEST_WINDOW").total_seconds()
+    now = timezone.now().timestamp()
+    window_end = (now // window + 1) * window
+    jobs.enqueue(
+        FLUSH_JOB,
+        {"kind": kind},
+        dedupe_key=f"{FLUSH_JOB}:{kind}:{window_end:.0f}",
+        max_attempts=settings.OUTBOX.get("MAX_ATTEMPTS", 5),
+        run_after=datetime.fromtimestamp(window_end, timezone.utc),
+    )
+    return message
+
+
+def flush(kind):
+    """
+    Send the pending messages of ``kind`` as digests of up to ``BATCH_SIZE``
+    messages each, all over one SMTP connection. Digests that can't be sent stay
+    pending, and an error is raised so the flush is retried with backoff.
+    """
+    _release_stale_claims()
+    batch = _claim(kind)
+    messages = list(
+        OutboxMessage.objects.filter(batch=batch, status=MessageStatus.SENDING)
+        .order_by("pk")
+        .only("pk", "context", "attempts")
+    )
+    if not messages:
+        return 0
+
+    render = _digests[kind]
+    size = settings.OUTBOX.get("BATCH_SIZE", 50)
+    recipients = [manager[1] for manager in settings.MANAGERS]
+    connection = get_connection()
+    failures = []
+    sent = 0
+    start = 0
+    try:
+        # Opening the connection can stall or fail just like a send
+        connection.open()
+        for start in range(0, len(messages), size):
+            chunk = messages[start : start + size]
+            try:
+                subject, html = render([message.context for message in chunk])
+                email = EmailMultiAlternatives(
+                    subject=f"{settings.EMAIL_SUBJECT_PREFIX}{subject}",
+                    body="",
+                    from_email=settings.SERVER_EMAIL,
+                    to=recipients,
+                    connection=connection,
+                )
+                email.attach_alternative(html, "text/html")
+                email.send()
+            except Exception as error:
+                failures.append(error)
+                _mark_failed(chunk, error)
+            else:
+                sent += len(chunk)
+                OutboxMessage.objects.filter(
+                    pk__in=[message.pk for message in chunk]
+                ).update(status=MessageStatus.SENT, sent_at=timezone.now())
+    except Exception as error:
+        # Release the claim so the retried job finds the messages pending
+        _mark_failed(messages[start:], error)
+        raise
+    finally:
+        connection.close()
+
+    if failures:
+        raise RuntimeError(f"Could not send {len(failures)} {kind} digests")
+    return sent
+
+
+def _claim(kind):
+    # Claiming keeps two flushes of the same kind from sending a message twice
+    batch = uuid.uuid4()
+    pending = OutboxMessage.objects.filter(kind=kind, status=MessageStatus.PENDING)
+    pending.update(status=MessageStatus.SENDING, batch=batch, claimed_at=timezone.now())
+    return batch
+
+
+def _release_stale_claims():
+    lock_timeout = settings.JOBS.get("LOCK_TIMEOUT")
+    OutboxMessage.objects.filter(
+        status=MessageStatus.SENDING, claimed_at__lt=timezone.now() - lock_timeout
+    ).update(status=MessageStatus.PENDING, batch=None)
+
+
+def _mark_failed(chunk, error):
+    max_attempts = settings.OUTBOX.get("MAX_ATTEMPTS", 5)
+    for message in chunk:
+        message.attempts += 1
+        message.last_error = str(error)
+        message.batch = None
+        if message.attempts >= max_attempts:
+            message.status = MessageStatus.FAILED
+        else:
+            message.status = MessageStatus.PENDING
+    OutboxMessage.objects.bulk_update(
+        chunk, ["attempts", "last_error", "batch", "status"]
+    )
@@ -0,0 +1,143 @@
+from datetime import timedelta
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from jobs.models import Job
+from jobs.services import run_pending
+from outbox.models import MessageStatus, OutboxMessage
+
+
+class CountingBackend(EmailBackend):
+    connections = 0
+    failures = 0
+    open_failures = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingBackend.connections += 1
+
+    def open(self):
+        if CountingBackend.open_failures:
+            CountingBackend.open_failures -= 1
+            raise SMTPException("Connection timed out")
+        return super().open()
+
+    def send_messages(self, messages):
+        if CountingBackend.failures:
+            CountingBackend.failures -= 1
+            raise SMTPException("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+OUTBOX = {
+    "DIGEST_WINDOW": timedelta(minutes=5),
+    "BATCH_SIZE": 2,
+    "MAX_ATTEMPTS": 2,
+}
+
+
+@override_settings(
+    OUTBOX=OUTBOX,
+    EMAIL_REGISTER_NOTIFICATION=True,
+    MANAGERS=[["Manager", "manager@email.com"]],
+    EMAIL_BACKEND="outbox.tests.CountingBackend",
+)
+class RegistrationDigestTest(APITestCase):
+    def setUp(self):
+        CountingBackend.connections = 0
+        CountingBackend.failures = 0
+        CountingBackend.open_failures = 0
+
+    def _register(self, count):
+        for index in range(count):
+            data = {
+                "user": {"email": f"test{index}@email.com"},
+                "name": f"test {index}",
+                "campus": "University of the World",
+                "batch": 2020,
+            }
+            response = self.client.post(reverse("register"), data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def _run_due_jobs(self):
+        Job.objects.update(run_after=timezone.now())
+        run_pending()
+
+    def test_registration_does_not_send_mail(self):
+        self._register(1)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        job = Job.objects.get()
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(run_pending(), 0)
+
+    def test_sign_ups_are_sent_as_digests(self):
+        self._register(3)
+        self.assertEqual(Job.objects.count(), 1)
+
+        self._run_due_jobs()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(CountingBackend.connections, 1)
+        self.assertEqual(mail.outbox[0].to, ["manager@email.com"])
+        self.assertIn("2 New Sign-ups", mail.outbox[0].subject)
+        html = mail.outbox[0].alternatives[0][0]
+        self.assertIn("test0@email.com", html)
+        self.assertIn("test1@email.com", html)
+        self.assertIn("http://testserver/admin/", html)
+        self.assertIn("New Sign-up on Melton App", mail.outbox[1].subject)
+        self.assertEqual(
+            OutboxMessage.objects.filter(status=MessageStatus.SENT).count(), 3
+        )
+
+    def test_failed_digests_are_retried(self):
+        self._register(1)
+        CountingBackend.failures = 1
+
+        self._run_due_jobs()
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, MessageStatus.PENDING)
+        self.assertEqual(message.attempts, 1)
+        job = Job.objects.get()
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_after, timezone.now())
+
+        self._run_due_jobs()
+        self.assertEqual(len(mail.outbox), 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, MessageStatus.SENT)
+
+    def test_messages_fail_after_max_attempts(self):
+        self._register(1)
+        CountingBackend.failures = 2
+
+        self._run_due_jobs()
+        self._run_due_jobs()
+
+        self.assertEqual(OutboxMessage.objects.get().status, MessageStatus.FAILED)
+        self._run_due_jobs()
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_connection_failures_release_messages(self):
+        self._register(1)
+        CountingBackend.open_failures = 1
+
+        self._run_due_jobs()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, MessageStatus.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(Job.objects.get().attempts, 1)
+
+        self._run_due_jobs()
+        self.assertEqual(len(mail.outbox), 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, MessageStatus.SENT)
@@ -0,0 +1,119 @@
+import hashlib
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+class PostResponseCache:
+    """
+    Cache of serialized post responses, keyed by URL and the query parameters the
+    view reads, so unused parameters can't fill the cache with copies.
+
+    The post list (with any search) shares one generation and each post has its own.
+    Invalidating replaces the generation, so every response built from older data is
+    missed from then on without having to find its keys. Concurrent misses for one
+    key in a worker wait for the first to fill it instead of all querying.
+
+    ``POSTS_CACHE["BACKEND"]`` should name a cache shared by all workers, otherwise an
+    invalidation only reaches the worker it happened in and others serve stale
+    responses for up to ``TTL``.
+    """
+
+    KEY_PREFIX = "posts-response:"
+    LIST = "list"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[settings.POSTS_CACHE.get("BACKEND", "default")]
+
+    @property
+    def ttl(self):
+        return settings.POSTS_CACHE.get("TTL", timedelta(minutes=1)).total_seconds()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    @property
+    def metrics(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def get(self, scope, request, params):
+        """
+        Return the cached entry for ``request`` in ``scope`` (``LIST`` or a post id),
+        given the query ``params`` that shape its response.
+        """
+        if not self.enabled:
+            return None
+        entry = self.cache.get(self._key(scope, request, params))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def get_or_set(self, scope, request, params, build):
+        """Return the cached entry, building and storing it with ``build()`` if missing."""
+        if not self.enabled:
+            return build()
+
+        key = self._key(scope, request, params)
+        with self._key_lock(key):
+            entry = self.cache.get(key)
+            if entry is None:
+                entry = build()
+                self.cache.set(key, entry, self.ttl)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return entry
+
+    def invalidate(self, post_ids=()):
+        """Drop the cached post list and the cached responses of ``post_ids``."""
+        scopes = [self.LIST] + list(post_ids)
+
+        def invalidate():
+            self.cache.set_many(
+                {self._generation_key(scope): uuid.uuid4().hex for scope in scopes},
+                None,
+            )
+
+        invalidate()
+        # Readers may cache the old rows again until the change is committed
+        transaction.on_commit(invalidate)
+
+    def generation(self, scope):
+        """Return the current generation of ``scope``, which ``invalidate`` replaces."""
+        generation_key = self._generation_key(scope)
+        generation = self.cache.get(generation_key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            if not self.cache.add(generation_key, generation, None):
+                generation = self.cache.get(generation_key, generation)
+        return generation
+
+    def _key(self, scope, request, params):
+        generation = self.generation(scope)
+        query = sorted(params.items())
+        digest = hashlib.md5(f"{request.path}?{query}".encode("utf-8")).hexdigest()
+        return f"{self.KEY_PREFIX}{scope}:{generation}:{digest}"
+
+    def _generation_key(self, scope):
+        return f"{self.KEY_PREFIX}{scope}:generation"
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+
+post_cache = PostResponseCache()
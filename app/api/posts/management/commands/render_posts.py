@@ -0,0 +1,98 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.markdown import render_markdown
+from posts.models import Post
+
+
+def render_chunk(contents, extensions, extension_configs):
+    return [
+        render_markdown(content, extensions, extension_configs) for content in contents
+    ]
+
+
+class Command(BaseCommand):
+    """
+    A django management command to store the rendered HTML of posts
+    Posts are loaded in chunks, rendered in parallel worker processes and saved with
+    one bulk update per chunk
+
+    Inheritance:
+        BaseCommand:
+
+    """
+
+    help = "Render the markdown content of posts to sanitized HTML. By default only posts without HTML are rendered, use --all to render every post again"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Render posts which have HTML too"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of processes rendering posts",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="Number of posts rendered and saved at a time",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(content="")
+        if not options.get("all"):
+            posts = posts.filter(content_html="")
+        ids = list(posts.order_by("pk").values_list("pk", flat=True))
+        chunk_size = options.get("chunk_size")
+        chunks = [
+            ids[start : start + chunk_size] for start in range(0, len(ids), chunk_size)
+        ]
+        workers = max(options.get("workers"), 1)
+
+        start = time.monotonic()
+        config = (
+            settings.MARKDOWNX_MARKDOWN_EXTENSIONS,
+            getattr(settings, "MARKDOWNX_MARKDOWN_EXTENSION_CONFIGS", {}),
+        )
+        rendered = 0
+        if workers == 1:
+            for chunk in chunks:
+                ids, contents = self.load(chunk)
+                rendered += self.save(ids, render_chunk(contents, *config))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Keep a few chunks queued per worker so loading and saving overlap
+                pending = deque()
+                for chunk in chunks:
+                    ids, contents = self.load(chunk)
+                    pending.append(
+                        (ids, executor.submit(render_chunk, contents, *config))
+                    )
+                    if len(pending) >= workers * 2:
+                        ids, future = pending.popleft()
+                        rendered += self.save(ids, future.result())
+                while pending:
+                    ids, future = pending.popleft()
+                    rendered += self.save(ids, future.result())
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(
+            f"SUCCESS: {rendered} posts have been rendered in {elapsed:.2f}s"
+        )
+
+    def load(self, chunk):
+        rows = list(Post.objects.filter(pk__in=chunk).values_list("pk", "content"))
+        return [pk for pk, _ in rows], [content for _, content in rows]
+
+    def save(self, ids, htmls):
+        posts = [Post(pk=pk, content_html=html) for pk, html in zip(ids, htmls)]
+        Post.objects.bulk_update(posts, ["content_html"])
+        return len(posts)
@@ -0,0 +1,129 @@
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import markdown
+from django.conf import settings
+
+ALLOWED_TAGS = {
+    "a",
+    "abbr",
+    "blockquote",
+    "br",
+    "code",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "em",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+    "img",
+    "li",
+    "ol",
+    "p",
+    "pre",
+    "strong",
+    "sup",
+    "table",
+    "tbody",
+    "td",
+    "th",
+    "thead",
+    "tr",
+    "ul",
+}
+VOID_TAGS = {"br", "hr", "img"}
+# Tags whose content is dropped along with them
+DROPPED_CONTENT_TAGS = {"script", "style", "iframe", "object", "embed", "template"}
+
+GLOBAL_ATTRIBUTES = {"id", "class", "title"}
+ALLOWED_ATTRIBUTES = {
+    "a": {"href"},
+    "img": {"src", "alt"},
+    "td": {"align"},
+    "th": {"align"},
+}
+URL_ATTRIBUTES = {"href", "src"}
+ALLOWED_SCHEMES = {"", "http", "https", "mailto"}
+
+
+class _Sanitizer(HTMLParser):
+    """
+    Rebuilds HTML keeping only allowlisted tags and attributes. Anything else is
+    dropped, its text kept and escaped, except inside script-like tags.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self._dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_CONTENT_TAGS:
+            self._dropping += 1
+        elif tag in ALLOWED_TAGS and not self._dropping:
+            self.output.append(f"<{tag}{self._attributes(tag, attrs)}>")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in ALLOWED_TAGS and not self._dropping:
+            self.output.append(f"<{tag}{self._attributes(tag, attrs)} />")
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_CONTENT_TAGS:
+            self._dropping = max(self._dropping - 1, 0)
+        elif tag in ALLOWED_TAGS and tag not in VOID_TAGS and not self._dropping:
+            self.output.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if not self._dropping:
+            self.output.append(escape(data, quote=False))
+
+    def _attributes(self, tag, attrs):
+        allowed = GLOBAL_ATTRIBUTES | ALLOWED_ATTRIBUTES.get(tag, set())
+        kept = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not _is_safe_url(value):
+                continue
+            kept.append(f' {name}="{escape(value)}"')
+        return "".join(kept)
+
+
+def _is_safe_url(url):
+    # Browsers ignore control characters and spaces in schemes ("java\nscript:")
+    cleaned = "".join(c for c in url if c.isprintable() and not c.isspace())
+    try:
+        return urlsplit(cleaned).scheme.lower() in ALLOWED_SCHEMES
+    except ValueError:
+        return False
+
+
+def sanitize_html(html):
+    sanitizer = _Sanitizer()
+    sanitizer.feed(html)
+    sanitizer.close()
+    return "".join(sanitizer.output)
+
+
+def render_markdown(text, extensions=None, extension_configs=None):
+    """
+    Render markdown the way the admin editor does and sanitize the HTML. Extensions
+    default to the MARKDOWNX settings.
+    """
+    if extensions is None:
+        extensions = settings.MARKDOWNX_MARKDOWN_EXTENSIONS
+    if extension_configs is None:
+        extension_configs = getattr(
+            settings, "MARKDOWNX_MARKDOWN_EXTENSION_CONFIGS", {}
+        )
+    html = markdown.markdown(
+        text, extensions=extensions, extension_configs=extension_configs
+    )
+    return sanitize_html(html)
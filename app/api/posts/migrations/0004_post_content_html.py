@@ -0,0 +1,22 @@
+# Generated by Django 3.1.12 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0003_auto_20200823_1943"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="content_html",
+            field=models.TextField(
+                blank=True,
+                editable=False,
+                help_text="Sanitized HTML rendered from content",
+            ),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from markdownx.models import MarkdownxField
 
+from posts.markdown import render_markdown
+
 
 class CaseInsensitiveFieldMixin:
     """
@@ -42,6 +44,7 @@ class Post(models.Model):
     preview = models.ImageField(
         upload_to="post-previews", blank=True, help_text="Preview image for the post"
     )
+    preview_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(
         verbose_name="Short Description",
         blank=True,
@@ -50,11 +53,37 @@ class Post(models.Model):
     content = MarkdownxField(
         help_text="Write content of post in markdown. To add images, drag and drop them onto the content text field."
     )
+    content_html = models.TextField(
+        blank=True, editable=False, help_text="Sanitized HTML rendered from content"
+    )
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
     active = models.BooleanField(default=True)
     tags = models.ManyToManyField(Tag, related_name="posts")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        loaded = post.__dict__
+        if loaded.get("content_html"):
+            post._rendered_content = loaded.get("content")
+        return post
+
+    def save(self, *args, **kwargs):
+        if self.render_content():
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "content" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "content_html"}
+        super().save(*args, **kwargs)
+
+    def render_content(self):
+        """Render ``content`` to sanitized HTML if it changed since the last render."""
+        if self.content == getattr(self, "_rendered_content", None):
+            return False
+        self.content_html = render_markdown(self.content)
+        self._rendered_content = self.content
+        return True
+
     def update_tags(self, tags):
         if tags is not None and len(tags) > 0:
             existing_tags = list(self.tags.all())
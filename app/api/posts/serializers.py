@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from images.fields import ImageVariantField
+from posts.markdown import render_markdown
 from posts.models import Post, Tag
 
 
@@ -20,16 +22,47 @@ class TagSerializer(serializers.RelatedField):
 
 
 class PostSerializer(serializers.ModelSerializer):
+    """
+    Serializes a post with its markdown content. Rendered HTML is only included,
+    as ``content_html``, when the request asks for it with ``?html=true``.
+    """
+
     tags = TagSerializer(required=False, many=True)
+    content_html = serializers.SerializerMethodField()
+    preview_thumb = ImageVariantField("preview")
+    preview_srcset = ImageVariantField("preview", kind="srcset")
 
     class Meta:
         model = Post
-        exclude = ("id", "active")
+        exclude = ("id", "active", "preview_variants")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.query_params.get("html") != "true":
+            self.fields.pop("content_html", None)
+
+    def get_content_html(self, post):
+        # Posts saved before HTML was stored are rendered until backfilled
+        if not post.content_html and post.content:
+            return render_markdown(post.content)
+        return post.content_html
 
 
 class PostListSerializer(PostSerializer):
     id = serializers.IntegerField()
+    content_html = None
 
     class Meta:
         model = Post
-        fields = ("id", "title", "preview", "description", "tags", "created", "updated")
+        fields = (
+            "id",
+            "title",
+            "preview",
+            "preview_thumb",
+            "preview_srcset",
+            "description",
+            "tags",
+            "created",
+            "updated",
+        )
@@ -1,3 +1,8 @@
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import quote_etag
+
+from posts.cache import post_cache
 from posts.models import Post
 
 
@@ -10,3 +15,43 @@ def get_post_tags(id=None, post=None):
         tags = [tag.tag for tag in post.tags.all()]
 
     return tags
+
+
+def get_posts_version():
+    """
+    Return the ETag and last modification time of the post list, from one aggregate
+    query. Deactivating a post bumps its ``updated`` and deleting one changes the
+    count, so the ETag changes whenever the list does. Changes that leave ``updated``
+    alone, like renaming a tag, replace the cache generation that ends the ETag.
+    """
+    version = Post.objects.aggregate(
+        last_modified=Max("updated"), active=Count("pk", filter=Q(active=True))
+    )
+    last_modified = version["last_modified"]
+    if last_modified is None:
+        return quote_etag("posts-empty"), None
+    etag = (
+        f"posts-{last_modified.timestamp():.6f}-{version['active']}-"
+        f"{post_cache.generation(post_cache.LIST)}"
+    )
+    return quote_etag(etag), last_modified
+
+
+def get_post_version(id):
+    """Return the ETag and last modification time of an active post, or None."""
+    updated = (
+        Post.objects.filter(pk=id, active=True)
+        .values_list("updated", flat=True)
+        .first()
+    )
+    if updated is None:
+        return None
+    etag = f"post-{id}-{updated.timestamp():.6f}-{post_cache.generation(id)}"
+    return quote_etag(etag), updated
+
+
+def touch_posts(post_ids):
+    """Mark posts as updated, e.g. when their tags change."""
+    post_ids = list(post_ids)
+    Post.objects.filter(pk__in=post_ids).update(updated=timezone.now())
+    post_cache.invalidate(post_ids)
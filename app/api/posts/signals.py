@@ -0,0 +1,46 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from images.services import variants_generated
+from posts import services
+from posts.cache import post_cache
+from posts.models import Post, Tag
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_cached_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        post_cache.invalidate([instance.pk])
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def touch_tagged_posts(sender, instance, action, reverse, pk_set=None, **kwargs):
+    # Tags are part of a post's representation, so its ETag must change with them
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            services.touch_posts([instance.pk])
+    # Changes from the tag's side aren't edits of the posts, so they keep their
+    # ``updated`` and place in the feed and only get new cache generations
+    elif action in ("post_add", "post_remove"):
+        post_cache.invalidate(pk_set or [])
+    elif action == "pre_clear":
+        post_cache.invalidate(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_renamed_tag_posts(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        post_cache.invalidate(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def invalidate_deleted_tag_posts(sender, instance, **kwargs):
+    # Deleting a tag unlinks it from its posts without an m2m_changed signal
+    post_cache.invalidate(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(variants_generated, sender=Post)
+def invalidate_post_with_new_variants(sender, instance, **kwargs):
+    # Variants aren't edits of the post, so backfills don't reorder the feed
+    post_cache.invalidate([instance.pk])
@@ -0,0 +1,64 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.markdown import sanitize_html
+from posts.models import Post
+
+
+class SanitizeHtmlTest(TestCase):
+    def test_unsafe_markup_is_removed(self):
+        html = sanitize_html(
+            '<p onclick="x()">Hi<script>alert(1)</script><b>bold</b></p>'
+            '<a href="javascript:alert(1)">a</a><a href=" JaVa\tscript:x">b</a>'
+            '<img src="https://example.com/a.png" onerror="x()">'
+        )
+        self.assertEqual(
+            html,
+            "<p>Hibold</p><a>a</a><a>b</a>" '<img src="https://example.com/a.png">',
+        )
+
+    def test_text_is_escaped(self):
+        self.assertEqual(
+            sanitize_html("<p>5 &lt; 6 &amp;&quot;</p>"), '<p>5 &lt; 6 &amp;"</p>'
+        )
+
+
+class RenderedContentTest(TestCase):
+    def test_html_is_rendered_when_content_changes(self):
+        post = Post.objects.create(title="Post", content="# Title <script>x</script>")
+        self.assertEqual(post.content_html, "<h1>Title </h1>")
+
+        post = Post.objects.get(pk=post.pk)
+        post.title = "Changed"
+        post.content_html = "kept"
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).content_html, "kept")
+
+        post.content = "*new*"
+        post.save(update_fields=["content"])
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).content_html, "<p><em>new</em></p>"
+        )
+
+    def test_render_posts_command(self):
+        posts = [
+            Post.objects.create(title=f"Post {index}", content=f"**{index}**")
+            for index in range(5)
+        ]
+        Post.objects.update(content_html="")
+        Post.objects.filter(pk=posts[0].pk).update(content_html="<p>done</p>")
+
+        out = StringIO()
+        call_command("render_posts", "--workers", "2", "--chunk-size", "2", stdout=out)
+        self.assertIn("4 posts have been rendered", out.getvalue())
+        rendered = dict(Post.objects.values_list("pk", "content_html"))
+        self.assertEqual(rendered[posts[0].pk], "<p>done</p>")
+        self.assertEqual(rendered[posts[3].pk], "<p><strong>3</strong></p>")
+
+        call_command("render_posts", "--all", "--workers", "1", stdout=out)
+        self.assertEqual(
+            Post.objects.get(pk=posts[0].pk).content_html,
+            "<p><strong>0</strong></p>",
+        )
@@ -1,9 +1,13 @@
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils.http import urlencode
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from posts.models import Post
+from posts.cache import post_cache
+from posts.models import Post, Tag
 from authentication.models import Profile, ExpiringToken
 
 
@@ -17,6 +21,7 @@ class PostAPITest(APITestCase):
     COUNTRY_CODE = "+91"
 
     def setUp(self):
+        cache.clear()
         self.profile = Profile.objects.create(
             email=self.EMAIL,
             name=self.NAME,
@@ -81,6 +86,8 @@ class PostAPITest(APITestCase):
                         "id",
                         "title",
                         "preview",
+                        "preview_thumb",
+                        "preview_srcset",
                         "description",
                         "tags",
                         "created",
@@ -100,6 +107,8 @@ class PostAPITest(APITestCase):
                 [
                     "title",
                     "preview",
+                    "preview_thumb",
+                    "preview_srcset",
                     "description",
                     "content",
                     "tags",
@@ -138,3 +147,159 @@ class PostAPITest(APITestCase):
         response = self.client.get(url)
         for post in response.data:
             self.assertIn("description1", post["description"].lower())
+
+    def _revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_post_list_revalidation(self):
+        url = self._build_url("posts")
+        response = self.client.get(url)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(1), self.settings(POSTS_CACHE={"TTL": timedelta(0)}):
+            revalidated = self._revalidate(url, response)
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(revalidated.content, b"")
+
+        # Cached validators are used without querying
+        with self.assertNumQueries(0):
+            revalidated = self._revalidate(url, response)
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        revalidated = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_post_list_changes(self):
+        url = self._build_url("posts")
+        post = Post.objects.get(pk=self.posts[0]["id"])
+
+        response = self.client.get(url)
+        post.update_tags(["tag9"])
+        self.assertEqual(self._revalidate(url, response).status_code, 200)
+
+        response = self.client.get(url)
+        post.active = False
+        post.save()
+        self.assertEqual(self._revalidate(url, response).status_code, 200)
+
+        response = self.client.get(url)
+        Post.objects.get(pk=self.posts[1]["id"]).delete()
+        revalidated = self._revalidate(url, response)
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertEqual(len(revalidated.data), 0)
+
+    def test_post_revalidation(self):
+        url = self._build_url("post", args=[self.posts[0]["id"]])
+        response = self.client.get(url)
+
+        with self.assertNumQueries(1), self.settings(POSTS_CACHE={"TTL": timedelta(0)}):
+            revalidated = self._revalidate(url, response)
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Another post's ETag doesn't match
+        other = self._build_url("post", args=[self.posts[1]["id"]])
+        self.assertEqual(self._revalidate(other, response).status_code, 200)
+
+        Post.objects.filter(pk=self.posts[0]["id"]).update(title="Changed")
+        post = Post.objects.get(pk=self.posts[0]["id"])
+        post.save()
+        revalidated = self._revalidate(url, response)
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertEqual(revalidated.data["title"], "Changed")
+
+    def test_responses_are_cached(self):
+        url = self._build_url("posts", get={"search": "tag2"})
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        hits = post_cache.hits
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(post_cache.hits, hits + 1)
+
+        # Query parameters are part of the key
+        other = self.client.get(self._build_url("posts", get={"search": "tag3"}))
+        self.assertEqual(other["X-Cache"], "MISS")
+
+        # Parameters the view doesn't read share the cached response
+        unused = self.client.get(
+            self._build_url("posts", get={"search": "tag2", "page": "7"})
+        )
+        self.assertEqual(unused["X-Cache"], "HIT")
+
+    def test_cache_is_invalidated_by_post_changes(self):
+        list_url = self._build_url("posts")
+        url = self._build_url("post", args=[self.posts[0]["id"]])
+        other_url = self._build_url("post", args=[self.posts[1]["id"]])
+        for cached_url in [list_url, url, other_url]:
+            self.client.get(cached_url)
+
+        post = Post.objects.get(pk=self.posts[0]["id"])
+        post.title = "Changed"
+        post.save()
+
+        self.assertEqual(self.client.get(list_url)["X-Cache"], "MISS")
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["title"], "Changed")
+        # Other posts stay cached
+        self.assertEqual(self.client.get(other_url)["X-Cache"], "HIT")
+
+        Post.objects.create(title="New Post", content="New")
+        self.assertEqual(len(self.client.get(list_url).data), 3)
+
+    def test_cache_is_invalidated_by_tag_changes(self):
+        url = self._build_url("post", args=[self.posts[0]["id"]])
+        self.client.get(url)
+        tag = Tag.objects.get(tag="tag1")
+        tag.tag = "renamed"
+        tag.save()
+        self.assertIn("renamed", self.client.get(url).data["tags"])
+
+        self.client.get(url)
+        tag.delete()
+        self.assertNotIn("renamed", self.client.get(url).data["tags"])
+
+        self.client.get(url)
+        Post.objects.get(pk=self.posts[0]["id"]).update_tags(["tag7"])
+        self.assertEqual(self.client.get(url).data["tags"], ["tag7"])
+
+    def test_tag_changes_keep_post_order(self):
+        list_url = self._build_url("posts")
+        url = self._build_url("post", args=[self.posts[0]["id"]])
+        order = [post["id"] for post in self.client.get(list_url).data]
+        response = self.client.get(url)
+
+        tag = Tag.objects.get(tag="tag1")
+        tag.tag = "renamed"
+        tag.save()
+        tag.delete()
+
+        self.assertEqual([post["id"] for post in self.client.get(list_url).data], order)
+        # The ETag changes with the cache generation instead of ``updated``
+        revalidated = self._revalidate(url, response)
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertEqual(revalidated.data["updated"], response.data["updated"])
+
+    def test_rendered_html_is_opt_in(self):
+        url = self._build_url("post", args=[self.posts[0]["id"]])
+        response = self.client.get(url)
+        self.assertNotIn("content_html", response.data)
+
+        response = self.client.get(url + "?html=true")
+        self.assertEqual(
+            response.data["content_html"], "<p>This is content of first post</p>"
+        )
+
+        # Posts without stored HTML are rendered on the fly
+        Post.objects.filter(pk=self.posts[1]["id"]).update(content_html="")
+        url = self._build_url("post", args=[self.posts[1]["id"]], get={"html": "true"})
+        response = self.client.get(url)
+        self.assertEqual(
+            response.data["content_html"], "<p>This is conent of second post</p>"
+        )
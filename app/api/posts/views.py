@@ -1,18 +1,87 @@
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
-from rest_framework import filters
 from authentication import authentication
+from posts import services
+from posts.cache import PostResponseCache, post_cache
 from posts.models import Post
 from posts.serializers import PostListSerializer, PostSerializer
+from search.filters import FullTextSearchFilter
 
 
 class PostView(ReadOnlyModelViewSet):
     authentication_classes = []
     permission_classes = []
     search_fields = ["title", "description", "tags__tag"]
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (FullTextSearchFilter,)
     queryset = Post.objects.filter(active=True)
 
     def get_serializer_class(self):
         if self.action == "list":
             return PostListSerializer
         return PostSerializer
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(
+            request, PostResponseCache.LIST, services.get_posts_version, super().list
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs["pk"]
+        return self._cached(
+            request, pk, lambda: services.get_post_version(pk), super().retrieve
+        )
+
+    def _cached(self, request, scope, get_version, view):
+        """
+        Serve a response from the post cache, answering 304 Not Modified when the
+        client's copy is current. On a miss only the version is queried before that
+        check, so revalidations never serialize posts.
+        """
+        params = self._cache_params(request)
+        entry = post_cache.get(scope, request, params)
+        hit = entry is not None
+        if entry is None:
+            version = get_version()
+            if version is None:
+                # Not found, left uncached
+                return view(request, *self.args, **self.kwargs)
+            etag, last_modified = version
+            entry = {"etag": etag, "last_modified": last_modified}
+            if self._not_modified(request, entry) is None:
+                entry = post_cache.get_or_set(
+                    scope,
+                    request,
+                    params,
+                    lambda: dict(
+                        entry, data=view(request, *self.args, **self.kwargs).data
+                    ),
+                )
+
+        response = self._not_modified(request, entry) or Response(entry["data"])
+        response["ETag"] = entry["etag"]
+        if entry["last_modified"] is not None:
+            response["Last-Modified"] = http_date(entry["last_modified"].timestamp())
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        # Clients may keep posts but must revalidate them before use
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def _cache_params(self, request):
+        # Only the parameters that change the response are part of the cache key
+        search_filter = FullTextSearchFilter()
+        return {
+            search_filter.search_param: " ".join(
+                search_filter.get_search_terms(request)
+            ),
+            "html": request.query_params.get("html") == "true",
+        }
+
+    def _not_modified(self, request, entry):
+        last_modified = entry["last_modified"]
+        # HTTP dates have a resolution of a second
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(
+            request, etag=entry["etag"], last_modified=timestamp
+        )
@@ -0,0 +1,20 @@
+from rest_framework import filters
+
+from search import services
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for DRF's ``SearchFilter`` that uses the full-text index
+    instead of ``icontains`` lookups, and orders results by relevance.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return services.search(
+            queryset,
+            " ".join(terms),
+            fallback_fields=self.get_search_fields(view, request),
+        )
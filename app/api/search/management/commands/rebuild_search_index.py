@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from authentication.models import Profile
+from posts.models import Post
+from search import services
+
+
+class Command(BaseCommand):
+    """
+    A django management command to rebuild the full-text search index of profiles and posts
+
+    Inheritance:
+        BaseCommand:
+
+    """
+
+    help = "Rebuild the full-text search index for profiles and posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of objects to load from the database at a time",
+        )
+
+    def handle(self, *args, **options):
+        for model in (Profile, Post):
+            count = services.rebuild(model, batch_size=options.get("batch_size"))
+            self.stdout.write(
+                f"SUCCESS: {count} {model._meta.verbose_name_plural} have been indexed"
+            )
@@ -0,0 +1,36 @@
+# Generated by Django 3.1.12 on 2026-10-18 15:58
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=50)),
+                ("object_id", models.PositiveIntegerField()),
+                ("title", models.TextField(blank=True)),
+                ("body", models.TextField(blank=True)),
+                ("vector", django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+            options={
+                "unique_together": {("kind", "object_id")},
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+from django.db import migrations
+
+FTS_TABLE = "search_document_fts"
+DOCUMENT_TABLE = "search_searchdocument"
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX search_document_vector_idx ON {DOCUMENT_TABLE} "
+            "USING gin (vector)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, body, kind UNINDEXED, object_id UNINDEXED, tokenize = 'unicode61')"
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS search_document_vector_idx")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def index_existing_objects(apps, schema_editor):
+    SearchDocument = apps.get_model("search", "SearchDocument")
+    Profile = apps.get_model("authentication", "Profile")
+    Post = apps.get_model("posts", "Post")
+
+    documents = [
+        SearchDocument(
+            kind="authentication.profile",
+            object_id=profile.pk,
+            title=profile.name,
+            body=profile.user.email,
+        )
+        for profile in Profile.objects.select_related("user")
+    ]
+    documents += [
+        SearchDocument(
+            kind="posts.post",
+            object_id=post.pk,
+            title=post.title,
+            body=" ".join([post.description] + [tag.tag for tag in post.tags.all()]),
+        )
+        for post in Post.objects.prefetch_related("tags")
+    ]
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"UPDATE {DOCUMENT_TABLE} SET vector = "
+            "setweight(to_tsvector('simple', title), 'A') || "
+            "setweight(to_tsvector('simple', body), 'B')"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, body, kind, object_id) "
+            f"SELECT id, title, body, kind, object_id FROM {DOCUMENT_TABLE}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+        ("authentication", "0024_profile_batch_user_idx"),
+        ("posts", "0003_auto_20200823_1943"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(index_existing_objects, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a profile or post.
+
+    On PostgreSQL ``vector`` holds a weighted tsvector backed by a GIN index. On SQLite
+    the same rows are mirrored into the ``search_document_fts`` FTS5 table instead.
+    Both are created by this app's migrations.
+    """
+
+    kind = models.CharField(max_length=50)
+    object_id = models.PositiveIntegerField()
+    title = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    vector = SearchVectorField(null=True)
+
+    class Meta:
+        unique_together = ("kind", "object_id")
+
+    def __str__(self):
+        return f"{self.kind} - {self.object_id}"
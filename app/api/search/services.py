@@ -0,0 +1,235 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import DatabaseError, connection, transaction
+from django.db.models import (
+    Case,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,
+    When,
+)
+
+from search.models import SearchDocument
+
+FTS_TABLE = "search_document_fts"
+DOCUMENT_TABLE = SearchDocument._meta.db_table
+SEARCH_CONFIG = "simple"
+MAX_RESULTS = 1000
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _profile_document(profile):
+    return profile.name, profile.user.email
+
+
+def _post_document(post):
+    tags = " ".join(tag.tag for tag in post.tags.all())
+    return post.title, f"{post.description} {tags}"
+
+
+DOCUMENT_BUILDERS = {
+    "authentication.profile": _profile_document,
+    "posts.post": _post_document,
+}
+
+
+def get_kind(model):
+    return model._meta.label_lower
+
+
+def index_object(instance):
+    kind = get_kind(instance)
+    title, body = DOCUMENT_BUILDERS[kind](instance)
+    document, _ = SearchDocument.objects.update_or_create(
+        kind=kind, object_id=instance.pk, defaults={"title": title, "body": body}
+    )
+    _write_index(document)
+    return document
+
+
+def remove_object(instance):
+    kind = get_kind(instance)
+    documents = list(
+        SearchDocument.objects.filter(kind=kind, object_id=instance.pk).values_list(
+            "pk", flat=True
+        )
+    )
+    if connection.vendor == "sqlite":
+        for pk in documents:
+            _execute_fts(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+    SearchDocument.objects.filter(pk__in=documents).delete()
+
+
+def index_objects(instances):
+    """
+    Index objects of one model with a fixed number of queries, e.g. after
+    ``bulk_create`` or ``bulk_update``, which don't send the signals that index them.
+    """
+    instances = list(instances)
+    if not instances:
+        return 0
+    kind = get_kind(type(instances[0]))
+    build = DOCUMENT_BUILDERS[kind]
+    ids = [instance.pk for instance in instances]
+    documents = SearchDocument.objects.filter(kind=kind, object_id__in=ids)
+    placeholders = ", ".join(["%s"] * len(ids))
+    where = f"WHERE kind = %s AND object_id IN ({placeholders})"
+    new_documents = []
+    for instance in instances:
+        title, body = build(instance)
+        new_documents.append(
+            SearchDocument(kind=kind, object_id=instance.pk, title=title, body=body)
+        )
+
+    with transaction.atomic():
+        if connection.vendor == "sqlite":
+            _execute_fts(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN "
+                f"(SELECT id FROM {DOCUMENT_TABLE} {where})",
+                [kind, *ids],
+            )
+        documents.delete()
+        SearchDocument.objects.bulk_create(new_documents)
+        if connection.vendor == "postgresql":
+            documents.update(
+                vector=SearchVector("title", weight="A", config=SEARCH_CONFIG)
+                + SearchVector("body", weight="B", config=SEARCH_CONFIG)
+            )
+        elif connection.vendor == "sqlite":
+            _execute_fts(
+                f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, body, kind, object_id) "
+                f"SELECT id, title, body, kind, object_id FROM {DOCUMENT_TABLE} {where}",
+                [kind, *ids],
+            )
+    return len(instances)
+
+
+def rebuild(model, batch_size=500):
+    kind = get_kind(model)
+    if connection.vendor == "sqlite":
+        _execute_fts(f"DELETE FROM {FTS_TABLE} WHERE kind = %s", [kind])
+    SearchDocument.objects.filter(kind=kind).delete()
+    count = 0
+    queryset = model.objects.all()
+    if kind == "authentication.profile":
+        queryset = queryset.select_related("user")
+    elif kind == "posts.post":
+        queryset = queryset.prefetch_related("tags")
+    for instance in queryset.iterator(chunk_size=batch_size):
+        index_object(instance)
+        count += 1
+    return count
+
+
+def search(queryset, term, fallback_fields=()):
+    """
+    Filter ``queryset`` down to objects matching ``term`` and order them by relevance.
+    Every word in ``term`` must match the start of an indexed word. On SQLite only
+    the ``MAX_RESULTS`` most relevant objects are returned. If the database has no
+    full-text index, ``fallback_fields`` are searched with ``icontains``.
+    """
+    words = _WORD_PATTERN.findall(term.lower())
+    if not words:
+        return queryset
+
+    if connection.vendor == "postgresql":
+        return _search_postgresql(queryset, words)
+    if connection.vendor == "sqlite":
+        ranked = _search_sqlite(queryset, words)
+        if ranked is not None:
+            return _order_by_ranking(queryset, ranked)
+    return _search_fallback(queryset, words, fallback_fields)
+
+
+def _write_index(document):
+    if connection.vendor == "postgresql":
+        SearchDocument.objects.filter(pk=document.pk).update(
+            vector=SearchVector(
+                Value(document.title, output_field=TextField()),
+                weight="A",
+                config=SEARCH_CONFIG,
+            )
+            + SearchVector(
+                Value(document.body, output_field=TextField()),
+                weight="B",
+                config=SEARCH_CONFIG,
+            )
+        )
+    elif connection.vendor == "sqlite":
+        _execute_fts(
+            f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, body, kind, object_id) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [
+                document.pk,
+                document.title,
+                document.body,
+                document.kind,
+                document.object_id,
+            ],
+        )
+
+
+def _execute_fts(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall() if cursor.description else None
+
+
+def _search_postgresql(queryset, words):
+    raw_query = " & ".join(f"{word}:*" for word in words)
+    query = SearchQuery(raw_query, search_type="raw", config=SEARCH_CONFIG)
+    ranks = SearchDocument.objects.filter(
+        kind=get_kind(queryset.model), object_id=OuterRef("pk"), vector=query
+    ).annotate(rank=SearchRank(F("vector"), query))
+    return (
+        queryset.annotate(
+            search_rank=Subquery(ranks.values("rank")[:1], output_field=FloatField())
+        )
+        .filter(search_rank__isnull=False)
+        .order_by("-search_rank", "pk")
+    )
+
+
+def _search_sqlite(queryset, words):
+    match = " ".join(f'"{word}"*' for word in words)
+    # The queryset's filters go into the query, so the limit only counts objects
+    # the caller can return
+    objects, params = queryset.order_by().values("pk").query.sql_with_params()
+    # bm25 column weights: title matches count more than body matches
+    try:
+        with transaction.atomic():
+            return _execute_fts(
+                f"SELECT object_id FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND kind = %s AND object_id IN ({objects}) "
+                f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s",
+                [match, get_kind(queryset.model), *params, MAX_RESULTS],
+            )
+    except DatabaseError:
+        # The FTS5 table is missing if SQLite was built without FTS5, searching
+        # then falls back to plain lookups
+        return None
+
+
+def _order_by_ranking(queryset, ranked):
+    ids = [row[0] for row in ranked]
+    if not ids:
+        return queryset.none()
+    ordering = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)]
+    )
+    return queryset.filter(pk__in=ids).order_by(ordering)
+
+
+def _search_fallback(queryset, words, fields):
+    for word in words:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f"{field}__icontains": word})
+        queryset = queryset.filter(condition)
+    return queryset.distinct()
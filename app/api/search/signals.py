@@ -0,0 +1,70 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from authentication.models import AppUser, Profile
+from posts.models import Post, Tag
+from search import services
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Post)
+def index_saved_object(sender, instance, raw=False, **kwargs):
+    if not raw:
+        services.index_object(instance)
+
+
+@receiver(post_delete, sender=Profile)
+@receiver(post_delete, sender=Post)
+def remove_deleted_object(sender, instance, **kwargs):
+    services.remove_object(instance)
+
+
+@receiver(post_save, sender=AppUser)
+def index_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    profile = Profile.objects.filter(user=instance).first()
+    if profile is not None:
+        services.index_object(profile)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def index_post_tags(sender, instance, action, reverse, **kwargs):
+    if reverse and action == "pre_clear":
+        # Clearing from the tag's side sends no pk_set, so remember its posts
+        instance._search_post_ids = list(instance.posts.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        # A tag was linked to or unlinked from posts
+        if action == "post_clear":
+            post_ids = getattr(instance, "_search_post_ids", [])
+        else:
+            post_ids = kwargs.get("pk_set") or []
+        _index_posts(post_ids)
+    else:
+        services.index_object(instance)
+
+
+@receiver(post_save, sender=Tag)
+def index_renamed_tag_posts(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        _index_posts(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_deleted_tag_posts(sender, instance, **kwargs):
+    # Deleting a tag unlinks it from its posts without an m2m_changed signal
+    instance._search_post_ids = list(instance.posts.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def index_deleted_tag_posts(sender, instance, **kwargs):
+    _index_posts(getattr(instance, "_search_post_ids", []))
+
+
+def _index_posts(post_ids):
+    services.index_objects(
+        Post.objects.filter(pk__in=list(post_ids)).prefetch_related("tags")
+    )
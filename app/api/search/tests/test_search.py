@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase
+
+from authentication.models import Profile
+from posts.models import Post, Tag
+from search import services
+from search.models import SearchDocument
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.first = Post.objects.create(
+            title="Climate summit", description="Notes from the meeting", content="-"
+        )
+        self.second = Post.objects.create(
+            title="Meeting notes",
+            description="Summary of the climate summit",
+            content="-",
+        )
+        self.profile = Profile.objects.create(
+            email="fellow@email.com",
+            name="Ada Lovelace",
+            is_junior_fellow=True,
+            campus="University of the World",
+            batch=2020,
+        )
+
+    def _search_posts(self, term):
+        return list(services.search(Post.objects.all(), term))
+
+    def test_title_matches_rank_first(self):
+        self.assertListEqual(self._search_posts("climate"), [self.first, self.second])
+        self.assertListEqual(self._search_posts("meeting"), [self.second, self.first])
+
+    def test_prefix_matching(self):
+        self.assertListEqual(self._search_posts("clim sum"), [self.first, self.second])
+        self.assertListEqual(self._search_posts("climatic"), [])
+
+    def test_limit_counts_filtered_objects_only(self):
+        with mock.patch.object(services, "MAX_RESULTS", 1):
+            found = services.search(Post.objects.exclude(pk=self.first.pk), "climate")
+            self.assertListEqual(list(found), [self.second])
+
+    def test_index_write_errors_are_raised(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {services.FTS_TABLE}")
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            self.first.save()
+        # Searches fall back to plain lookups
+        found = services.search(Post.objects.all(), "summit", ["title"])
+        self.assertListEqual(list(found), [self.first])
+
+    def test_update_tags_is_indexed(self):
+        self.first.update_tags(["oceans"])
+        self.assertListEqual(self._search_posts("oceans"), [self.first])
+        self.first.update_tags(["forests"])
+        self.assertListEqual(self._search_posts("oceans"), [])
+
+    def test_tag_changes_are_indexed(self):
+        self.first.update_tags(["oceans"])
+        tag = Tag.objects.get(tag="oceans")
+        tag.tag = "rivers"
+        tag.save()
+        self.assertListEqual(self._search_posts("rivers"), [self.first])
+        self.assertListEqual(self._search_posts("oceans"), [])
+
+        tag.posts.add(self.second)
+        tag.posts.clear()
+        self.assertListEqual(self._search_posts("rivers"), [])
+
+        self.first.update_tags(["lakes"])
+        Tag.objects.get(tag="lakes").delete()
+        self.assertListEqual(self._search_posts("lakes"), [])
+
+    def test_saved_changes_are_indexed(self):
+        self.second.title = "Ocean cleanup"
+        self.second.save()
+        self.assertListEqual(self._search_posts("ocean"), [self.second])
+
+    def test_deleted_objects_are_removed(self):
+        self.first.delete()
+        self.assertListEqual(self._search_posts("climate"), [self.second])
+        self.assertFalse(
+            SearchDocument.objects.filter(
+                kind="posts.post", object_id=self.first.pk
+            ).exists()
+        )
+
+    def test_profile_name_and_email(self):
+        profiles = Profile.objects.all()
+        self.assertListEqual(list(services.search(profiles, "ada")), [self.profile])
+        self.assertListEqual(list(services.search(profiles, "fellow")), [self.profile])
+
+        user = self.profile.user
+        user.email = "ada@email.com"
+        user.save()
+        self.assertListEqual(list(services.search(profiles, "fellow")), [])
+
+    def test_rebuild(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(services.rebuild(Post), 2)
+        self.assertListEqual(self._search_posts("climate"), [self.first, self.second])
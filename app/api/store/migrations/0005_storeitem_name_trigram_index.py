@@ -0,0 +1,37 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+ITEM_TABLE = "store_storeitem"
+
+
+def create_name_indexes(apps, schema_editor):
+    # SQLite has no trigram support, lookups there go through store.search.NgramIndex
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX storeitem_name_trgm_idx ON {ITEM_TABLE} "
+        "USING gin (name gin_trgm_ops)"
+    )
+    # Serves name__iexact lookups when buying an item by name
+    schema_editor.execute(
+        f"CREATE INDEX storeitem_name_upper_idx ON {ITEM_TABLE} (UPPER(name::text))"
+    )
+
+
+def drop_name_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS storeitem_name_trgm_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS storeitem_name_upper_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0004_merge_20200925_2004"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_name_indexes, drop_name_indexes),
+    ]
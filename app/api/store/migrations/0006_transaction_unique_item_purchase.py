@@ -0,0 +1,46 @@
+# Generated by Django 3.1.12 on 2026-10-18 16:01
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import Coalesce
+
+
+def refund_duplicate_purchases(apps, schema_editor):
+    # Keep the first purchase of each item and refund the points of the others
+    Transaction = apps.get_model("store", "Transaction")
+    Profile = apps.get_model("authentication", "Profile")
+    purchases = Transaction.objects.filter(transaction_type="BUY", item__isnull=False)
+    duplicates = (
+        purchases.values("user", "item")
+        .annotate(first=Min("pk"), count=Count("pk"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        refunds = purchases.filter(
+            user=duplicate["user"], item=duplicate["item"]
+        ).exclude(pk=duplicate["first"])
+        refund = refunds.aggregate(points=Sum("points"))["points"]
+        Profile.objects.filter(pk=duplicate["user"]).update(
+            points=Coalesce(F("points"), 0) + refund
+        )
+        refunds.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0023_auto_20210905_2115"),
+        ("store", "0005_storeitem_name_trigram_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(refund_duplicate_purchases, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="transaction",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(transaction_type="BUY"),
+                fields=("user", "item"),
+                name="unique_item_purchase",
+            ),
+        ),
+    ]
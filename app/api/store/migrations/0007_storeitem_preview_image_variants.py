@@ -0,0 +1,18 @@
+# Generated by Django 3.1.12 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0006_transaction_unique_item_purchase"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="storeitem",
+            name="preview_image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
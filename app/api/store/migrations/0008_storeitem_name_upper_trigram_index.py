@@ -0,0 +1,31 @@
+from django.db import migrations
+
+ITEM_TABLE = "store_storeitem"
+
+
+def create_upper_name_index(apps, schema_editor):
+    # name__icontains compiles to UPPER(name::text) LIKE UPPER(...), which only an
+    # index on the same expression can serve
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX storeitem_name_upper_trgm_idx ON {ITEM_TABLE} "
+        "USING gin (UPPER(name::text) gin_trgm_ops)"
+    )
+
+
+def drop_upper_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS storeitem_name_upper_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0007_storeitem_preview_image_variants"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_upper_name_index, drop_upper_name_index),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import IntegrityError, models
+from django.db import transaction as db_transaction
+from django.db.models import Exists, OuterRef
 from django.utils.translation import gettext_lazy as _
 from authentication.models import AppUser
 from django.core.exceptions import ValidationError
@@ -12,6 +14,7 @@ class TransactionType(models.TextChoices):
 class StoreItem(models.Model):
     name = models.CharField(max_length=100, unique=True)
     preview_image = models.ImageField(upload_to="store-items", blank=True)
+    preview_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(max_length=500)
     points = models.PositiveIntegerField(blank=False)
     active = models.BooleanField(default=True)
@@ -20,21 +23,54 @@ class StoreItem(models.Model):
         return f"{self.name}"
 
 
+class PurchaseError(Exception):
+    pass
+
+
+class InsufficientPointsError(PurchaseError):
+    pass
+
+
+class ItemAlreadyPurchasedError(PurchaseError):
+    pass
+
+
 class TransactionManager(models.Manager):
     def buy_item(self, user, item):
-        transaction = Transaction(
-            user=user,
-            item=item,
-            points=item.points,
-            transaction_type=TransactionType.BUY,
-        )
-        transaction.save()
-        user.profile.deduct_points(item.points)
-        return transaction
+        """
+        Record the purchase and deduct its points in one database transaction.
+
+        The unique BUY constraint rejects double purchases and the points are only
+        deducted while the balance covers the cost, so concurrent requests cannot
+        overspend or buy an item twice.
+        """
+        try:
+            with db_transaction.atomic():
+                purchase = self.create(
+                    user=user,
+                    item=item,
+                    points=item.points,
+                    transaction_type=TransactionType.BUY,
+                )
+                if not user.profile.deduct_points(item.points):
+                    raise InsufficientPointsError()
+        except IntegrityError:
+            # Only the unique BUY constraint means the item was already bought
+            if self.filter(
+                user=user, item=item, transaction_type=TransactionType.BUY
+            ).exists():
+                raise ItemAlreadyPurchasedError()
+            raise
+        return purchase
 
     def is_purchased(self, user, item):
-        transaction = self.filter(user=user).filter(item=item)
-        return bool(transaction)
+        return self.filter(user=user, item=item).exists()
+
+    def annotate_purchased(self, queryset, user):
+        """Annotate store items with ``is_purchased`` for ``user`` in the same query."""
+        return queryset.annotate(
+            is_purchased=Exists(self.filter(user=user, item=OuterRef("pk")))
+        )
 
 
 class Transaction(models.Model):
@@ -49,6 +85,15 @@ class Transaction(models.Model):
 
     objects = TransactionManager()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "item"],
+                condition=models.Q(transaction_type=TransactionType.BUY),
+                name="unique_item_purchase",
+            )
+        ]
+
     def clean(self):
         user_points = 0
         if self.user.profile.points is not None:
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+
+
+def trigrams(text):
+    """
+    Trigrams of ``text`` the way pg_trgm builds them: lowercased words padded with
+    two spaces in front and one at the end.
+    """
+    grams = set()
+    for word in "".join(c if c.isalnum() else " " for c in text.lower()).split():
+        padded = f"  {word} "
+        for index in range(len(padded) - 2):
+            grams.add(padded[index : index + 3])
+    return grams
+
+
+def similarity(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class NgramIndex:
+    """
+    In-memory trigram index of store item names, used where pg_trgm is not available.
+
+    Items are looked up through an inverted index of trigrams, so only items sharing
+    at least one trigram with the query are scored. The index is rebuilt lazily after
+    ``invalidate()`` or once ``INDEX_TTL`` has passed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._names = {}
+        self._grams = {}
+        self._postings = defaultdict(set)
+
+    @property
+    def ttl(self):
+        ttl = settings.STORE_SEARCH.get("INDEX_TTL", timedelta(minutes=5))
+        return ttl.total_seconds()
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def search(self, query, threshold):
+        self._ensure_built()
+        query_grams = trigrams(query)
+        needle = query.lower()
+
+        with self._lock:
+            candidates = set()
+            for gram in query_grams:
+                candidates |= self._postings.get(gram, set())
+
+            scores = {}
+            for item_id in candidates:
+                score = similarity(query_grams, self._grams[item_id])
+                if score >= threshold:
+                    scores[item_id] = score
+
+            # Substring matches always qualify. Every trigram inside the query
+            # must also occur in a matching name, which narrows the candidates.
+            interior = [gram for gram in query_grams if " " not in gram]
+            if interior:
+                substring_candidates = set.intersection(
+                    *[self._postings.get(gram, set()) for gram in interior]
+                )
+            else:
+                substring_candidates = self._names.keys()
+            for item_id in substring_candidates:
+                if needle and needle in self._names[item_id]:
+                    scores.setdefault(
+                        item_id, similarity(query_grams, self._grams[item_id])
+                    )
+
+        return sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+
+    def _ensure_built(self):
+        with self._lock:
+            fresh = (
+                self._built_at is not None
+                and time.monotonic() - self._built_at < self.ttl
+            )
+        if not fresh:
+            self._build()
+
+    def _build(self):
+        from store.models import StoreItem
+
+        items = StoreItem.objects.filter(active=True).values_list("pk", "name")
+        names, grams, postings = {}, {}, defaultdict(set)
+        for pk, name in items:
+            names[pk] = name.lower()
+            grams[pk] = trigrams(name)
+            for gram in grams[pk]:
+                postings[gram].add(pk)
+
+        with self._lock:
+            self._names, self._grams, self._postings = names, grams, postings
+            self._built_at = time.monotonic()
+
+
+item_index = NgramIndex()
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from images.fields import ImageVariantField
 from store.models import StoreItem, Transaction
 
 
@@ -9,9 +10,12 @@ class StoreItemReadSerializer(serializers.ModelSerializer):
     )
 
     def is_purchased_by_user(self, item):
+        # Views annotate the queryset with Transaction.objects.annotate_purchased
+        if hasattr(item, "is_purchased"):
+            return item.is_purchased
+
         is_purchased = False
         if "request" in self.context:
-            item = self.Meta.model.objects.get(pk=item.id)
             is_purchased = Transaction.objects.is_purchased(
                 self.context.get("request").user, item
             )
@@ -19,6 +23,8 @@ class StoreItemReadSerializer(serializers.ModelSerializer):
         return is_purchased
 
     previewImage = serializers.ImageField(source="preview_image", read_only=True)
+    previewImageThumb = ImageVariantField("preview_image")
+    previewImageSrcset = ImageVariantField("preview_image", kind="srcset")
 
     class Meta:
         model = StoreItem
@@ -26,6 +32,8 @@ class StoreItemReadSerializer(serializers.ModelSerializer):
             "id",
             "name",
             "previewImage",
+            "previewImageThumb",
+            "previewImageSrcset",
             "description",
             "points",
             "active",
@@ -1,6 +1,16 @@
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection, transaction
+from django.db.models import Case, Q, Value, When
 from rest_framework import status
 from store.serializers import BuyTransactionSerializer
-from store.models import StoreItem, Transaction
+from store.models import (
+    InsufficientPointsError,
+    ItemAlreadyPurchasedError,
+    StoreItem,
+    Transaction,
+)
+from store.search import item_index
 from response.success.store import ItemBought
 from response.errors.store import InsufficientPoints, ItemAlreadyOwned, ItemNotAvailable
 from response.errors.common import _form_bad_request_response
@@ -13,23 +23,20 @@ def buy_item(data, user):
             item_id=serializer.data.get("itemId", None),
             item_name=serializer.data.get("itemName", None),
         )
-        user_points = 0
-        if user.profile.points is not None:
-            user_points = user.profile.points
-
         if item is None:
             response = ItemNotAvailable().to_dict()
             response_status = status.HTTP_404_NOT_FOUND
-        elif item.points > user_points:
-            response = InsufficientPoints(user, item).to_dict()
-            response_status = status.HTTP_422_UNPROCESSABLE_ENTITY
-        elif item_purchased(user, item):
-            response = ItemAlreadyOwned().to_dict()
-            response_status = status.HTTP_422_UNPROCESSABLE_ENTITY
         else:
-            Transaction.objects.buy_item(user, item)
-            response = ItemBought(user, item).to_dict()
-            response_status = status.HTTP_200_OK
+            try:
+                Transaction.objects.buy_item(user, item)
+                response = ItemBought(user, item).to_dict()
+                response_status = status.HTTP_200_OK
+            except InsufficientPointsError:
+                response = InsufficientPoints(user, item).to_dict()
+                response_status = status.HTTP_422_UNPROCESSABLE_ENTITY
+            except ItemAlreadyPurchasedError:
+                response = ItemAlreadyOwned().to_dict()
+                response_status = status.HTTP_422_UNPROCESSABLE_ENTITY
 
     else:
         response, response_status = _form_bad_request_response(serializer.errors)
@@ -37,10 +44,6 @@ def buy_item(data, user):
     return response, response_status
 
 
-def item_purchased(user, item):
-    return Transaction.objects.is_purchased(user, item)
-
-
 def get_item(item_id=None, item_name=None):
     item = None
     if item_id is not None:
@@ -52,3 +55,39 @@ def get_item(item_id=None, item_name=None):
         return item.first()
     else:
         return None
+
+
+def find_items_by_name(name, queryset=None):
+    """
+    Typo-tolerant lookup of items by name, ordered by trigram similarity.
+    Items whose name contains ``name`` are always included. Returns a list, since
+    on PostgreSQL the query has to run inside the transaction setting its threshold.
+    """
+    if queryset is None:
+        queryset = StoreItem.objects.filter(active=True)
+    threshold = settings.STORE_SEARCH.get("SIMILARITY_THRESHOLD", 0.3)
+
+    if connection.vendor == "postgresql":
+        # The similarity condition is served by the gin_trgm_ops index on name and
+        # the substring one by the gin_trgm_ops index on UPPER(name)
+        with transaction.atomic():
+            # A local setting ends with the transaction, so the threshold doesn't
+            # leak into later queries on the pooled connection
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+                    [str(threshold)],
+                )
+            return list(
+                queryset.filter(Q(name__trigram_similar=name) | Q(name__icontains=name))
+                .annotate(similarity=TrigramSimilarity("name", name))
+                .order_by("-similarity", "pk")
+            )
+
+    ranked = [item_id for item_id, _ in item_index.search(name, threshold)]
+    if not ranked:
+        return []
+    ordering = Case(
+        *[When(pk=pk, then=Value(index)) for index, pk in enumerate(ranked)]
+    )
+    return list(queryset.filter(pk__in=ranked).order_by(ordering))
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from store.models import StoreItem
+from store.search import item_index
+
+
+@receiver(post_save, sender=StoreItem)
+@receiver(post_delete, sender=StoreItem)
+def invalidate_item_index(sender, **kwargs):
+    item_index.invalidate()
@@ -1 +1,272 @@
-# Create your tests here.
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.db import IntegrityError, connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from authentication.models import ExpiringToken, Profile
+from store import services
+from store.models import (
+    InsufficientPointsError,
+    ItemAlreadyPurchasedError,
+    PurchaseError,
+    StoreItem,
+    Transaction,
+    TransactionType,
+)
+from store.search import item_index, similarity, trigrams
+
+
+def create_profile(email, points=0):
+    profile = Profile.objects.create(
+        email=email,
+        name="test",
+        is_junior_fellow=True,
+        campus="University of the World",
+        batch=2020,
+        points=points,
+    )
+    profile.user.is_active = True
+    profile.user.save()
+    return profile
+
+
+class ItemSearchTest(TestCase):
+    def setUp(self):
+        item_index.invalidate()
+        self.conference = StoreItem.objects.create(
+            name="Conference Access", description="-", points=100
+        )
+        self.mug = StoreItem.objects.create(
+            name="Melton Mug", description="-", points=10
+        )
+        self.hoodie = StoreItem.objects.create(
+            name="Melton Hoodie", description="-", points=50, active=False
+        )
+
+    def _find(self, name):
+        return list(services.find_items_by_name(name))
+
+    def test_trigrams(self):
+        self.assertSetEqual(trigrams("Cat"), {"  c", " ca", "cat", "at "})
+        self.assertEqual(similarity(trigrams("cat"), trigrams("cat")), 1.0)
+
+    def test_typo_tolerant(self):
+        self.assertListEqual(self._find("conferense acess"), [self.conference])
+        self.assertListEqual(self._find("melton mgu"), [self.mug])
+
+    def test_substring_matches(self):
+        self.assertListEqual(self._find("access"), [self.conference])
+        self.assertListEqual(self._find("ug"), [self.mug])
+
+    def test_unrelated_and_inactive_items_are_excluded(self):
+        self.assertListEqual(self._find("bicycle"), [])
+        self.assertListEqual(self._find("hoodie"), [])
+
+    def test_index_follows_changes(self):
+        self._find("mug")
+        self.mug.name = "Melton Bottle"
+        self.mug.save()
+        self.assertListEqual(self._find("bottle"), [self.mug])
+        self.assertListEqual(self._find("mug"), [])
+
+
+class StoreAPITest(APITestCase):
+    def setUp(self):
+        item_index.invalidate()
+        profile = create_profile("test@email.com")
+        self.user = profile.user
+        self.token = ExpiringToken.objects.get(user=self.user)
+        StoreItem.objects.create(name="Conference Access", description="-", points=1)
+        StoreItem.objects.create(name="Conference Badge", description="-", points=1)
+
+    def test_get_item_by_name(self):
+        self.client.force_authenticate(user=self.user, token=self.token)
+        url = reverse("storeitem-get-store-item-by-name", args=["conferance access"])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertListEqual(
+            [item["name"] for item in response.data], ["Conference Access"]
+        )
+
+        url = reverse("storeitem-get-store-item-by-name", args=["conference"])
+        response = self.client.get(url)
+        self.assertEqual(len(response.data), 2)
+
+
+class StoreQueryCountTest(APITestCase):
+    """
+    Benchmark of queries per store request. ``purchased`` is computed in the item
+    query itself, so the count must not grow with the size of the catalogue.
+    """
+
+    def setUp(self):
+        item_index.invalidate()
+        profile = create_profile("test@email.com")
+        self.user = profile.user
+        self.token = ExpiringToken.objects.get(user=self.user)
+        self._add_items(2)
+
+    def _add_items(self, count):
+        offset = StoreItem.objects.count()
+        for index in range(offset, offset + count):
+            item = StoreItem.objects.create(
+                name=f"Item {index}", description="-", points=1
+            )
+            if index % 2 == 0:
+                Transaction.objects.create(
+                    user=self.user,
+                    item=item,
+                    points=item.points,
+                    transaction_type=TransactionType.BUY,
+                )
+
+    def _get(self, url):
+        self.client.force_authenticate(user=self.user, token=self.token)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(context.captured_queries)
+
+    def test_list_purchased_flags(self):
+        response, _ = self._get(reverse("storeitem-list"))
+        purchased = {item["name"]: item["purchased"] for item in response.data}
+        self.assertDictEqual(purchased, {"Item 0": True, "Item 1": False})
+
+    def test_list_query_count_is_constant(self):
+        url = reverse("storeitem-list")
+        _, queries = self._get(url)
+        self._add_items(20)
+        response, grown_queries = self._get(url)
+        self.assertEqual(len(response.data), 22)
+        self.assertEqual(queries, 1)
+        self.assertEqual(grown_queries, queries)
+
+    def test_by_name_query_count_is_constant(self):
+        url = reverse("storeitem-get-store-item-by-name", args=["item"])
+        _, queries = self._get(url)
+        self._add_items(20)
+        response, grown_queries = self._get(url)
+        self.assertEqual(len(response.data), 22)
+        self.assertEqual(grown_queries, queries)
+
+    def test_retrieve_purchased_flag(self):
+        item = StoreItem.objects.get(name="Item 0")
+        response, queries = self._get(reverse("storeitem-detail", args=[item.pk]))
+        self.assertTrue(response.data["purchased"])
+        self.assertEqual(queries, 1)
+
+
+class PurchaseTest(TestCase):
+    def setUp(self):
+        self.profile = create_profile("test@email.com", points=100)
+        self.user = self.profile.user
+        self.item = StoreItem.objects.create(name="Mug", description="-", points=60)
+
+    def test_buy_item(self):
+        Transaction.objects.buy_item(self.user, self.item)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.points, 40)
+        self.assertTrue(Transaction.objects.is_purchased(self.user, self.item))
+
+    def test_cant_buy_twice(self):
+        Transaction.objects.buy_item(self.user, self.item)
+        with self.assertRaises(ItemAlreadyPurchasedError):
+            Transaction.objects.buy_item(self.user, self.item)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.points, 40)
+
+    def test_cant_overspend(self):
+        item = StoreItem.objects.create(name="Hoodie", description="-", points=101)
+        with self.assertRaises(InsufficientPointsError):
+            Transaction.objects.buy_item(self.user, item)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.points, 100)
+        self.assertFalse(Transaction.objects.is_purchased(self.user, item))
+
+    def test_profiles_without_points_get_free_items(self):
+        Profile.objects.filter(pk=self.profile.pk).update(points=None)
+        item = StoreItem.objects.create(name="Sticker", description="-", points=0)
+        Transaction.objects.buy_item(self.user, item)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.points, 0)
+        with self.assertRaises(InsufficientPointsError):
+            Transaction.objects.buy_item(self.user, self.item)
+
+    def test_other_integrity_errors_are_raised(self):
+        with mock.patch.object(
+            Profile, "deduct_points", side_effect=IntegrityError("not null")
+        ):
+            with self.assertRaisesMessage(IntegrityError, "not null"):
+                Transaction.objects.buy_item(self.user, self.item)
+        self.assertFalse(Transaction.objects.is_purchased(self.user, self.item))
+
+    def test_buy_api(self):
+        token = ExpiringToken.objects.get(user=self.user)
+        client = APIClient()
+        client.force_authenticate(user=self.user, token=token)
+        response = client.post(
+            reverse("buy_store_item"), {"itemId": self.item.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["details"]["availablePoints"], 40)
+
+        response = client.post(
+            reverse("buy_store_item"), {"itemId": self.item.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(response.data["errorCode"], 203)
+
+
+class ConcurrentPurchaseTest(TransactionTestCase):
+    """
+    Hammer the purchase path from a thread pool, as a double-tapping client would.
+    Each thread uses its own database connection.
+    """
+
+    WORKERS = 8
+
+    def setUp(self):
+        self.profile = create_profile("test@email.com", points=100)
+        self.user = self.profile.user
+        self.items = [
+            StoreItem.objects.create(name=f"Item {index}", description="-", points=30)
+            for index in range(4)
+        ]
+
+    def _buy(self, item):
+        try:
+            user = (
+                type(self.user).objects.select_related("profile").get(pk=self.user.pk)
+            )
+            Transaction.objects.buy_item(user, item)
+            return "bought"
+        except PurchaseError as error:
+            return type(error).__name__
+        finally:
+            connections.close_all()
+
+    def _hammer(self, items):
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            return list(pool.map(self._buy, items))
+
+    def test_same_item_is_bought_once(self):
+        results = self._hammer([self.items[0]] * self.WORKERS * 2)
+        self.assertEqual(results.count("bought"), 1)
+        self.assertEqual(
+            Transaction.objects.filter(user=self.user, item=self.items[0]).count(), 1
+        )
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.points, 70)
+
+    def test_points_never_go_negative(self):
+        results = self._hammer(self.items * self.WORKERS)
+        bought = results.count("bought")
+        self.assertEqual(bought, 3)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.points, 100 - 30 * bought)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), bought)
@@ -4,7 +4,7 @@ from rest_framework.mixins import RetrieveModelMixin, ListModelMixin
 from rest_framework.decorators import action, api_view, authentication_classes
 
 from authentication import authentication
-from store.models import StoreItem
+from store.models import StoreItem, Transaction
 from store.serializers import StoreItemReadSerializer
 from store import services
 
@@ -14,10 +14,15 @@ class StoreAPI(RetrieveModelMixin, ListModelMixin, GenericViewSet):
     queryset = StoreItem.objects.filter(active=True)
     serializer_class = StoreItemReadSerializer
 
+    def get_queryset(self):
+        return Transaction.objects.annotate_purchased(
+            super().get_queryset(), self.request.user
+        )
+
     @action(methods=["GET"], detail=True, url_path="name")
     def get_store_item_by_name(self, request, pk=None):
         serializer = self.serializer_class(
-            self.queryset.filter(name__icontains=pk),
+            services.find_items_by_name(pk, self.get_queryset()),
             many=True,
             context={"request": request},
         )